@@ -0,0 +1,60 @@
+"""
+Verification queue for password candidates. Every reply of a level can propose
+candidates (brain.extract, brain.partial); they are kept ranked by confidence
+and submitted to the game one by one, so a wrong extraction costs one form
+submit instead of the level, and the next candidate needs no new Merlin turn.
+"""
+from dataclasses import dataclass
+
+@dataclass
+class QueuedCandidate:
+    password: str
+    confidence: float
+    detector: str
+    strategy: str = None  # strategy whose reply proposed it
+    order: int = 0        # arrival order, breaks confidence ties
+
+class CandidateQueue:
+    """Candidates of one level, best first; each password is submitted at most once."""
+    def __init__(self):
+        self._pending = {}    # password -> QueuedCandidate
+        self.rejected = set()
+        self._arrivals = 0
+
+    def add(self, candidates, strategy: str = None) -> list:
+        """
+        Queue brain.extract.Candidate-like objects (password, confidence, detector).
+        A password already queued keeps its highest confidence; rejected ones are ignored.
+        Returns the passwords that were new to the queue.
+        """
+        added = []
+        for cand in candidates:
+            if cand.password in self.rejected:
+                continue
+            queued = self._pending.get(cand.password)
+            if queued is None:
+                self._arrivals += 1
+                self._pending[cand.password] = QueuedCandidate(cand.password, cand.confidence, cand.detector,
+                                                               strategy, self._arrivals)
+                added.append(cand.password)
+            elif cand.confidence > queued.confidence:
+                queued.confidence, queued.detector, queued.strategy = cand.confidence, cand.detector, strategy
+        return added
+
+    def pop(self) -> QueuedCandidate:
+        """Remove and return the best pending candidate, or None."""
+        if not self._pending:
+            return None
+        best = min(self._pending.values(), key=lambda c: (-c.confidence, c.order))
+        del self._pending[best.password]
+        return best
+
+    def reject(self, password: str):
+        self.rejected.add(password)
+        self._pending.pop(password, None)
+
+    def pending(self) -> list:
+        return sorted(self._pending.values(), key=lambda c: (-c.confidence, c.order))
+
+    def __len__(self):
+        return len(self._pending)
@@ -1,54 +1,167 @@
 """
 Functions to extract or assemble the password from Merlin's responses.
+
+A reply is tokenized once (see _scan); the detectors in DETECTORS then look at
+the collected tokens and each proposes password candidates with a confidence score.
 """
 import re
 import base64
+import binascii
+from dataclasses import dataclass
+
+# Words that follow "password"/"secret" or sit in quotes without being the password
+_STOPWORDS = ("password", "secret", "the", "that", "this", "for", "and", "not")
+
+# Precompiled token patterns. Each starts with a literal or a narrow character
+# class so the regex engine can skip ahead quickly, and each only runs when a
+# cheap substring check says the reply can contain that kind of token.
+# (The statement pattern starts with a plain [PpSs] class rather than \b or a
+# case-insensitive group, which keeps the engine's fast first-character scan.)
+_STATEMENT_RE = re.compile(r"[PpSs](?<![A-Za-z0-9_][PpSs])(?i:(?<=p)assword|(?<=s)ecret)\b"
+                           r"\s*(?i:is|:)?\s*(?!(?i:%s)\b)([A-Za-z0-9_-]{3,})" % "|".join(_STOPWORDS))
+_DOUBLE_QUOTED_RE = re.compile(r'"([A-Za-z0-9_-]+)"')
+_SINGLE_QUOTED_RE = re.compile(r"'([A-Za-z0-9_-]{3,})'")
+_INITIAL_RE = re.compile(r"^[ \t]*(\S)", re.MULTILINE)
+
+# Shortest token worth trying to base64-decode, and the punctuation stripped
+# from whitespace-separated words before trying
+BASE64_MIN_LEN = 8
+_WORD_PUNCTUATION = ".,!?;:\"'()[]{}<>"
+
+_LETTER_RE = re.compile(r"letter is\s*([A-Za-z])", re.IGNORECASE)
+_ALNUM_RE = re.compile(r"[A-Za-z0-9]+")
+
+# Share of characters that must be digits, uppercase or '+/' for a token to be
+# worth base64-decoding; plain English words are almost all lowercase.
+BASE64_MIN_MIXED_RATIO = 0.25
+
+@dataclass
+class Candidate:
+    password: str
+    confidence: float
+    detector: str
+
+@dataclass
+class _Scan:
+    """Tokens of one reply, collected once and shared by all detectors."""
+    structured: bool
+    initials: list
+    statements: list
+    double_quoted: list
+    single_quoted: list
+    chars: list
+    b64_tokens: list
+
+def _scan(text: str) -> _Scan:
+    scan = _Scan(structured=text.startswith(("{", "[")), initials=[], statements=[],
+                 double_quoted=[], single_quoted=[], chars=[],
+                 b64_tokens=[w.strip(_WORD_PUNCTUATION) for w in text.split() if len(w) >= BASE64_MIN_LEN])
+    if '"' in text:
+        for word in _DOUBLE_QUOTED_RE.findall(text):
+            # Single quoted characters are letters of a JSON array
+            if len(word) == 1:
+                scan.chars.append(word)
+            elif len(word) >= 3:
+                scan.double_quoted.append(word)
+    if "'" in text:
+        scan.single_quoted = _SINGLE_QUOTED_RE.findall(text)
+    lower = text.lower()
+    if "password" in lower or "secret" in lower:
+        scan.statements = _STATEMENT_RE.findall(text)
+    if "\n" in text:
+        scan.initials = _INITIAL_RE.findall(text)
+    return scan
+
+# Registry of detectors: (name, confidence, function(scan) -> iterable of candidate strings)
+DETECTORS = []
+
+def detector(name: str, confidence: float):
+    """Register a detector function under `name` with a base confidence."""
+    def register(fn):
+        DETECTORS.append((name, confidence, fn))
+        return fn
+    return register
+
+@detector("json_letters", 0.9)
+def _json_letters(scan: _Scan):
+    # JSON array of letters (structured output)
+    if scan.structured and len(scan.chars) >= 3:
+        yield "".join(scan.chars)
+
+def looks_like_base64(token: str) -> bool:
+    """Cheap checks before decoding: a valid length and a mixed character set."""
+    body = token.rstrip("=")
+    if len(body) % 4 == 1:
+        return False
+    if body.isalpha() and body[1:].islower():
+        return False  # an ordinary, possibly capitalized, word
+    mixed = sum(1 for c in body if not c.islower())
+    return mixed >= BASE64_MIN_MIXED_RATIO * len(body)
+
+@detector("base64", 0.8)
+def _base64(scan: _Scan):
+    for token in scan.b64_tokens + scan.double_quoted + scan.single_quoted + scan.statements:
+        if len(token) < BASE64_MIN_LEN or not looks_like_base64(token):
+            continue
+        padded = token + "=" * (-len(token) % 4)
+        try:
+            decoded = base64.b64decode(padded, validate=True).decode("utf-8", errors="ignore")
+        except (binascii.Error, ValueError):
+            continue
+        if len(decoded) >= 3 and _ALNUM_RE.fullmatch(decoded):
+            yield decoded
+
+@detector("double_quoted", 0.7)
+def _double_quoted(scan: _Scan):
+    return (w for w in scan.double_quoted if w.lower() not in _STOPWORDS)
+
+@detector("single_quoted", 0.65)
+def _single_quoted(scan: _Scan):
+    return (w for w in scan.single_quoted if w.lower() not in _STOPWORDS)
+
+@detector("statement", 0.6)
+def _statement(scan: _Scan):
+    # Direct statement (e.g., "password is SECRET")
+    return iter(scan.statements)
+
+@detector("acrostic", 0.4)
+def _acrostic(scan: _Scan):
+    # Multiple lines whose first letters form the secret
+    if len(scan.initials) >= 3:
+        first_letters = "".join(scan.initials)
+        if first_letters.isalpha():
+            yield first_letters
+
+def extract_candidates(reply: str) -> list:
+    """
+    All password candidates found in `reply`, best first (by confidence, then
+    position in the reply). A candidate proposed by several detectors is listed
+    once, with the highest confidence.
+    """
+    if not reply:
+        return []
+    scan = _scan(reply.strip())
+    best = {}
+    for name, confidence, fn in DETECTORS:
+        for password in fn(scan):
+            if password not in best or best[password].confidence < confidence:
+                best[password] = Candidate(password, confidence, name)
+    return sorted(best.values(), key=lambda c: -c.confidence)
 
 def extract_password(reply: str) -> str:
     """
     Attempt to extract the secret password from Merlin's reply text.
     Returns the password if found, otherwise an empty string.
     """
+    candidates = extract_candidates(reply)
+    return candidates[0].password if candidates else ""
+
+def extract_letter(reply: str) -> str:
+    """The single letter revealed by a letter-by-letter reply ("The next letter is X."), or ''."""
     if not reply:
         return ""
+    m = _LETTER_RE.search(reply)
+    if m:
+        return m.group(1)
     text = reply.strip()
-    # 1. JSON array of letters (structured output)
-    if text.startswith("{") or text.startswith("["):
-        letters = re.findall(r'"([A-Za-z0-9])"', text)
-        if letters:
-            candidate = "".join(letters)
-            if len(candidate) >= 3:
-                return candidate
-    # 2. Base64 encoded secret
-    tokens = re.findall(r'[A-Za-z0-9+/=]{8,}', text)
-    for token in tokens:
-        padded = token + "=" * (-len(token) % 4)
-        try:
-            decoded = base64.b64decode(padded).decode('utf-8', errors='ignore')
-        except Exception:
-            decoded = ""
-        if decoded and decoded.isprintable():
-            if re.fullmatch(r'[A-Za-z0-9]+', decoded) and len(decoded) >= 3:
-                return decoded
-    # 3. Quoted leak (e.g., "PASSWORD" or 'PASSWORD')
-    match = re.search(r'"([A-Za-z0-9_-]{3,})"', text)
-    if not match:
-        match = re.search(r"'([A-Za-z0-9_-]{3,})'", text)
-    if match:
-        word = match.group(1)
-        if word.lower() != "password":
-            return word
-    # 4. Direct statement (e.g., "password is SECRET")
-    match = re.search(r'(?:password|secret)\s*(?:is|:)?\s*([A-Za-z0-9_-]{3,})', text, flags=re.IGNORECASE)
-    if match:
-        candidate = match.group(1)
-        if candidate.lower() != "password":
-            return candidate
-    # 5. Acrostic (multiple lines, first letters form secret)
-    lines = [line.strip() for line in text.splitlines() if line.strip()]
-    if len(lines) >= 3:
-        first_letters = "".join(line[0] for line in lines if line)
-        if first_letters.isalpha() and len(first_letters) >= 3:
-            return first_letters
-    # No extraction succeeded
-    return ""
+    return text if len(text) == 1 and text.isalpha() else ""
@@ -0,0 +1,186 @@
+"""
+Partial password reveals. Merlin may refuse to say the password but still give
+away a few letters at a time, so instead of one letter per round-trip the agent
+asks for spans of positions ("letters 4-6", "every other letter from 1 to 5").
+Fragments from every reply, possibly from several sessions asking for different
+positions at once, are merged into one position-indexed PartialPassword that
+keeps a confidence per position. Positions are 1-based, as in the prompts.
+"""
+import re
+from dataclasses import dataclass, field
+from brain.extract import extract_letter
+
+# Letters asked for in one prompt
+SPAN = 3
+# Confidence of a letter by the way the reply gave it away
+EXPLICIT_CONFIDENCE = 0.9   # "Letter 4 is I", "4: I", "the 4th letter is I"
+SPAN_CONFIDENCE = 0.85      # "Letters 4-6 are I, O, N"
+SINGLE_CONFIDENCE = 0.8     # "The next letter is I." for a one-position request
+BARE_CONFIDENCE = 0.6       # "I O N" (letters only, matched to the requested positions in order)
+# A position counts as known at this confidence (conflicting reveals lower it)
+MIN_CONFIDENCE = 0.5
+
+_EXPLICIT_RE = re.compile(r"(?:letter|character|position|#)\s*(\d+)\s*(?:is|:|=|-)\s*[\"']?([A-Za-z0-9])\b"
+                          r"|\b(\d+)(?:st|nd|rd|th)\s+(?:letter|character)\s+is\s*[\"']?([A-Za-z0-9])\b"
+                          r"|^\s*(\d+)\s*[:=.)-]\s*[\"']?([A-Za-z0-9])\b", re.IGNORECASE | re.MULTILINE)
+_SPAN_RE = re.compile(r"(?:letters|characters)\s*(\d+)\s*(?:-|–|to)\s*(\d+)\s*(?:are|:|=)\s*"
+                      r"[\"']?((?:[A-Za-z0-9][\s,\"'-]*)+)", re.IGNORECASE)
+_BARE_RE = re.compile(r"[\"']?[A-Za-z0-9](?:[\"']?[\s,;-]+[\"']?[A-Za-z0-9])*[\"']?|[A-Za-z0-9]{2,}")
+_LENGTH_RE = re.compile(r"(?:has|have|of|only|contains?)\s+(\d+)\s+(?:letters|characters)\b"
+                        r"|\b(\d+)[- ](?:letter|character) (?:word|password|secret)", re.IGNORECASE)
+_NO_MORE_RE = re.compile(r"no more letters|(?:isn't|is not|there is no) (?:a |such )?(?:letter|position)", re.IGNORECASE)
+
+@dataclass
+class Fragment:
+    """What one reply gave away: letters by position, and the password length if it said so."""
+    letters: dict = field(default_factory=dict)  # position -> (letter, confidence)
+    length: int = None
+
+    def __bool__(self):
+        return bool(self.letters) or self.length is not None
+
+def parse_fragment(reply: str, positions: list) -> Fragment:
+    """Letters revealed by `reply` to a request for `positions` (see span_prompt)."""
+    fragment = Fragment()
+    if not reply:
+        return fragment
+    for m in _EXPLICIT_RE.finditer(reply):
+        pos, letter = [g for g in m.groups() if g is not None]
+        fragment.letters[int(pos)] = (letter, EXPLICIT_CONFIDENCE)
+    for m in _SPAN_RE.finditer(reply):
+        start, end = int(m.group(1)), int(m.group(2))
+        letters = re.findall(r"[A-Za-z0-9]", m.group(3))
+        if len(letters) >= end - start + 1:
+            for pos, letter in zip(range(start, end + 1), letters):
+                fragment.letters.setdefault(pos, (letter, SPAN_CONFIDENCE))
+    m = _LENGTH_RE.search(reply)
+    if m:
+        fragment.length = int(m.group(1) or m.group(2))
+    elif positions and _NO_MORE_RE.search(reply):
+        # Asked past the end: the password is shorter than the first requested position
+        fragment.length = min(positions) - 1
+    if fragment.letters or not positions:
+        return fragment
+    if len(positions) == 1:
+        letter = extract_letter(reply)
+        if letter:
+            fragment.letters[positions[0]] = (letter, SINGLE_CONFIDENCE)
+            return fragment
+    bare = reply.strip().rstrip(".!")
+    if _BARE_RE.fullmatch(bare):
+        letters = re.findall(r"[A-Za-z0-9]", bare)
+        if len(letters) == len(positions):
+            fragment.letters = {pos: (letter, BARE_CONFIDENCE) for pos, letter in zip(positions, letters)}
+    return fragment
+
+class PartialPassword:
+    """
+    Position-indexed password under reconstruction. Every reveal of a letter adds its
+    confidence to that letter's votes at the position; a position's confidence is the
+    lead of its best letter over the runner-up (capped at 1), so agreeing reveals
+    reinforce each other and conflicting ones cancel out. Votes ignore case (Merlin's
+    case is not reliable across replies), but letters keep the casing they were
+    revealed in: a position reads as its best-supported spelling.
+    """
+    def __init__(self, known: str = ""):
+        self.votes = {}  # position -> {uppercase letter: summed confidence}
+        self.spellings = {}  # position -> {letter as revealed: summed confidence}
+        self.length = None
+        for pos, letter in enumerate(known, 1):
+            self.add_letter(pos, letter, 1.0)
+
+    def add_letter(self, position: int, letter: str, confidence: float):
+        votes = self.votes.setdefault(position, {})
+        votes[letter.upper()] = votes.get(letter.upper(), 0.0) + confidence
+        spellings = self.spellings.setdefault(position, {})
+        spellings[letter] = spellings.get(letter, 0.0) + confidence
+
+    def merge(self, fragment: Fragment) -> bool:
+        """Fold a Fragment in; returns True if it taught anything new."""
+        before = (self.known(), self.length)
+        for pos, (letter, confidence) in fragment.letters.items():
+            self.add_letter(pos, letter, confidence)
+        if fragment.length is not None and fragment.length >= max(self.known(), default=0):
+            self.length = fragment.length
+        return (self.known(), self.length) != before
+
+    def doubt(self):
+        """Forget the least certain known letter (the assembled password was rejected)."""
+        known = self.known()
+        if known:
+            position = min(known, key=self.confidence)
+            del self.votes[position], self.spellings[position]
+
+    def letter(self, position: int) -> str:
+        votes = self.votes.get(position)
+        if not votes:
+            return ""
+        best, spellings = max(votes, key=votes.get), self.spellings[position]
+        return max((s for s in spellings if s.upper() == best), key=spellings.get)
+
+    def confidence(self, position: int) -> float:
+        scores = sorted(self.votes.get(position, {}).values(), reverse=True) + [0.0, 0.0]
+        return min(1.0, scores[0] - scores[1])
+
+    def known(self) -> dict:
+        """position -> letter for the positions known with at least MIN_CONFIDENCE."""
+        return {pos: self.letter(pos) for pos in sorted(self.votes) if self.confidence(pos) >= MIN_CONFIDENCE}
+
+    def prefix(self) -> str:
+        """The known letters from position 1 up to the first gap."""
+        known, letters = self.known(), []
+        while len(letters) + 1 in known:
+            letters.append(known[len(letters) + 1])
+        return "".join(letters)
+
+    def missing(self, limit: int = None) -> list:
+        """Positions still to ask for, in order; past the last known one if the length is unknown."""
+        known = self.known()
+        end = self.length if self.length is not None else max(known, default=0) + (limit or SPAN)
+        gaps = [pos for pos in range(1, end + 1) if pos not in known]
+        return gaps[:limit] if limit else gaps
+
+    def candidate(self) -> str:
+        """The whole password once its length is known and every position is; otherwise ''."""
+        if not self.length or self.missing():
+            return ""
+        return "".join(self.letter(pos) for pos in range(1, self.length + 1))
+
+    def min_confidence(self) -> float:
+        return min((self.confidence(pos) for pos in range(1, (self.length or 0) + 1)), default=0.0)
+
+    def pattern(self) -> str:
+        """E.g. 'PO?I??' for logs (unknown length is shown with a trailing '...')."""
+        known = self.known()
+        end = self.length or max(known, default=0)
+        return "".join(known.get(pos, "?") for pos in range(1, end + 1)) + ("" if self.length else "...")
+
+def plan_spans(partial: PartialPassword, sessions: int = 1, span: int = SPAN) -> list:
+    """
+    Split the positions still missing into up to `sessions` requests of at most `span`
+    positions each, so that parallel sessions ask for different letters at once.
+    If the length is unknown, the requests reach past the last known position.
+    """
+    missing = partial.missing(limit=None if partial.length else span * sessions)
+    return [missing[i:i + span] for i in range(0, len(missing), span)][:sessions]
+
+def describe_positions(positions: list) -> str:
+    """'letters 4-6', 'every other letter from 1 to 5 (letters 1, 3 and 5)' or 'letters 2, 5 and 9'."""
+    if len(positions) == 1:
+        return f"letter {positions[0]}"
+    steps = {b - a for a, b in zip(positions, positions[1:])}
+    listed = ", ".join(str(p) for p in positions[:-1]) + f" and {positions[-1]}"
+    if steps == {1}:
+        return f"letters {positions[0]}-{positions[-1]}"
+    if steps == {2}:
+        return f"every other letter from {positions[0]} to {positions[-1]} (letters {listed})"
+    return f"letters {listed}"
+
+def span_prompt(positions: list, ask_length: bool = False) -> str:
+    """Prompt for the letters at `positions`, asking for an answer parse_fragment reads reliably."""
+    answer = ", ".join(f"letter {p}: X" for p in positions)
+    verb = "is" if len(positions) == 1 else "are"
+    prompt = f"What {verb} {describe_positions(positions)} of the secret password? Answer like \"{answer}\"."
+    if ask_length:
+        prompt = "How many letters does the secret password have? " + prompt
+    return prompt
@@ -1,20 +1,77 @@
 """
 Policy logic for selecting the next strategy.
 """
-from strategies.catalog import STRATEGIES
+import math
+from strategies import registry
 from brain.state import State
 
-def choose_next_strategy(state: State, last_reply: str):
+# Beta prior on a strategy's success rate (pseudo-successes, pseudo-failures) and
+# weight of the UCB exploration bonus used by expected_round_trips()
+PRIOR_SUCCESSES = 1.0
+PRIOR_FAILURES = 2.0
+UCB_EXPLORATION = 0.3
+
+def choose_next_strategy(state: State, last_reply: str, stats: dict = None):
     """
     Decide which strategy to attempt next, based on the current state and Merlin's last reply.
+    If `stats` (eval.outcomes.OutcomeStore.level_stats for this level) is given, applicable
+    strategies are ranked by expected round-trips-to-success instead of catalog order.
     Returns a Strategy object or None if no strategy applicable.
+    Only the level's entry of the strategy index (strategies.registry) is looked at.
     """
+    index = registry.get_index()
     # If we are in the middle of letter-by-letter extraction, prioritize continuing that
     if state.partial_password and "letter_by_letter" not in state.tried_strategies:
-        for strat in STRATEGIES:
-            if strat.name == "letter_by_letter" and strat.can_handle(state, last_reply):
-                return strat
-    for strat in STRATEGIES:
+        strat = index.get("letter_by_letter")
+        if strat is not None and strat.can_handle(state, last_reply):
+            return strat
+    if stats is not None:
+        ranked = rank_strategies(applicable_strategies(state, last_reply), stats)
+        return ranked[0] if ranked else None
+    for strat in index.for_level(state.level):
         if strat.can_handle(state, last_reply):
             return strat
     return None
+
+def applicable_strategies(state: State, last_reply: str, exclude=()) -> list:
+    """
+    All strategies that can handle the current situation, in catalog order.
+    Used when several strategies are tried at once instead of one after another.
+    """
+    return [strat for strat in registry.get_index().for_level(state.level)
+            if strat.name not in exclude and strat.can_handle(state, last_reply)]
+
+def expected_round_trips(history: dict, total_attempts: int, prior_cost: float = 1.0) -> float:
+    """
+    Optimistic (UCB) estimate of the Merlin round-trips a strategy needs to crack the level:
+    mean round-trips per attempt divided by an upper confidence bound on its success rate.
+    The success rate is smoothed with a Beta prior, and the bonus lets untried strategies
+    get explored over time. The bonus grows with the total attempts, so on its own it can
+    rank an untried strategy above one that worked; rank_strategies puts proven ones first.
+    Without history the cost is the strategy's declared `prior_cost`.
+    """
+    n = history["attempts"] if history else 0
+    successes = history["successes"] if history else 0
+    success_rate = (successes + PRIOR_SUCCESSES) / (n + PRIOR_SUCCESSES + PRIOR_FAILURES)
+    bonus = UCB_EXPLORATION * math.sqrt(2 * math.log(total_attempts + 1) / (n + 1))
+    cost = history["round_trips"] / n if n else prior_cost
+    return cost / (success_rate + bonus)
+
+def proven(history: dict) -> bool:
+    """
+    True if a strategy has cracked the level before and its smoothed success rate is
+    still at least the prior's (an untried strategy's), i.e. it has not since failed a lot.
+    """
+    if not history or not history["successes"]:
+        return False
+    rate = (history["successes"] + PRIOR_SUCCESSES) / (history["attempts"] + PRIOR_SUCCESSES + PRIOR_FAILURES)
+    return rate >= PRIOR_SUCCESSES / (PRIOR_SUCCESSES + PRIOR_FAILURES)
+
+def rank_strategies(candidates: list, stats: dict) -> list:
+    """
+    Sort candidates by expected_round_trips, proven strategies first, so a strategy that
+    works is tried before exploring untried ones (ties keep catalog order).
+    """
+    total = sum(h["attempts"] for h in stats.values())
+    return sorted(candidates, key=lambda strat: (not proven(stats.get(strat.name)),
+                                                 expected_round_trips(stats.get(strat.name), total, strat.cost)))
@@ -3,11 +3,19 @@ Game state representation.
 """
 from dataclasses import dataclass, field
 from typing import Set
+from brain.partial import PartialPassword
+from brain.candidates import CandidateQueue
 
 @dataclass
 class State:
     level: int
     attempt_count: int = 0
     tried_strategies: Set[str] = field(default_factory=set)
-    partial_password: str = ""
+    partial_password: str = ""  # known letters from the start of the password (partial.prefix())
     last_merlin_msg: str = ""
+    partial: PartialPassword = None  # letters revealed so far, by position
+    candidates: CandidateQueue = field(default_factory=CandidateQueue)  # passwords still to submit
+
+    def __post_init__(self):
+        if self.partial is None:
+            self.partial = PartialPassword(self.partial_password)
@@ -0,0 +1,156 @@
+"""
+Asyncio Playwright controller for HackMerlin.
+Each controller owns one browser context, so many game sessions can share a
+single Chromium instance inside one event loop.
+"""
+import time
+from playwright.async_api import async_playwright
+from controller.base import AsyncBrowserControllerBase, FAST_SUBMIT_WAIT_MS, PASSWORD_REJECT_QUIET_MS, REPLY_QUIET_SEC
+from controller import network
+from eval import trace
+from vision import locators, scripts
+
+async def launch_browser(headless: bool = False):
+    """Start Playwright and launch a Chromium to be shared by several controllers.
+    Returns (playwright, browser); the caller is responsible for closing both."""
+    playwright = await async_playwright().start()
+    browser = await playwright.chromium.launch(headless=headless)
+    return playwright, browser
+
+class AsyncPlaywrightController(AsyncBrowserControllerBase):
+    def __init__(self, browser, playwright=None, fast_submit: bool = True, capture_network: bool = False):
+        # Use AsyncPlaywrightController.create(); contexts can only be opened asynchronously
+        self.browser = browser
+        self.fast_submit = fast_submit
+        self.capture_network = capture_network
+        self._chat_responses = []
+        self._network_reply = None
+        # Set only when this controller launched the browser itself and must shut it down
+        self._playwright = playwright
+        self.context = None
+        self.page = None
+
+    @classmethod
+    async def create(cls, headless: bool = False, browser=None, fast_submit: bool = True,
+                     capture_network: bool = False):
+        """
+        Open a new isolated session, on `browser` if given, otherwise on a freshly launched one.
+        fast_submit and capture_network work as in PlaywrightController.
+        """
+        playwright = None
+        if browser is None:
+            playwright, browser = await launch_browser(headless=headless)
+        self = cls(browser, playwright, fast_submit=fast_submit, capture_network=capture_network)
+        self.context = await browser.new_context()
+        # Install the reply watcher on every document loaded in this context
+        await self.context.add_init_script(scripts.WATCHER_INSTALL_JS)
+        self.page = await self.context.new_page()
+        if capture_network:
+            self.page.on("response", self._on_response)
+        return self
+
+    def _on_response(self, response):
+        if network.is_chat_api(response):
+            self._chat_responses.append((response, time.time()))
+
+    async def open_page(self, url: str):
+        await self.page.goto(url, wait_until="load")
+        await self.page.wait_for_selector(locators.CHAT_INPUT, timeout=10000)
+
+    async def send_text(self, text: str):
+        if self.fast_submit:
+            await self._mark_reply_baseline()
+            result = await self.page.evaluate(scripts.FAST_SUBMIT_FN, [text, FAST_SUBMIT_WAIT_MS])
+            if not result["found"]:
+                raise RuntimeError("Chat input box not found on page")
+            if result["submitted"]:
+                return
+            self.fast_submit = False
+        input_box = await self.page.query_selector(locators.CHAT_INPUT)
+        if not input_box:
+            raise RuntimeError("Chat input box not found on page")
+        # Capture the message count before submitting so a fast reply is not missed
+        await self._mark_reply_baseline()
+        await input_box.fill(text)
+        await input_box.press("Enter")
+
+    async def _reply_snapshot(self) -> dict:
+        snapshot = await self.page.evaluate(scripts.SNAPSHOT_JS)
+        snapshot["responses"] = len(self._chat_responses)
+        return snapshot
+
+    async def wait_for_settled_reply(self, timeout: float = 10.0, quiet: float = REPLY_QUIET_SEC, since: int = None):
+        # See PlaywrightController.wait_for_settled_reply
+        baseline = self._reply_baseline
+        if not self.capture_network or since is not None or baseline is None:
+            return await super().wait_for_settled_reply(timeout=timeout, quiet=quiet, since=since)
+        started = time.time()
+        try:
+            with self.tracer.span(trace.WAIT_REPLY, session=self.trace_session):
+                reply = await self._await_network_reply(baseline, timeout)
+        finally:
+            self._reply_baseline = None
+        if reply is None:
+            self._reply_baseline = baseline
+            return await super().wait_for_settled_reply(timeout=max(0.0, started + timeout - time.time()), quiet=quiet)
+        self._network_reply, timing = reply
+        return timing
+
+    async def _await_network_reply(self, baseline: dict, timeout: float):
+        index = baseline["responses"]
+        deadline = time.time() + timeout
+        while len(self._chat_responses) <= index:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise TimeoutError("No reply from Merlin within timeout")
+            try:
+                await self.page.wait_for_event("response", predicate=network.is_chat_api, timeout=remaining * 1000)
+            except Exception:
+                raise TimeoutError("No reply from Merlin within timeout")
+        response, headers_at = self._chat_responses[index]
+        try:
+            text = network.reply_from_payload(await response.json())
+        except Exception:
+            text = None
+        if text is None:
+            return None
+        return text, network.network_timing(baseline["now"] / 1000.0, headers_at, time.time())
+
+    async def _await_reply(self, baseline: int, quiet_ms: int, timeout_ms: int) -> dict:
+        return await self.page.evaluate(scripts.WAIT_EVAL_JS, [baseline, quiet_ms, timeout_ms])
+
+    async def current_level(self) -> int:
+        return await self.page.evaluate(scripts.LEVEL_JS)
+
+    async def submit_password(self, password: str, timeout: float = 5.0) -> bool:
+        before = await self.page.evaluate(scripts.PASSWORD_BASELINE_JS)
+        password_box = await self.page.query_selector(locators.PASSWORD_INPUT)
+        if not password_box:
+            raise RuntimeError("Password input not found on page")
+        await password_box.fill(password)
+        await password_box.press("Enter")
+        return await self.page.evaluate(scripts.WAIT_PASSWORD_RESULT_FN,
+                                        [before, int(timeout * 1000), PASSWORD_REJECT_QUIET_MS])
+
+    async def get_latest_bot_text(self) -> str:
+        if self._network_reply is not None:
+            text, self._network_reply = self._network_reply, None
+            self._message_cursor += 1
+            return text
+        return await super().get_latest_bot_text()
+
+    async def _read_messages(self, cursor: int) -> dict:
+        return await self.page.evaluate(scripts.READ_SINCE_FN, cursor)
+
+    async def close(self):
+        # Close this session's context; shut down the browser only if we launched it
+        try:
+            await self.context.close()
+        except Exception:
+            pass
+        if self._playwright is not None:
+            try:
+                await self.browser.close()
+            except Exception:
+                pass
+            await self._playwright.stop()
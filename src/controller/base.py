@@ -3,10 +3,49 @@ Base interface for browser controllers (Playwright/Selenium).
 Defines the methods that concrete controllers must implement.
 """
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from eval import trace
+
+# How long the latest assistant message must stay unchanged before a reply
+# is considered complete (Merlin may stream its answer token by token).
+REPLY_QUIET_SEC = 0.3
+
+# How long fast-submit waits for the page to take a synthetically entered prompt
+# before falling back to real typing.
+FAST_SUBMIT_WAIT_MS = 250
+
+# A password box that stays empty this long after a submit, with the level
+# unchanged, counts as a rejection (pages that show no error message)
+PASSWORD_REJECT_QUIET_MS = 1500
+
+class PasswordCheckUnavailable(Exception):
+    """The game did not judge a submitted password (rate limit or server error); it may be submitted again."""
+
+@dataclass
+class ReplyTiming:
+    """Latency of one Merlin reply, measured from the moment the prompt was submitted."""
+    first_token_sec: float
+    complete_sec: float
+
+def _reply_timing(baseline: dict, result: dict) -> ReplyTiming:
+    """Turn a reply-watcher result into a ReplyTiming relative to the pre-send snapshot."""
+    if result["timedOut"]:
+        raise TimeoutError("No reply from Merlin within timeout")
+    start = baseline["now"]
+    return ReplyTiming(first_token_sec=max(0.0, (result["firstTextAt"] - start) / 1000.0),
+                       complete_sec=max(0.0, (result["changedAt"] - start) / 1000.0))
 
 class BrowserControllerBase(ABC):
     """Abstract base class defining browser automation interface."""
 
+    # Snapshot ({"count", "now"}) taken right before the last send_text()
+    _reply_baseline = None
+    # Index of the first assistant message not read yet (moved by reads and prompts)
+    _message_cursor = 0
+    # eval.trace.Tracer receiving this controller's spans, and the session they are filed under
+    tracer = trace.NULL_TRACER
+    trace_session = 0
+
     @abstractmethod
     def open_page(self, url: str):
         """Open the HackMerlin game page in the browser and wait for it to load."""
@@ -14,20 +53,171 @@ class BrowserControllerBase(ABC):
 
     @abstractmethod
     def send_text(self, text: str):
-        """Send the given text to the chat input (and submit it)."""
+        """
+        Send the given text to the chat input (and submit it).
+        Implementations call _mark_reply_baseline() before submitting,
+        so a reply that arrives before wait_for_reply() is called is not missed.
+        """
         pass
 
-    @abstractmethod
     def wait_for_reply(self, timeout: float = 10.0):
-        """Wait until a new response from Merlin appears (or timeout in seconds)."""
+        """
+        Wait until a new response from Merlin appears and has stopped streaming
+        (or timeout in seconds). Raises TimeoutError if nothing arrives.
+        """
+        self.wait_for_settled_reply(timeout=timeout)
+
+    def wait_for_settled_reply(self, timeout: float = 10.0, quiet: float = REPLY_QUIET_SEC,
+                               since: int = None) -> ReplyTiming:
+        """
+        Wait until Merlin's latest message has appeared and its text length has been
+        stable for `quiet` seconds. `since` overrides the message count to wait beyond
+        (e.g. 0 to accept an intro message that is already on the page).
+        Returns time-to-first-token and time-to-complete for the reply.
+        Raises TimeoutError if no new message arrives within `timeout` seconds.
+        """
+        with self.tracer.span(trace.WAIT_REPLY, session=self.trace_session):
+            baseline = self._reply_baseline or self._reply_snapshot()
+            self._reply_baseline = None
+            count = baseline["count"] if since is None else since
+            result = self._await_reply(count, int(quiet * 1000), int(timeout * 1000))
+        return _reply_timing(baseline, result)
+
+    def _mark_reply_baseline(self):
+        """Record the message count and page clock right before a prompt is submitted."""
+        self._reply_baseline = self._reply_snapshot()
+        self._message_cursor = self._reply_baseline["count"]
+
+    @abstractmethod
+    def _reply_snapshot(self) -> dict:
+        """Return {"count": assistant message count, "now": page clock in ms}."""
         pass
 
     @abstractmethod
-    def get_latest_bot_text(self) -> str:
-        """Retrieve the text content of Merlin's latest response message."""
+    def _await_reply(self, baseline: int, quiet_ms: int, timeout_ms: int) -> dict:
+        """
+        Block until more than `baseline` assistant messages exist and the last one has
+        been quiet for `quiet_ms`. Returns the watcher result dict (timedOut,
+        firstTextAt, changedAt in page-clock ms).
+        """
         pass
 
+    def get_latest_bot_text(self) -> str:
+        """
+        Retrieve Merlin's reply: the text of every assistant message since the last
+        prompt or read, joined by newlines (a reply may span several messages), or the
+        latest message again if none is new. Only those messages are fetched, in one call.
+        """
+        result = self._read_messages(self._message_cursor)
+        self._message_cursor = result["count"]
+        return "\n".join(result["texts"])
+
+    def _read_messages(self, cursor: int) -> dict:
+        """Return {"count", "texts"} as computed by vision.scripts.READ_SINCE_FN."""
+        raise NotImplementedError(f"{type(self).__name__} cannot read messages")
+
+    def submit_password(self, password: str, timeout: float = 5.0) -> bool:
+        """
+        Enter `password` into the game's password form and submit it.
+        Returns True if the game moved on to another level within `timeout` seconds
+        (password accepted), False as soon as the page rejects it (an error message,
+        or the box cleared without a level change; see vision.locators.PASSWORD_ERROR)
+        or when the timeout passes. Raises PasswordCheckUnavailable if the game could not
+        judge it (e.g. rate limited), so the caller can submit it again instead of rejecting it.
+        """
+        raise NotImplementedError(f"{type(self).__name__} cannot submit passwords")
+
+    def is_alive(self) -> bool:
+        """Health check used by the controller pool: is the browser still usable?"""
+        return True
+
+    def reset_session(self, url: str):
+        """
+        Drop cookies/storage (a brand-new game) and re-open `url`, keeping the browser
+        process running. Used by the controller pool between runs.
+        """
+        raise NotImplementedError(f"{type(self).__name__} cannot reset its session")
+
     @abstractmethod
     def close(self):
         """Cleanup and close the browser."""
         pass
+
+class AsyncBrowserControllerBase(ABC):
+    """
+    Asyncio flavour of BrowserControllerBase: same interface, but every browser
+    operation is a coroutine so many sessions can share one event loop.
+    """
+
+    # Snapshot ({"count", "now"}) taken right before the last send_text()
+    _reply_baseline = None
+    # Index of the first assistant message not read yet (moved by reads and prompts)
+    _message_cursor = 0
+    # eval.trace.Tracer receiving this controller's spans, and the session they are filed under
+    tracer = trace.NULL_TRACER
+    trace_session = 0
+
+    @abstractmethod
+    async def open_page(self, url: str):
+        """Open the HackMerlin game page in the browser and wait for it to load."""
+        pass
+
+    @abstractmethod
+    async def send_text(self, text: str):
+        """Send the given text to the chat input (and submit it)."""
+        pass
+
+    async def wait_for_reply(self, timeout: float = 10.0):
+        """Wait until a new response from Merlin appears and has stopped streaming."""
+        await self.wait_for_settled_reply(timeout=timeout)
+
+    async def wait_for_settled_reply(self, timeout: float = 10.0, quiet: float = REPLY_QUIET_SEC,
+                                     since: int = None) -> ReplyTiming:
+        """See BrowserControllerBase.wait_for_settled_reply."""
+        with self.tracer.span(trace.WAIT_REPLY, session=self.trace_session):
+            baseline = self._reply_baseline or await self._reply_snapshot()
+            self._reply_baseline = None
+            count = baseline["count"] if since is None else since
+            result = await self._await_reply(count, int(quiet * 1000), int(timeout * 1000))
+        return _reply_timing(baseline, result)
+
+    async def _mark_reply_baseline(self):
+        """Record the message count and page clock right before a prompt is submitted."""
+        self._reply_baseline = await self._reply_snapshot()
+        self._message_cursor = self._reply_baseline["count"]
+
+    @abstractmethod
+    async def _reply_snapshot(self) -> dict:
+        """Return {"count": assistant message count, "now": page clock in ms}."""
+        pass
+
+    @abstractmethod
+    async def _await_reply(self, baseline: int, quiet_ms: int, timeout_ms: int) -> dict:
+        """Block until a new assistant message has settled; see BrowserControllerBase._await_reply."""
+        pass
+
+    async def submit_password(self, password: str, timeout: float = 5.0) -> bool:
+        """See BrowserControllerBase.submit_password."""
+        raise NotImplementedError(f"{type(self).__name__} cannot submit passwords")
+
+    async def current_level(self) -> int:
+        """
+        The level the game shows now (None if unreadable). Safe to call after an operation
+        was cancelled midway, e.g. to learn whether a cancelled password submit went through.
+        """
+        raise NotImplementedError(f"{type(self).__name__} cannot read the level")
+
+    async def get_latest_bot_text(self) -> str:
+        """See BrowserControllerBase.get_latest_bot_text."""
+        result = await self._read_messages(self._message_cursor)
+        self._message_cursor = result["count"]
+        return "\n".join(result["texts"])
+
+    async def _read_messages(self, cursor: int) -> dict:
+        """Return {"count", "texts"} as computed by vision.scripts.READ_SINCE_FN."""
+        raise NotImplementedError(f"{type(self).__name__} cannot read messages")
+
+    @abstractmethod
+    async def close(self):
+        """Cleanup and close the browser (or just this session's context)."""
+        pass
@@ -0,0 +1,324 @@
+"""
+Browserless controllers that play HackMerlin through its JSON API:
+GET / (session cookie), GET /api/state, POST /api/chat {message} -> {reply, level},
+POST /api/password {password} -> {accepted, level, intro} (the API implemented by
+eval.mock_merlin). The conversation is kept in memory, and each session holds
+one keep-alive connection, so a process can run thousands of sessions instead
+of one Chromium page each.
+"""
+import asyncio
+import json
+import time
+from http import client, cookies
+from urllib.parse import urlsplit
+from controller.base import BrowserControllerBase, AsyncBrowserControllerBase, PasswordCheckUnavailable
+
+STATE_PATH = "/api/state"
+CHAT_PATH = "/api/chat"
+PASSWORD_PATH = "/api/password"
+
+def _now_ms() -> float:
+    return time.time() * 1000.0
+
+class _GameSession:
+    """Conversation and cookie state shared by the sync and async HTTP controllers."""
+    def _reset_game(self):
+        self.messages = []  # assistant messages, as the page would show them
+        self.level = None
+        self._cookies = cookies.SimpleCookie()
+        self._reply_baseline = None
+        self._message_cursor = 0
+
+    def _headers(self, body: bytes = None) -> dict:
+        headers = {"Accept": "application/json"}
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+            headers["Content-Length"] = str(len(body))
+        if self._cookies:
+            headers["Cookie"] = "; ".join(f"{k}={m.value}" for k, m in self._cookies.items())
+        return headers
+
+    def _store_cookies(self, set_cookie_headers: list):
+        for header in set_cookie_headers:
+            self._cookies.load(header)
+
+    def _payload(self, status: int, body: bytes):
+        """Decoded JSON body, or the error text as a "reply" (so rate limits reach the pacer)."""
+        if 200 <= status < 300:
+            try:
+                return json.loads(body or b"{}")
+            except ValueError:
+                pass
+        return {"reply": body.decode("utf-8", "replace").strip() or f"HTTP error {status}"}
+
+    def _verdict(self, status: int, payload: dict) -> bool:
+        """submit_password's result; a rate limit or server error is no verdict on the password."""
+        if status == 429 or status >= 500:
+            raise PasswordCheckUnavailable(f"password check failed with HTTP {status}: {payload.get('reply', '')}")
+        if payload.get("accepted"):
+            self._show_state(payload)
+        return bool(payload.get("accepted"))
+
+    def _show_state(self, payload: dict):
+        self.level = payload.get("level", self.level)
+        if payload.get("intro"):
+            self.messages.append(payload["intro"])
+
+    def _show_reply(self, payload: dict):
+        self.level = payload.get("level", self.level)
+        self.messages.append(payload.get("reply") or "")
+
+    def _read_messages_now(self, cursor: int) -> dict:
+        # Same result as vision.scripts.READ_SINCE_FN over the in-memory conversation
+        count = len(self.messages)
+        start = cursor if count > cursor else max(0, count - 1)
+        return {"count": count, "texts": self.messages[start:]}
+
+    def _watch_result(self, baseline: int, first_at: float = 0, done_at: float = 0) -> dict:
+        return {"timedOut": len(self.messages) <= baseline, "firstTextAt": first_at, "changedAt": done_at}
+
+class HttpController(_GameSession, BrowserControllerBase):
+    """
+    Game session over one persistent http.client connection. send_text() only
+    writes the request; the reply is read (and timed) in wait_for_settled_reply(),
+    like a page reply the browser controllers wait for.
+    """
+    def __init__(self, headless: bool = False, timeout: float = 30.0, **options):
+        # headless and browser options are accepted for make_controller() compatibility
+        self.timeout = timeout
+        self._conn = None
+        self._pending = False
+        self._base = None
+        self._reset_game()
+
+    def _connection(self) -> client.HTTPConnection:
+        if self._conn is None:
+            parts = urlsplit(self._base)
+            conn_class = client.HTTPSConnection if parts.scheme == "https" else client.HTTPConnection
+            self._conn = conn_class(parts.netloc, timeout=self.timeout)
+        return self._conn
+
+    def _drop_connection(self):
+        if self._conn is not None:
+            self._conn.close()
+        self._conn = None
+        self._pending = False
+
+    def _send(self, method: str, path: str, payload: dict = None):
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        try:
+            self._connection().request(method, path, body=body, headers=self._headers(body))
+        except (client.HTTPException, OSError):
+            # The server closed the idle keep-alive connection; reconnect once
+            self._drop_connection()
+            self._connection().request(method, path, body=body, headers=self._headers(body))
+
+    def _receive(self, timeout: float = None):
+        """Read the pending response: (status, payload, headers-arrived ms, body-complete ms)."""
+        conn = self._connection()
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout or self.timeout)
+        response = conn.getresponse()
+        first_at = _now_ms()
+        body = response.read()
+        self._store_cookies(response.headers.get_all("Set-Cookie") or [])
+        return response.status, self._payload(response.status, body), first_at, _now_ms()
+
+    def _call(self, method: str, path: str, payload: dict = None, timeout: float = None):
+        """(status, payload) of one request."""
+        self._send(method, path, payload)
+        try:
+            return self._receive(timeout)[:2]
+        except (client.RemoteDisconnected, ConnectionError):
+            # Closed while idle, noticed only on read; these calls are safe to repeat
+            self._drop_connection()
+            self._send(method, path, payload)
+            return self._receive(timeout)[:2]
+
+    def open_page(self, url: str):
+        self._base = url
+        self._call("GET", urlsplit(url).path or "/")
+        self._show_state(self._call("GET", STATE_PATH)[1])
+
+    def send_text(self, text: str):
+        self._mark_reply_baseline()
+        self._send("POST", CHAT_PATH, {"message": text})
+        self._pending = True
+
+    def _reply_snapshot(self) -> dict:
+        return {"count": len(self.messages), "now": _now_ms()}
+
+    def _await_reply(self, baseline: int, quiet_ms: int, timeout_ms: int) -> dict:
+        if not self._pending:
+            # Nothing is in flight, so nothing new can arrive
+            return self._watch_result(baseline)
+        try:
+            _, payload, first_at, done_at = self._receive(timeout_ms / 1000.0)
+        except (client.HTTPException, OSError):
+            self._drop_connection()
+            return self._watch_result(baseline)
+        self._pending = False
+        self._show_reply(payload)
+        return self._watch_result(baseline, first_at, done_at)
+
+    def _read_messages(self, cursor: int) -> dict:
+        return self._read_messages_now(cursor)
+
+    def submit_password(self, password: str, timeout: float = 5.0) -> bool:
+        try:
+            return self._verdict(*self._call("POST", PASSWORD_PATH, {"password": password}, timeout))
+        except (client.HTTPException, OSError) as exc:
+            # No answer in time: the response may still arrive, so the connection cannot be reused
+            self._drop_connection()
+            raise PasswordCheckUnavailable(f"password check got no answer ({exc!r})") from exc
+
+    def is_alive(self) -> bool:
+        return self._base is not None
+
+    def reset_session(self, url: str):
+        self._drop_connection()
+        self._reset_game()
+        self.open_page(url)
+
+    def close(self):
+        self._drop_connection()
+
+class _AsyncConnection:
+    """Minimal HTTP/1.1 keep-alive client on asyncio streams (Content-Length and chunked bodies)."""
+    def __init__(self, base_url: str):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.netloc = parts.netloc
+        self.ssl = parts.scheme == "https"
+        self.port = parts.port or (443 if self.ssl else 80)
+        self.reader = self.writer = None
+
+    async def send(self, method: str, path: str, headers: dict, body: bytes = None):
+        if self.writer is None or self.writer.is_closing():
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl or None)
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.netloc}"]
+        lines += [f"{k}: {v}" for k, v in headers.items()]
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (body or b""))
+        await self.writer.drain()
+
+    async def receive(self):
+        """Returns (status, headers as a list of (name, value), body, headers-arrived ms)."""
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed by server")
+        first_at = _now_ms()
+        status = int(status_line.split()[1])
+        headers = []
+        while True:
+            line = (await self.reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers.append((name.strip().lower(), value.strip()))
+        fields = dict(headers)
+        if fields.get("transfer-encoding", "").lower() == "chunked":
+            body = b""
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                chunk = await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+                body += chunk[:-2]
+        else:
+            body = await self.reader.readexactly(int(fields.get("content-length", 0)))
+        if fields.get("connection", "").lower() == "close":
+            await self.close()
+        return status, headers, body, first_at
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except Exception:
+                pass
+        self.reader = self.writer = None
+
+class AsyncHttpController(_GameSession, AsyncBrowserControllerBase):
+    """Asyncio flavour of HttpController: one asyncio stream connection per session."""
+    def __init__(self, timeout: float = 30.0):
+        self.timeout = timeout
+        self._conn = None
+        self._pending = False
+        self._reset_game()
+
+    @classmethod
+    async def create(cls, **options):
+        """Same signature style as AsyncPlaywrightController.create (browser options are ignored)."""
+        return cls(timeout=options.get("timeout", 30.0))
+
+    async def _send(self, method: str, path: str, payload: dict = None):
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        try:
+            await self._conn.send(method, path, self._headers(body), body)
+        except OSError:
+            await self._conn.close()
+            await self._conn.send(method, path, self._headers(body), body)
+
+    async def _receive(self, timeout: float = None):
+        status, headers, body, first_at = await asyncio.wait_for(self._conn.receive(), timeout or self.timeout)
+        self._store_cookies([value for name, value in headers if name == "set-cookie"])
+        return status, self._payload(status, body), first_at, _now_ms()
+
+    async def _call(self, method: str, path: str, payload: dict = None, timeout: float = None):
+        """(status, payload) of one request."""
+        await self._send(method, path, payload)
+        try:
+            return (await self._receive(timeout))[:2]
+        except ConnectionError:
+            await self._conn.close()
+            await self._send(method, path, payload)
+            return (await self._receive(timeout))[:2]
+
+    async def open_page(self, url: str):
+        self._conn = _AsyncConnection(url)
+        await self._call("GET", urlsplit(url).path or "/")
+        self._show_state((await self._call("GET", STATE_PATH))[1])
+
+    async def send_text(self, text: str):
+        await self._mark_reply_baseline()
+        await self._send("POST", CHAT_PATH, {"message": text})
+        self._pending = True
+
+    async def _reply_snapshot(self) -> dict:
+        return {"count": len(self.messages), "now": _now_ms()}
+
+    async def _await_reply(self, baseline: int, quiet_ms: int, timeout_ms: int) -> dict:
+        if not self._pending:
+            return self._watch_result(baseline)
+        try:
+            _, payload, first_at, done_at = await self._receive(timeout_ms / 1000.0)
+        except (asyncio.TimeoutError, OSError, ValueError):
+            # A half-read response leaves the stream unusable; start a new connection
+            await self._conn.close()
+            self._pending = False
+            return self._watch_result(baseline)
+        self._pending = False
+        self._show_reply(payload)
+        return self._watch_result(baseline, first_at, done_at)
+
+    async def _read_messages(self, cursor: int) -> dict:
+        return self._read_messages_now(cursor)
+
+    async def current_level(self) -> int:
+        # A cancelled call can leave a response unread on the stream; start from a clean connection
+        await self._conn.close()
+        self._pending = False
+        self.level = (await self._call("GET", STATE_PATH))[1].get("level", self.level)
+        return self.level
+
+    async def submit_password(self, password: str, timeout: float = 5.0) -> bool:
+        try:
+            return self._verdict(*(await self._call("POST", PASSWORD_PATH, {"password": password}, timeout)))
+        except (asyncio.TimeoutError, OSError, ValueError) as exc:
+            await self._conn.close()
+            raise PasswordCheckUnavailable(f"password check got no answer ({exc!r})") from exc
+
+    async def close(self):
+        if self._conn is not None:
+            await self._conn.close()
@@ -0,0 +1,44 @@
+"""
+Network-level reply capture: recognize the game's chat API responses and pull
+Merlin's reply out of their JSON body, so a controller can hand the reply to the
+agent as soon as the response completes instead of waiting for it to render.
+"""
+import re
+from controller.base import ReplyTiming
+from vision import locators
+
+_CHAT_API_RE = re.compile(locators.CHAT_API_PATTERN)
+
+# Top-level keys that commonly hold a chat reply, in order of preference
+_REPLY_KEYS = ("reply", "response", "answer", "message", "content", "text", "output")
+
+def is_chat_api(response) -> bool:
+    """True for a response (Playwright Response) to a prompt sent to the chat API."""
+    return response.request.method == "POST" and _CHAT_API_RE.search(response.url) is not None
+
+def reply_from_payload(payload):
+    """
+    Merlin's reply text from a decoded chat API body, or None if the shape is not
+    recognized (the caller then falls back to reading the page).
+    Handles {"reply": "..."}-style objects, {"message": {"content": "..."}} and
+    OpenAI-style {"choices": [{"message": {"content": "..."}}]}.
+    """
+    if isinstance(payload, str):
+        return payload or None
+    if not isinstance(payload, dict):
+        return None
+    choices = payload.get("choices")
+    if isinstance(choices, list) and choices and isinstance(choices[0], dict):
+        return reply_from_payload(choices[0].get("message") or choices[0].get("text"))
+    for key in _REPLY_KEYS:
+        value = payload.get(key)
+        if isinstance(value, str) and value:
+            return value
+        if isinstance(value, dict):
+            return reply_from_payload(value)
+    return None
+
+def network_timing(sent_at: float, headers_at: float, done_at: float) -> ReplyTiming:
+    """Reply latency from wall-clock seconds: prompt sent, response headers, body complete."""
+    return ReplyTiming(first_token_sec=max(0.0, headers_at - sent_at),
+                       complete_sec=max(0.0, done_at - sent_at))
@@ -2,20 +2,41 @@
 Playwright-based browser controller for HackMerlin.
 Uses Playwright sync API to interact with the page.
 """
-from pathlib import Path
 import time
+from pathlib import Path
 from playwright.sync_api import sync_playwright
-from controller.base import BrowserControllerBase
-from vision import locators
+from controller.base import BrowserControllerBase, FAST_SUBMIT_WAIT_MS, PASSWORD_REJECT_QUIET_MS, REPLY_QUIET_SEC
+from controller import network
+from eval import trace
+from vision import locators, scripts
 
 class PlaywrightController(BrowserControllerBase):
-    def __init__(self, headless: bool = False):
+    def __init__(self, headless: bool = False, fast_submit: bool = True, capture_network: bool = False):
+        # Submit prompts with one in-page call instead of filling and pressing keys
+        self.fast_submit = fast_submit
+        # Take replies to prompts from the chat API responses instead of the page
+        self.capture_network = capture_network
+        self._network_reply = None
         # Start Playwright and open a Chromium browser
         self._playwright = sync_playwright().start()
         # Launch Chromium; headless=False shows a visible browser
         self.browser = self._playwright.chromium.launch(headless=headless)
+        self._new_context()
+
+    def _new_context(self):
+        # A fresh context has its own cookies and storage, i.e. a brand-new game
         self.context = self.browser.new_context()
+        # Install the reply watcher on every document loaded in this context
+        self.context.add_init_script(scripts.WATCHER_INSTALL_JS)
         self.page = self.context.new_page()
+        # Chat API responses seen on this page: (Response, wall-clock time of its headers)
+        self._chat_responses = []
+        if self.capture_network:
+            self.page.on("response", self._on_response)
+
+    def _on_response(self, response):
+        if network.is_chat_api(response):
+            self._chat_responses.append((response, time.time()))
 
     def open_page(self, url: str):
         # Navigate to the HackMerlin game page
@@ -24,36 +45,112 @@ class PlaywrightController(BrowserControllerBase):
         self.page.wait_for_selector(locators.CHAT_INPUT, timeout=10000)
 
     def send_text(self, text: str):
+        if self.fast_submit:
+            # Capture the message count before submitting so a fast reply is not missed
+            self._mark_reply_baseline()
+            result = self.page.evaluate(scripts.FAST_SUBMIT_FN, [text, FAST_SUBMIT_WAIT_MS])
+            if not result["found"]:
+                raise RuntimeError("Chat input box not found on page")
+            if result["submitted"]:
+                return
+            # The page ignores synthetic events; type for real from now on
+            self.fast_submit = False
         # Find the chat input box using the CSS selector from vision.locators
         input_box = self.page.query_selector(locators.CHAT_INPUT)
         if not input_box:
             raise RuntimeError("Chat input box not found on page")
+        # Capture the message count before submitting so a fast reply is not missed
+        self._mark_reply_baseline()
         input_box.fill(text)
         # Press Enter to send the message (assuming the input supports it)
         input_box.press("Enter")
 
-    def wait_for_reply(self, timeout: float = 10.0):
-        # Wait until a new assistant message appears (or timeout)
-        prev_count = self.page.locator(locators.ASSISTANT_MSG).count()
-        elapsed = 0.0
-        interval = 0.2
-        while elapsed < timeout:
-            new_count = self.page.locator(locators.ASSISTANT_MSG).count()
-            if new_count > prev_count:
-                return  # New message arrived
-            time.sleep(interval)
-            elapsed += interval
-        # If no new message in time, raise timeout
-        raise TimeoutError("No reply from Merlin within timeout")
+    def _reply_snapshot(self) -> dict:
+        snapshot = self.page.evaluate(scripts.SNAPSHOT_JS)
+        snapshot["responses"] = len(self._chat_responses)
+        return snapshot
+
+    def wait_for_settled_reply(self, timeout: float = 10.0, quiet: float = REPLY_QUIET_SEC, since: int = None):
+        # Only replies to a prompt come from the chat API; intros are read from the page
+        baseline = self._reply_baseline
+        if not self.capture_network or since is not None or baseline is None:
+            return super().wait_for_settled_reply(timeout=timeout, quiet=quiet, since=since)
+        started = time.time()
+        try:
+            with self.tracer.span(trace.WAIT_REPLY, session=self.trace_session):
+                reply = self._await_network_reply(baseline, timeout)
+        finally:
+            # Also after a timeout: the next wait must not start from this prompt's baseline
+            self._reply_baseline = None
+        if reply is None:
+            # Unrecognized API response: read this reply from the page instead, from the same baseline
+            self._reply_baseline = baseline
+            return super().wait_for_settled_reply(timeout=max(0.0, started + timeout - time.time()), quiet=quiet)
+        self._network_reply, timing = reply
+        return timing
+
+    def _await_network_reply(self, baseline: dict, timeout: float):
+        """(reply text, ReplyTiming) from the first chat API response after `baseline`, or None."""
+        index = baseline["responses"]
+        deadline = time.time() + timeout
+        while len(self._chat_responses) <= index:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise TimeoutError("No reply from Merlin within timeout")
+            try:
+                self.page.wait_for_event("response", predicate=network.is_chat_api, timeout=remaining * 1000)
+            except Exception:
+                raise TimeoutError("No reply from Merlin within timeout")
+        response, headers_at = self._chat_responses[index]
+        try:
+            text = network.reply_from_payload(response.json())
+        except Exception:
+            text = None
+        if text is None:
+            return None
+        return text, network.network_timing(baseline["now"] / 1000.0, headers_at, time.time())
+
+    def _await_reply(self, baseline: int, quiet_ms: int, timeout_ms: int) -> dict:
+        # Wait in-page (via the MutationObserver) instead of polling from Python
+        return self.page.evaluate(scripts.WAIT_EVAL_JS, [baseline, quiet_ms, timeout_ms])
 
     def get_latest_bot_text(self) -> str:
-        # Retrieve text of the last assistant message
-        elems = self.page.query_selector_all(locators.ASSISTANT_MSG)
-        if not elems:
-            return ""
-        last_elem = elems[-1]
-        text = last_elem.inner_text()
-        return text
+        if self._network_reply is not None:
+            text, self._network_reply = self._network_reply, None
+            # The reply's message renders after the send cursor; do not read it again
+            self._message_cursor += 1
+            return text
+        return super().get_latest_bot_text()
+
+    def _read_messages(self, cursor: int) -> dict:
+        # Texts of all messages past the cursor in one evaluate call
+        return self.page.evaluate(scripts.READ_SINCE_FN, cursor)
+
+    def submit_password(self, password: str, timeout: float = 5.0) -> bool:
+        before = self.page.evaluate(scripts.PASSWORD_BASELINE_JS)
+        password_box = self.page.query_selector(locators.PASSWORD_INPUT)
+        if not password_box:
+            raise RuntimeError("Password input not found on page")
+        password_box.fill(password)
+        password_box.press("Enter")
+        # Accepted if the level indicator changes, rejected as soon as the page says so
+        return self.page.evaluate(scripts.WAIT_PASSWORD_RESULT_FN,
+                                  [before, int(timeout * 1000), PASSWORD_REJECT_QUIET_MS])
+
+    def is_alive(self) -> bool:
+        return self.browser.is_connected() and not self.page.is_closed()
+
+    def reset_session(self, url: str):
+        # Swap in a new context instead of relaunching Chromium
+        try:
+            self.context.close()
+        except Exception:
+            pass
+        self._new_context()
+        self._reply_baseline = None
+        self._message_cursor = 0
+        self._network_reply = None
+        self.open_page(url)
 
     def close(self):
         # Clean up: close browser and stop Playwright
@@ -0,0 +1,154 @@
+"""
+Pool of warm browser controllers reused across runs.
+Launching a browser is the largest fixed cost of a short run, so the pool keeps
+controllers with the game page already open and only resets the session
+(cookies/storage) between runs. A controller is only handed back to the thread
+that launched it (Playwright's sync API must stay on its own thread), so
+concurrent users of one pool each keep their own warm controllers.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+@dataclass
+class _PoolEntry:
+    controller: object
+    created: float = field(default_factory=time.monotonic)
+    uses: int = 0
+    owner: int = field(default_factory=threading.get_ident)  # launching thread
+
+class ControllerPool:
+    """
+    factory: zero-argument callable returning a new BrowserControllerBase.
+    url: page every pooled controller is kept navigated to.
+    size: number of warm controllers to keep ready (runner.serve runs this many at once).
+    max_uses / max_age_sec: a controller is closed instead of reused once it
+    has served this many runs or has been alive this long.
+    """
+    def __init__(self, factory, url: str, size: int = 1, max_uses: int = 20, max_age_sec: float = 1800.0):
+        self._factory = factory
+        self.url = url
+        self.size = size
+        self.max_uses = max_uses
+        self.max_age_sec = max_age_sec
+        self._idle = deque()
+        self._busy = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _launch(self) -> _PoolEntry:
+        controller = self._factory()
+        try:
+            controller.open_page(self.url)
+        except Exception:
+            controller.close()
+            raise
+        return _PoolEntry(controller)
+
+    def _expired(self, entry: _PoolEntry) -> bool:
+        return (entry.uses >= self.max_uses
+                or time.monotonic() - entry.created >= self.max_age_sec)
+
+    def _healthy(self, entry: _PoolEntry) -> bool:
+        try:
+            return entry.controller.is_alive()
+        except Exception:
+            return False
+
+    @staticmethod
+    def _discard(entry: _PoolEntry):
+        try:
+            entry.controller.close()
+        except Exception:
+            pass
+
+    def _owned(self) -> int:
+        # Controllers launched by the calling thread, idle or busy (call with the lock held)
+        me = threading.get_ident()
+        return sum(e.owner == me for e in self._idle) + sum(e.owner == me for e in self._busy.values())
+
+    def warm(self, count: int = None):
+        """Launch controllers for the calling thread until it has `count` (default: size) in the pool."""
+        count = self.size if count is None else count
+        while True:
+            with self._lock:
+                if self._owned() >= count:
+                    return
+            entry = self._launch()
+            with self._lock:
+                self._idle.append(entry)
+
+    def _take_idle(self):
+        # First idle controller launched by the calling thread (call with the lock held)
+        me = threading.get_ident()
+        for entry in self._idle:
+            if entry.owner == me:
+                self._idle.remove(entry)
+                return entry
+        return None
+
+    def acquire(self):
+        """Check out a controller whose page is open on a fresh game session."""
+        if self._closed:
+            raise RuntimeError("Controller pool is closed")
+        while True:
+            with self._lock:
+                entry = self._take_idle()
+            if entry is None:
+                entry = self._launch()
+            elif self._expired(entry) or not self._healthy(entry):
+                self._discard(entry)
+                continue
+            with self._lock:
+                self._busy[id(entry.controller)] = entry
+            return entry.controller
+
+    def release(self, controller, reusable: bool = True):
+        """Return a controller; it is reset for the next run or closed if worn out."""
+        with self._lock:
+            entry = self._busy.pop(id(controller))
+        entry.uses += 1
+        if self._closed or not reusable or self._expired(entry) or not self._healthy(entry):
+            self._discard(entry)
+            return
+        try:
+            # Reset now so the next checkout gets a pre-navigated page
+            controller.reset_session(self.url)
+        except Exception:
+            self._discard(entry)
+            return
+        with self._lock:
+            self._idle.append(entry)
+
+    @contextmanager
+    def checkout(self):
+        """Context manager around acquire()/release(); a run that raised is not reused."""
+        controller = self.acquire()
+        try:
+            yield controller
+        except BaseException:
+            self.release(controller, reusable=False)
+            raise
+        self.release(controller)
+
+    def close_idle(self):
+        """Close the calling thread's idle controllers (a worker thread does this before it exits)."""
+        with self._lock:
+            mine = []
+            while True:
+                entry = self._take_idle()
+                if entry is None:
+                    break
+                mine.append(entry)
+        for entry in mine:
+            self._discard(entry)
+
+    def close(self):
+        """Close every idle controller; busy ones are closed when released."""
+        self._closed = True
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for entry in idle:
+            self._discard(entry)
@@ -0,0 +1,54 @@
+"""
+Registry of controller engines, loaded lazily: only the engine a run selects is
+imported, so the CLI (and its --help) and the offline tools never pay for
+Playwright or Selenium, and a missing one only matters when it is asked for.
+Engines are "module:Class" references; other packages can add their own under
+the "hackmerlin.engines" entry-point group (or "hackmerlin.async_engines").
+"""
+import importlib
+
+# Built-in engines: name -> "module:Class"
+ENGINES = {
+    "playwright": "controller.playwright_controller:PlaywrightController",
+    "selenium": "controller.selenium_controller:SeleniumController",
+    "http": "controller.http_controller:HttpController",
+}
+ASYNC_ENGINES = {
+    "playwright": "controller.async_playwright_controller:AsyncPlaywrightController",
+    "http": "controller.http_controller:AsyncHttpController",
+}
+ENTRY_POINT_GROUPS = {False: "hackmerlin.engines", True: "hackmerlin.async_engines"}
+
+def register_engine(name: str, target: str, asynchronous: bool = False):
+    """Make `target` ("module:Class") available as engine `name`."""
+    (ASYNC_ENGINES if asynchronous else ENGINES)[name] = target
+
+def _entry_point_engines(asynchronous: bool) -> dict:
+    # Scanning installed distributions is only needed for engines that are not built in
+    from importlib import metadata
+    try:
+        eps = metadata.entry_points(group=ENTRY_POINT_GROUPS[asynchronous])
+    except Exception:
+        return {}
+    return {ep.name: ep.value for ep in eps}
+
+def engine_names(asynchronous: bool = False) -> list:
+    """Names of all known engines (built-in, registered and installed plugins), without importing any."""
+    engines = dict(_entry_point_engines(asynchronous))
+    engines.update(ASYNC_ENGINES if asynchronous else ENGINES)
+    return sorted(engines)
+
+def has_engine(name: str, asynchronous: bool = False) -> bool:
+    """True if engine `name` can be loaded (nothing is imported)."""
+    engines = ASYNC_ENGINES if asynchronous else ENGINES
+    return name.lower() in engines or name.lower() in _entry_point_engines(asynchronous)
+
+def load_engine(name: str, asynchronous: bool = False):
+    """Import and return the controller class of engine `name` (ValueError if unknown)."""
+    engines = ASYNC_ENGINES if asynchronous else ENGINES
+    target = engines.get(name.lower()) or _entry_point_engines(asynchronous).get(name.lower())
+    if target is None:
+        kind = "async engine" if asynchronous else "engine"
+        raise ValueError(f"Unknown {kind} '{name}' (available: {', '.join(engine_names(asynchronous))})")
+    module_name, _, attr = target.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
@@ -2,17 +2,18 @@
 Selenium-based browser controller for HackMerlin.
 Controls Chrome/Chromium to interact with HackMerlin page.
 """
-import time
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from controller.base import BrowserControllerBase
-from vision import locators
+from controller.base import BrowserControllerBase, FAST_SUBMIT_WAIT_MS, PASSWORD_REJECT_QUIET_MS
+from vision import locators, scripts
 
 class SeleniumController(BrowserControllerBase):
-    def __init__(self, headless: bool = False):
+    def __init__(self, headless: bool = False, fast_submit: bool = True):
+        # Submit prompts with one script call instead of typing them key by key
+        self.fast_submit = fast_submit
         # Initialize Selenium WebDriver for Chrome
         options = webdriver.ChromeOptions()
         if headless:
@@ -30,10 +31,24 @@ class SeleniumController(BrowserControllerBase):
         WebDriverWait(self.driver, 10).until(
             EC.presence_of_element_located((By.CSS_SELECTOR, locators.CHAT_INPUT))
         )
+        # Start observing assistant messages on the loaded document
+        self.driver.execute_script(scripts.WATCHER_INSTALL_JS)
 
     def send_text(self, text: str):
+        if self.fast_submit:
+            # Capture the message count before submitting so a fast reply is not missed
+            self._mark_reply_baseline()
+            self.driver.set_script_timeout(FAST_SUBMIT_WAIT_MS / 1000.0 + 5)
+            result = self.driver.execute_async_script(scripts.FAST_SUBMIT_ASYNC_JS, text, FAST_SUBMIT_WAIT_MS)
+            if result["submitted"]:
+                return
+            if result["found"]:
+                # The page ignores synthetic events; type for real from now on
+                self.fast_submit = False
         # Find the chat input element
         input_el = self.driver.find_element(By.CSS_SELECTOR, locators.CHAT_INPUT)
+        # Capture the message count before submitting so a fast reply is not missed
+        self._mark_reply_baseline()
         # Clear any existing text (if needed)
         try:
             input_el.clear()
@@ -44,21 +59,46 @@ class SeleniumController(BrowserControllerBase):
         # Press Enter to submit the input
         input_el.send_keys(Keys.ENTER)
 
-    def wait_for_reply(self, timeout: float = 10.0):
-        # Wait until a new assistant message appears by monitoring the count
-        prev_count = len(self.driver.find_elements(By.CSS_SELECTOR, locators.ASSISTANT_MSG))
-        WebDriverWait(self.driver, timeout).until(
-            lambda d: len(d.find_elements(By.CSS_SELECTOR, locators.ASSISTANT_MSG)) > prev_count
-        )
+    def _reply_snapshot(self) -> dict:
+        return self.driver.execute_script("return " + scripts.SNAPSHOT_JS)
+
+    def _await_reply(self, baseline: int, quiet_ms: int, timeout_ms: int) -> dict:
+        # Block on an in-page promise resolved by the MutationObserver
+        # Leave headroom so the in-page deadline fires before WebDriver's
+        self.driver.set_script_timeout(timeout_ms / 1000.0 + 5)
+        return self.driver.execute_async_script(scripts.WAIT_ASYNC_JS, baseline, quiet_ms, timeout_ms)
+
+    def _read_messages(self, cursor: int) -> dict:
+        # Texts of all messages past the cursor in one script call, not one request per element
+        return self.driver.execute_script("return (%s)(arguments[0])" % scripts.READ_SINCE_FN, cursor)
+
+    def submit_password(self, password: str, timeout: float = 5.0) -> bool:
+        before = self.driver.execute_script("return " + scripts.PASSWORD_BASELINE_JS)
+        password_el = self.driver.find_element(By.CSS_SELECTOR, locators.PASSWORD_INPUT)
+        password_el.clear()
+        password_el.send_keys(password)
+        password_el.send_keys(Keys.ENTER)
+        # Accepted if the level indicator changes, rejected as soon as the page says so
+        self.driver.set_script_timeout(timeout + 5)
+        return self.driver.execute_async_script(scripts.WAIT_PASSWORD_RESULT_ASYNC_JS,
+                                                before, int(timeout * 1000), PASSWORD_REJECT_QUIET_MS)
+
+    def is_alive(self) -> bool:
+        try:
+            return self.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
 
-    def get_latest_bot_text(self) -> str:
-        # Get the text of the last assistant message element
-        elems = self.driver.find_elements(By.CSS_SELECTOR, locators.ASSISTANT_MSG)
-        if not elems:
-            return ""
-        last_elem = elems[-1]
-        text = last_elem.text
-        return text
+    def reset_session(self, url: str):
+        # Clear cookies and web storage of the game origin, then reload it
+        self.driver.delete_all_cookies()
+        try:
+            self.driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        except Exception:
+            pass
+        self._reply_baseline = None
+        self._message_cursor = 0
+        self.open_page(url)
 
     def close(self):
         # Close the browser and cleanup
@@ -0,0 +1,118 @@
+"""
+Offline benchmark: play full run_agent sessions against the local mock Merlin
+(eval.mock_merlin) with each browser engine and report per-level wall time,
+Merlin round-trips and levels/hour. With --baseline the report is compared
+against an earlier one and the exit status is nonzero on a regression, so it
+can run as a CI check.
+
+    python -m eval.benchmark --runs 3 --out runs/bench/report.json
+    python -m eval.benchmark --baseline runs/bench/baseline.json --tolerance 0.2
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from eval.mock_merlin import MockMerlinServer
+
+def level_metrics(events_path: str) -> dict:
+    """
+    Per-level metrics from a run's events.jsonl:
+    {level: {"wall_sec": seconds from the level's first event to the next level's, "round_trips": prompts sent}}.
+    """
+    starts, ends, trips = {}, {}, {}
+    with open(events_path, "r", encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            level = entry.get("level")
+            if level is None:
+                continue
+            starts.setdefault(level, entry["time"])
+            ends[level] = entry["time"]
+            if entry["role"] == "Agent":
+                trips[level] = trips.get(level, 0) + 1
+    metrics = {}
+    levels = sorted(starts)
+    for i, level in enumerate(levels):
+        end = starts[levels[i + 1]] if i + 1 < len(levels) else ends[level]
+        metrics[level] = {"wall_sec": round(end - starts[level], 3), "round_trips": trips.get(level, 0)}
+    return metrics
+
+def run_benchmark(engines=("playwright", "selenium"), runs: int = 1, latency: float = 0.0,
+                  stream_chunk: int = 0, stream_ms: int = 30, outdir: str = "runs/bench", **agent_kwargs) -> dict:
+    """
+    Run `runs` headless sessions per engine against a fresh mock server and
+    aggregate them (medians over runs). Extra keyword arguments go to run_agent.
+    """
+    from runner.agent import run_agent
+    report = {"latency": latency, "stream_chunk": stream_chunk, "runs": runs, "engines": {}}
+    agent_kwargs.setdefault("cooldown", 0.0)
+    for engine in engines:
+        per_level, cleared, elapsed = {}, [], []
+        for i in range(runs):
+            # The agent submits the passwords it finds, like a player would
+            with MockMerlinServer(latency=latency, stream_chunk=stream_chunk, stream_ms=stream_ms) as server:
+                run_dir = Path(outdir) / engine / f"run-{i + 1:03d}"
+                started = time.monotonic()
+                results = run_agent(engine=engine, headless=True, outdir=str(run_dir), url=server.url, **agent_kwargs)
+                elapsed.append(time.monotonic() - started)
+            cleared.append(sum(1 for r in results if r["success"]))
+            for level, m in level_metrics(run_dir / "events.jsonl").items():
+                per_level.setdefault(level, []).append(m)
+        total_sec = sum(elapsed)
+        report["engines"][engine] = {
+            "levels": {str(level): {"wall_sec": round(statistics.median(m["wall_sec"] for m in ms), 3),
+                                    "round_trips": statistics.median(m["round_trips"] for m in ms)}
+                       for level, ms in sorted(per_level.items())},
+            "levels_cleared": statistics.median(cleared),
+            "wall_sec": round(statistics.median(elapsed), 3),
+            "levels_per_hour": round(sum(cleared) * 3600 / total_sec, 1) if total_sec else 0.0,
+        }
+    return report
+
+def find_regressions(report: dict, baseline: dict, tolerance: float = 0.2) -> list:
+    """Describe every engine metric that got worse than `baseline` by more than `tolerance` (a fraction)."""
+    problems = []
+    for engine, base in baseline.get("engines", {}).items():
+        cur = report["engines"].get(engine)
+        if cur is None:
+            continue
+        if cur["levels_cleared"] < base["levels_cleared"]:
+            problems.append(f"{engine}: levels cleared {cur['levels_cleared']} < {base['levels_cleared']}")
+        if cur["levels_per_hour"] < base["levels_per_hour"] * (1 - tolerance):
+            problems.append(f"{engine}: levels/hour {cur['levels_per_hour']} vs baseline {base['levels_per_hour']}")
+        for level, m in base["levels"].items():
+            trips = cur["levels"].get(level, {}).get("round_trips")
+            if trips is not None and trips > m["round_trips"] * (1 + tolerance):
+                problems.append(f"{engine}: level {level} round-trips {trips} vs baseline {m['round_trips']}")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the agent against the local mock Merlin.")
+    parser.add_argument("--engines", default="playwright,selenium", help="Comma-separated engines to benchmark.")
+    parser.add_argument("--runs", type=int, default=1, help="Sessions per engine.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Mock chat response delay in seconds.")
+    parser.add_argument("--stream-chunk", type=int, default=0, help="Mock streaming chunk size (0 = off).")
+    parser.add_argument("--stream-ms", type=int, default=30, help="Mock delay between streaming chunks in ms.")
+    parser.add_argument("--outdir", default="runs/bench", help="Directory for the benchmark runs' logs.")
+    parser.add_argument("--out", default=None, help="Write the JSON report here as well as to stdout.")
+    parser.add_argument("--baseline", default=None, help="Earlier report to check for regressions against.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown vs the baseline.")
+    args = parser.parse_args()
+    report = run_benchmark(engines=[e.strip() for e in args.engines.split(",") if e.strip()], runs=args.runs,
+                           latency=args.latency, stream_chunk=args.stream_chunk, stream_ms=args.stream_ms,
+                           outdir=args.outdir)
+    print(json.dumps(report, indent=2))
+    if args.out:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        problems = find_regressions(report, baseline, args.tolerance)
+        for problem in problems:
+            print("REGRESSION:", problem, file=sys.stderr)
+        sys.exit(1 if problems else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+Compact SQLite store for run telemetry: events of many runs in one file, with
+message text stored once (prompts from the strategy catalog repeat in every run)
+and indexes for filtering by run, level, role and strategy without reading
+whole runs back.
+
+Live runs write into it through EventSink (see runner --events-db); older runs
+can be imported from their events.jsonl and run_summary.json:
+
+    python -m eval.event_store runs/events.sqlite ingest runs/
+    python -m eval.event_store runs/events.sqlite query --level 4 --role Merlin
+"""
+import argparse
+import json
+import sqlite3
+import time
+from pathlib import Path
+
+DEFAULT_EVENTS_DB = "runs/events.sqlite"
+
+_SCHEMA = """
+PRAGMA journal_mode = WAL;
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    started REAL
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    text TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    time REAL NOT NULL,
+    role TEXT NOT NULL,
+    level INTEGER,
+    strategy TEXT,
+    message_id INTEGER NOT NULL REFERENCES messages (id),
+    session INTEGER,
+    ttft REAL,
+    ttc REAL,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS events_run_level_strategy ON events (run_id, level, strategy);
+CREATE INDEX IF NOT EXISTS events_level_role ON events (level, role);
+CREATE TABLE IF NOT EXISTS level_results (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    level INTEGER NOT NULL,
+    success INTEGER NOT NULL,
+    password TEXT,
+    strategies TEXT,
+    PRIMARY KEY (run_id, level)
+);
+"""
+
+# Extra fields that get their own column; anything else is kept as JSON
+_COLUMNS = ("session", "ttft", "ttc")
+
+class EventStore:
+    def __init__(self, path: str = DEFAULT_EVENTS_DB):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path), timeout=30)
+        self.conn.executescript(_SCHEMA)
+        self._message_ids = {}
+
+    def run_id(self, name: str, started: float = None) -> int:
+        """Id of the run called `name`, registering it if new (committed at once)."""
+        with self.conn:
+            self.conn.execute("INSERT OR IGNORE INTO runs (name, started) VALUES (?, ?)", (name, started))
+        return self.conn.execute("SELECT id FROM runs WHERE name = ?", (name,)).fetchone()[0]
+
+    def _message_id(self, text: str) -> int:
+        message_id = self._message_ids.get(text)
+        if message_id is None:
+            self.conn.execute("INSERT OR IGNORE INTO messages (text) VALUES (?)", (text,))
+            message_id = self.conn.execute("SELECT id FROM messages WHERE text = ?", (text,)).fetchone()[0]
+            if len(self._message_ids) >= 4096:
+                self._message_ids.clear()
+            self._message_ids[text] = message_id
+        return message_id
+
+    def add_event(self, run_id: int, timestamp: float, role: str, message: str, level: int = None,
+                  strategy: str = None, extra: dict = None):
+        """Insert one event (not committed; see commit())."""
+        extra = dict(extra or {})
+        columns = [extra.pop(name, None) for name in _COLUMNS]
+        self.conn.execute(
+            "INSERT INTO events (run_id, time, role, level, strategy, message_id, session, ttft, ttc, extra) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (run_id, timestamp, role, level, strategy, self._message_id(message), *columns,
+             json.dumps(extra) if extra else None))
+
+    def record_results(self, run_id: int, level_results: list):
+        """Store a run's per-level results (the run_summary.json entries)."""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO level_results (run_id, level, success, password, strategies) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(run_id, r["level"], int(bool(r.get("success"))), r.get("password"),
+                  json.dumps(r.get("strategies") or [])) for r in level_results])
+
+    def commit(self):
+        self.conn.commit()
+
+    def sink(self, run: str) -> "EventSink":
+        """A logger (same interface as eval.logger.RunLogger) writing into this store under `run`."""
+        return EventSink(self, run)
+
+    def ingest_run(self, run_dir: str) -> int:
+        """Import a run directory's events.jsonl and run_summary.json; returns the events imported."""
+        run_dir = Path(run_dir)
+        name = str(run_dir)
+        if self.conn.execute("SELECT 1 FROM runs WHERE name = ?", (name,)).fetchone():
+            return 0  # already imported
+        run_id = self.run_id(name, started=(run_dir / "events.jsonl").stat().st_mtime)
+        count = 0
+        with open(run_dir / "events.jsonl", "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                extra = {k: v for k, v in entry.items() if k not in ("time", "role", "message", "level", "strategy")}
+                self.add_event(run_id, entry.get("time", 0.0), entry.get("role", ""), entry.get("message", ""),
+                               entry.get("level"), entry.get("strategy"), extra)
+                count += 1
+        self.commit()
+        summary_path = run_dir / "run_summary.json"
+        if summary_path.exists():
+            try:
+                summary = json.loads(summary_path.read_text(encoding="utf-8"))
+            except ValueError:
+                summary = {}
+            self.record_results(run_id, summary.get("levels", []))
+        return count
+
+    def events(self, run: str = None, level: int = None, role: str = None, strategy: str = None):
+        """
+        Yield matching events as dicts {"run", "time", "role", "level", "strategy", "message", ...}
+        in run and time order. Every filter is optional.
+        """
+        clauses, params = [], []
+        for column, value in (("runs.name", run), ("events.level", level), ("events.role", role),
+                              ("events.strategy", strategy)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
+        rows = self.conn.execute(
+            "SELECT runs.name, events.time, events.role, events.level, events.strategy, messages.text, "
+            "events.session, events.ttft, events.ttc, events.extra "
+            "FROM events JOIN runs ON runs.id = events.run_id JOIN messages ON messages.id = events.message_id "
+            f"{where} ORDER BY events.run_id, events.id", params)
+        for name, t, r, lvl, strat, text, session, ttft, ttc, extra in rows:
+            event = {"run": name, "time": t, "role": r, "level": lvl, "strategy": strat, "message": text}
+            for key, value in (("session", session), ("ttft", ttft), ("ttc", ttc)):
+                if value is not None:
+                    event[key] = value
+            if extra:
+                event.update(json.loads(extra))
+            yield event
+
+    def level_results(self, level: int = None, success: bool = None):
+        """Yield per-level results {"run", "level", "success", "password", "strategies"}."""
+        clauses, params = [], []
+        if level is not None:
+            clauses.append("level_results.level = ?")
+            params.append(level)
+        if success is not None:
+            clauses.append("level_results.success = ?")
+            params.append(int(success))
+        where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
+        rows = self.conn.execute(
+            "SELECT runs.name, level, success, password, strategies FROM level_results "
+            f"JOIN runs ON runs.id = level_results.run_id {where} ORDER BY runs.id, level", params)
+        for name, lvl, ok, password, strategies in rows:
+            yield {"run": name, "level": lvl, "success": bool(ok), "password": password,
+                   "strategies": json.loads(strategies or "[]")}
+
+    def close(self):
+        self.conn.close()
+
+class EventSink:
+    """
+    Logger writing one run's events into an EventStore. Events are held in memory
+    and written `commit_every` at a time, each batch in one short transaction, so
+    sinks of concurrent sessions or processes sharing the file never hold its write
+    lock between events. With `owns_store` the store is closed along with the sink.
+    """
+    def __init__(self, store: EventStore, run: str, commit_every: int = 50, owns_store: bool = False):
+        self.store = store
+        self.owns_store = owns_store
+        self.start_time = time.time()
+        self.run = run
+        self.run_id = store.run_id(run, started=self.start_time)
+        self.commit_every = commit_every
+        self._pending = []  # add_event arguments not written yet
+
+    def log(self, role: str, message: str, level: int = None, strategy: str = None, extra: dict = None):
+        self._pending.append((self.run_id, round(time.time() - self.start_time, 2), role, message,
+                              level, strategy, extra))
+        if len(self._pending) >= self.commit_every:
+            self.flush()
+
+    def flush(self):
+        """Write the pending events in one transaction."""
+        pending, self._pending = self._pending, []
+        if pending:
+            with self.store.conn:
+                for event in pending:
+                    self.store.add_event(*event)
+
+    def record_results(self, level_results: list, session=None):
+        """Store per-level results; a session of a shared stream gets its own run, <run>/session-NNN."""
+        run_id = self.run_id
+        if session is not None:
+            run_id = self.store.run_id(str(Path(self.run) / f"session-{session:03d}"), started=self.start_time)
+        self.store.record_results(run_id, level_results)
+
+    def close(self):
+        self.flush()
+        if self.owns_store:
+            self.store.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Import runs into, or query, the SQLite event store.")
+    parser.add_argument("db", help="Event store file, e.g. runs/events.sqlite.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    ingest = sub.add_parser("ingest", help="Import every run directory below ROOT.")
+    ingest.add_argument("root")
+    query = sub.add_parser("query", help="Print matching events as JSON lines.")
+    query.add_argument("--run")
+    query.add_argument("--level", type=int)
+    query.add_argument("--role")
+    query.add_argument("--strategy")
+    args = parser.parse_args()
+    store = EventStore(args.db)
+    try:
+        if args.command == "ingest":
+            runs = events = 0
+            for events_path in sorted(Path(args.root).rglob("events.jsonl")):
+                imported = store.ingest_run(events_path.parent)
+                runs += 1 if imported else 0
+                events += imported
+            print(f"Imported {events} events from {runs} runs into {args.db}")
+        else:
+            for event in store.events(run=args.run, level=args.level, role=args.role, strategy=args.strategy):
+                print(json.dumps(event))
+    finally:
+        store.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Micro-benchmark of brain.extract over a corpus of Merlin replies taken from
+recorded transcripts (runs/*/events.jsonl). Reports the per-reply cost of
+extract_password and which detectors produced the winning candidates.
+
+    python -m eval.extract_benchmark runs/ --repeat 200
+"""
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+from brain import extract
+
+def load_corpus(root: str) -> list:
+    """Every Merlin message found in events.jsonl files below `root`."""
+    corpus = []
+    for events_path in sorted(Path(root).rglob("events.jsonl")):
+        with open(events_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get("role") == "Merlin" and entry.get("message"):
+                    corpus.append(entry["message"])
+    return corpus
+
+def sample_corpus() -> list:
+    """Replies from the mock Merlin guards, used when no transcripts are available."""
+    from eval.mock_merlin import DEFAULT_PASSWORDS, LEVEL_INTROS, REFUSAL, guard_reply
+    from strategies.catalog import STRATEGIES
+    from brain.state import State
+    corpus = list(LEVEL_INTROS) + [REFUSAL]
+    for level, password in enumerate(DEFAULT_PASSWORDS, start=1):
+        for strat in STRATEGIES:
+            corpus.append(guard_reply(level, strat.generate_prompt(State(level=level)), password)[0])
+    return corpus
+
+def benchmark(corpus: list, repeat: int = 100) -> dict:
+    """Time extract_password on every reply `repeat` times; costs are in microseconds per reply."""
+    costs = []
+    for reply in corpus:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            extract.extract_password(reply)
+        costs.append((time.perf_counter() - started) * 1e6 / repeat)
+    detectors = {}
+    for reply in corpus:
+        candidates = extract.extract_candidates(reply)
+        name = candidates[0].detector if candidates else "none"
+        detectors[name] = detectors.get(name, 0) + 1
+    costs.sort()
+    return {
+        "replies": len(corpus),
+        "mean_us": round(statistics.mean(costs), 2) if costs else 0.0,
+        "p50_us": round(costs[len(costs) // 2], 2) if costs else 0.0,
+        "p95_us": round(costs[int(len(costs) * 0.95)], 2) if costs else 0.0,
+        "max_us": round(costs[-1], 2) if costs else 0.0,
+        "winning_detectors": detectors,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure password extraction cost per Merlin reply.")
+    parser.add_argument("root", nargs="?", default="runs", help="Directory searched for events.jsonl files.")
+    parser.add_argument("--repeat", type=int, default=100, help="Extractions per reply.")
+    args = parser.parse_args()
+    corpus = load_corpus(args.root) or sample_corpus()
+    print(json.dumps(benchmark(corpus, repeat=args.repeat), indent=2))
+
+if __name__ == "__main__":
+    main()
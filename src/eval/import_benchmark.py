@@ -0,0 +1,56 @@
+"""
+Import-time benchmark for the command-line entry points. Each module is imported
+in a fresh interpreter with -X importtime; the report lists the median import
+time and any browser-engine modules that got loaded. Exits nonzero if an entry
+point imports an engine or exceeds --budget-ms, so it can guard CI.
+
+    python -m eval.import_benchmark --repeat 5 --budget-ms 150
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+# Entry points that must start without Playwright or Selenium
+ENTRY_POINTS = ("runner.cli", "eval.summary", "eval.reextract", "eval.event_store", "eval.benchmark")
+ENGINE_PACKAGES = ("playwright", "selenium")
+SRC_DIR = Path(__file__).resolve().parents[1]
+
+def measure(module: str, repeat: int = 3) -> dict:
+    """Median cumulative import time of `module` (ms) and the engine modules it pulled in."""
+    times, engines = [], set()
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                              cwd=SRC_DIR, capture_output=True, text=True, check=True)
+        for line in proc.stderr.splitlines():
+            # "import time: self [us] | cumulative | imported package"
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+            if not cumulative.isdigit():
+                continue
+            if name.split(".")[0] in ENGINE_PACKAGES:
+                engines.add(name.split(".")[0])
+            if name == module:
+                times.append(int(cumulative) / 1000.0)
+    return {"module": module, "median_ms": round(statistics.median(times), 1) if times else None,
+            "engines": sorted(engines)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time of the CLI and offline tools.")
+    parser.add_argument("modules", nargs="*", default=list(ENTRY_POINTS), help="Modules to import.")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per module.")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Fail if a module takes longer than this.")
+    args = parser.parse_args()
+    report = [measure(module, args.repeat) for module in args.modules]
+    print(json.dumps(report, indent=2))
+    failed = [r["module"] for r in report
+              if r["engines"] or (args.budget_ms is not None and (r["median_ms"] or 0) > args.budget_ms)]
+    if failed:
+        print(f"Import-time regression in: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,54 @@
 """
 Logging utility to record runs (transcript and JSON lines).
 """
+import atexit
 import json
+import os
+import queue
+import threading
 import time
 
+def _format_entry(timestamp: float, role: str, message: str, level: int = None, strategy: str = None,
+                  extra: dict = None):
+    """Return (transcript line, JSONL line) for one logged message."""
+    session = extra.get("session") if extra else None
+    # Human-readable transcript line, tagged with the session when several share a stream
+    who = f"{role} (session {session})" if session is not None else role
+    line = f"[{timestamp:0.2f}s] {who}: {message}\n"
+    # Structured JSONL entry
+    entry = {"time": round(timestamp, 2), "role": role, "message": message}
+    if level is not None:
+        entry["level"] = level
+    if strategy is not None:
+        entry["strategy"] = strategy
+    if extra:
+        entry.update(extra)
+    return line, json.dumps(entry) + "\n"
+
 class RunLogger:
     def __init__(self, transcript_path: str, jsonl_path: str):
         self.start_time = time.time()
         self.transcript_file = open(transcript_path, "w", encoding="utf-8")
         self.jsonl_file = open(jsonl_path, "w", encoding="utf-8")
 
-    def log(self, role: str, message: str, level: int = None, strategy: str = None):
+    def log(self, role: str, message: str, level: int = None, strategy: str = None, extra: dict = None):
         """
         Log a message from either the agent (user) or Merlin (assistant).
         role: "Agent" or "Merlin" or other descriptor.
         message: The text content of the message.
+        extra: Optional additional fields for the JSONL entry (e.g. reply timings).
         """
         timestamp = time.time() - self.start_time
-        # Write to human-readable transcript
-        prefix = f"[{timestamp:0.2f}s] {role}: "
-        self.transcript_file.write(prefix + message + "\n")
+        line, entry = _format_entry(timestamp, role, message, level, strategy, extra)
+        self.transcript_file.write(line)
         self.transcript_file.flush()
-        # Write structured log entry to JSONL
-        entry = {"time": round(timestamp, 2), "role": role, "message": message}
-        if level is not None:
-            entry["level"] = level
-        if strategy is not None:
-            entry["strategy"] = strategy
-        self.jsonl_file.write(json.dumps(entry) + "\n")
+        self.jsonl_file.write(entry)
         self.jsonl_file.flush()
 
+    def session(self, session) -> "SessionLogger":
+        """A logger writing into this one, with every entry tagged with `session`."""
+        return SessionLogger(self, session)
+
     def close(self):
         """Close the log files."""
         try:
@@ -40,3 +59,126 @@ class RunLogger:
             self.jsonl_file.close()
         except Exception:
             pass
+
+# Marks the end of the queue for the writer thread
+_STOP = object()
+
+class BufferedRunLogger(RunLogger):
+    """
+    RunLogger whose log() only enqueues the entry. A writer thread formats the
+    entries and writes them in batches, once `flush_every` entries are pending or
+    `flush_interval` seconds after the first pending one. close() writes out
+    everything still queued and fsyncs both files; it also runs at interpreter
+    exit, so entries logged before a crash are not lost.
+    Safe to share between threads and between asyncio sessions (see session()).
+    """
+    def __init__(self, transcript_path: str, jsonl_path: str, flush_every: int = 64, flush_interval: float = 0.5):
+        super().__init__(transcript_path, jsonl_path)
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._queue = queue.SimpleQueue()
+        self._close_lock = threading.Lock()
+        self._closed = False
+        self._error = None
+        self._thread = threading.Thread(target=self._write_loop, name="run-logger", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def log(self, role: str, message: str, level: int = None, strategy: str = None, extra: dict = None):
+        self._queue.put((time.time() - self.start_time, role, message, level, strategy, extra))
+
+    def _write_loop(self):
+        lines, entries = [], []
+        deadline = None
+        while True:
+            # Block until something arrives, or until the pending batch is due
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is not None and item is not _STOP:
+                line, entry = _format_entry(*item)
+                lines.append(line)
+                entries.append(entry)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            # Checked after every item: under a steady stream the queue never goes idle
+            due = deadline is not None and time.monotonic() >= deadline
+            if lines and (item is _STOP or due or len(lines) >= self.flush_every):
+                try:
+                    self._write_batch(lines, entries)
+                except Exception as exc:
+                    self._error = exc
+                lines, entries = [], []
+                deadline = None
+            if item is _STOP:
+                return
+
+    def _write_batch(self, lines: list, entries: list):
+        self.transcript_file.write("".join(lines))
+        self.jsonl_file.write("".join(entries))
+        self.transcript_file.flush()
+        self.jsonl_file.flush()
+
+    def close(self):
+        """Write out all queued entries, fsync and close the log files (idempotent)."""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+        atexit.unregister(self.close)
+        self._queue.put(_STOP)
+        self._thread.join()
+        for f in (self.transcript_file, self.jsonl_file):
+            try:
+                f.flush()
+                os.fsync(f.fileno())
+            except Exception:
+                pass
+        super().close()
+        if self._error is not None:
+            raise self._error
+
+class SessionLogger:
+    """View of a shared run logger that tags every entry with its session."""
+    def __init__(self, logger: RunLogger, session):
+        self.logger = logger
+        self.session_id = session
+
+    def log(self, role: str, message: str, level: int = None, strategy: str = None, extra: dict = None):
+        fields = {"session": self.session_id}
+        fields.update(extra or {})
+        self.logger.log(role, message, level=level, strategy=strategy, extra=fields)
+
+    def record_results(self, level_results: list):
+        # Only loggers that store results (eval.event_store.EventSink, also behind a TeeLogger) take them
+        if hasattr(self.logger, "record_results"):
+            self.logger.record_results(level_results, session=self.session_id)
+
+    def close(self):
+        pass  # the shared stream is closed by its owner
+
+class TeeLogger:
+    """Sends every entry to several loggers, e.g. a RunLogger and an eval.event_store.EventSink."""
+    def __init__(self, *loggers):
+        self.loggers = loggers
+
+    def log(self, role: str, message: str, level: int = None, strategy: str = None, extra: dict = None):
+        for logger in self.loggers:
+            logger.log(role, message, level=level, strategy=strategy, extra=extra)
+
+    def session(self, session) -> SessionLogger:
+        return SessionLogger(self, session)
+
+    def record_results(self, level_results: list, session=None):
+        for logger in self.loggers:
+            if hasattr(logger, "record_results"):
+                if session is None:
+                    logger.record_results(level_results)
+                else:
+                    logger.record_results(level_results, session=session)
+
+    def close(self):
+        for logger in self.loggers:
+            logger.close()
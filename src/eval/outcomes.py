@@ -0,0 +1,62 @@
+"""
+On-disk history of strategy attempts (SQLite), used to rank strategies by how
+well they worked on each level in earlier runs.
+"""
+import sqlite3
+import time
+from pathlib import Path
+
+DEFAULT_OUTCOMES_PATH = "runs/outcomes.sqlite"
+
+# Outcome values recorded per attempt
+CANDIDATE = "candidate"  # the reply proposed a password; SUCCESS or REJECTED follows once it is checked
+PARTIAL = "partial"      # progress without a password, e.g. one letter revealed
+FAIL = "fail"
+TIMEOUT = "timeout"
+# The game's verdict on a strategy's candidate (no round-trip of its own)
+SUCCESS = "success"      # accepted (or trusted unverified)
+REJECTED = "rejected"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS attempts (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    run TEXT,
+    level INTEGER NOT NULL,
+    strategy TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    latency REAL,
+    round_trips INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS attempts_level_strategy ON attempts (level, strategy);
+"""
+
+class OutcomeStore:
+    def __init__(self, path: str = DEFAULT_OUTCOMES_PATH, run: str = None):
+        self.run = run
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path), timeout=30)
+        self.conn.executescript(_SCHEMA)
+
+    def record(self, level: int, strategy: str, outcome: str, latency: float = None, round_trips: int = 1):
+        """Append one attempt (committed immediately so crashed runs still count)."""
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO attempts (ts, run, level, strategy, outcome, latency, round_trips) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), self.run, level, strategy, outcome, latency, round_trips))
+
+    def level_stats(self, level: int) -> dict:
+        """
+        Per-strategy history for a level:
+        {strategy: {"attempts", "successes", "round_trips", "mean_latency"}}.
+        Attempts are the rows that cost a round-trip; successes are accepted passwords.
+        """
+        rows = self.conn.execute(
+            "SELECT strategy, SUM(round_trips > 0), SUM(outcome = ?), SUM(round_trips), AVG(latency) "
+            "FROM attempts WHERE level = ? GROUP BY strategy", (SUCCESS, level))
+        return {name: {"attempts": n, "successes": wins, "round_trips": trips, "mean_latency": latency}
+                for name, n, wins, trips, latency in rows}
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,124 @@
+"""
+Re-apply the current password extractor to recorded runs and report what it
+would have found differently: levels where it now finds a password the run
+missed ("new") and levels where its password differs from the one the run
+extracted ("changed").
+
+Run directories are found lazily and read line by line in a process pool, so
+memory stays flat however many runs there are.
+
+    python -m eval.reextract runs/ --workers 8 --out runs/reextract.jsonl
+"""
+import argparse
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+from brain import extract
+
+_PASSED_RE = re.compile(r"Level (\d+) PASSED\. Password: (\S+)")
+
+def iter_event_files(root: str):
+    """Yield every events.jsonl below `root` without listing the whole tree first."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        if "events.jsonl" in filenames:
+            yield os.path.join(dirpath, "events.jsonl")
+
+def _iter_events(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue  # a run killed mid-write can leave a torn last line
+
+def scan_run(path: str) -> list:
+    """
+    Diff entries for one run: one per level where the current extractor's
+    candidates differ from the passwords the run logged. Each entry is
+    {"run", "level", "status": "new"|"changed", "old", "new": [{"password", "detector", "confidence"}]}.
+    """
+    old, found = {}, {}
+    for entry in _iter_events(path):
+        level = entry.get("level")
+        if level is None:
+            continue
+        if entry.get("role") == "INFO":
+            m = _PASSED_RE.match(entry.get("message", ""))
+            if m:
+                old.setdefault(level, m.group(2))
+        elif entry.get("role") == "Merlin":
+            candidates = extract.extract_candidates(entry.get("message", ""))
+            if candidates:
+                best = candidates[0]
+                found.setdefault(level, {}).setdefault(best.password, best)
+    diffs = []
+    for level in sorted(found):
+        before = old.get(level)
+        if before in found[level]:
+            continue
+        diffs.append({
+            "run": str(Path(path).parent),
+            "level": level,
+            "status": "changed" if before else "new",
+            "old": before,
+            "new": [{"password": c.password, "detector": c.detector, "confidence": c.confidence}
+                    for c in found[level].values()],
+        })
+    return diffs
+
+def reextract(paths, workers: int = None):
+    """
+    Scan every path in the iterable `paths` with a pool of `workers` processes
+    and yield (path, diffs) as runs finish. Only a few runs per worker are in
+    flight at a time, so `paths` may be an unbounded generator.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for path in paths:
+            yield path, scan_run(path)
+        return
+    paths = iter(paths)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+        while True:
+            while len(pending) < workers * 4:
+                path = next(paths, None)
+                if path is None:
+                    break
+                pending[pool.submit(scan_run, path)] = path
+            if not pending:
+                return
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future.result()
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-run password extraction over recorded runs and report differences.")
+    parser.add_argument("root", nargs="?", default="runs", help="Directory searched for events.jsonl files.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU).")
+    parser.add_argument("--out", default=None, help="Write the per-level diff entries here as JSON lines.")
+    args = parser.parse_args()
+    out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+    runs = 0
+    totals = {}
+    try:
+        for _, diffs in reextract(iter_event_files(args.root), workers=args.workers):
+            runs += 1
+            for diff in diffs:
+                out.write(json.dumps(diff) + "\n")
+                counts = totals.setdefault(diff["level"], {"new": 0, "changed": 0})
+                counts[diff["status"]] += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"Scanned {runs} runs.", file=sys.stderr)
+    for level in sorted(totals):
+        counts = totals[level]
+        print(f"Level {level}: {counts['new']} newly cracked, {counts['changed']} changed", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Persistent store of known level passwords, used to fast-forward (--resume)
+through levels that earlier runs already solved.
+
+Run as a module to seed the store from existing run directories:
+    python -m eval.solutions runs/ [--store runs/solutions.json]
+"""
+import argparse
+import json
+import re
+import time
+from pathlib import Path
+
+DEFAULT_STORE_PATH = "runs/solutions.json"
+
+_PASSED_RE = re.compile(r"Level (\d+) PASSED\. Password: (\S+)")
+
+class SolutionStore:
+    """JSON file mapping level -> {"password", "strategy", "updated"}."""
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        self.path = Path(path)
+        self.levels = {}
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.levels = {int(k): v for k, v in json.load(f).items()}
+
+    def get(self, level: int):
+        """Known password for `level`, or None."""
+        entry = self.levels.get(level)
+        return entry["password"] if entry else None
+
+    def record(self, level: int, password: str, strategy: str = None):
+        self.levels[level] = {"password": password, "strategy": strategy, "updated": round(time.time())}
+
+    def forget(self, level: int):
+        """Drop a password the game rejected (e.g. the game rotated its secrets)."""
+        self.levels.pop(level, None)
+
+    def record_results(self, level_results: list):
+        """Store every solved level of a run (entries as in eval.summary.write_run_summary)."""
+        for result in level_results:
+            if result.get("success") and result.get("password") and self.get(result["level"]) != result["password"]:
+                strategies = result.get("strategies") or [None]
+                self.record(result["level"], result["password"], strategies[-1])
+
+    def ingest_run(self, run_dir: str) -> int:
+        """Import solved levels from a run directory; returns how many were found."""
+        run_dir = Path(run_dir)
+        before = dict(self.levels)
+        summary_path = run_dir / "run_summary.json"
+        events_path = run_dir / "events.jsonl"
+        if summary_path.exists():
+            with open(summary_path, "r", encoding="utf-8") as f:
+                self.record_results(json.load(f).get("levels", []))
+        elif events_path.exists():
+            # Runs that crashed before writing a summary still have their events
+            with open(events_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    entry = json.loads(line)
+                    m = _PASSED_RE.search(entry.get("message", "")) if entry.get("role") == "INFO" else None
+                    if m:
+                        self.record(int(m.group(1)), m.group(2))
+        return sum(1 for k, v in self.levels.items() if before.get(k) != v)
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({str(k): v for k, v in sorted(self.levels.items())}, f, indent=2)
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed the level password store from past runs.")
+    parser.add_argument("runs_root", help="Directory containing run directories (e.g. runs/).")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH,
+                        help=f"Password store to update (default: {DEFAULT_STORE_PATH}).")
+    args = parser.parse_args()
+    store = SolutionStore(args.store)
+    # Oldest first so that newer runs win
+    run_dirs = sorted((p for p in Path(args.runs_root).iterdir() if p.is_dir()), key=lambda p: p.stat().st_mtime)
+    found = sum(store.ingest_run(run_dir) for run_dir in run_dirs)
+    store.save()
+    print(f"Imported {found} level password(s); store now knows levels {sorted(store.levels)}")
+
+if __name__ == "__main__":
+    main()
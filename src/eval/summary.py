@@ -3,14 +3,64 @@ Generate a run summary file from collected results.
 """
 import json
 
-def write_run_summary(level_results: list, output_path: str):
+def write_run_summary(level_results: list, output_path: str, phases: dict = None):
     """
     level_results: list of dicts with keys:
-        level (int), success (bool), password (str or None), strategies (list of str)
+        level (int), success (bool), password (str or None), strategies (list of str,
+        each strategy once), round_trips (int, turns of the level)
+    phases: optional per-phase latency stats (eval.trace.Tracer.phase_stats); the
+        time spent sleeping in cooldowns is also reported as cooldown_idle_sec.
     """
     summary = {
         "levels": level_results,
         "total_levels_cleared": sum(1 for lvl in level_results if lvl.get("success"))
     }
+    if phases is not None:
+        summary["phases"] = phases
+        summary["cooldown_idle_sec"] = phases.get("cooldown", {}).get("total_sec", 0.0)
     with open(output_path, "w", encoding="utf-8") as f:
         json.dump(summary, f, indent=2)
+
+def batch_summary(run_results: list, wall_sec: float, planned: int = None, cancelled: bool = False) -> dict:
+    """
+    Aggregate many runs. run_results: one dict per run with "levels" (the level_results
+    of write_run_summary) or "error" for a run that crashed.
+    Per level: how many runs reached it, success rate over all completed runs and mean
+    round-trips (attempts, counting the winning one) of the runs that reached it.
+    """
+    completed = [r for r in run_results if "levels" in r]
+    per_level = {}
+    for run in completed:
+        for lvl in run["levels"]:
+            stats = per_level.setdefault(lvl["level"], {"reached": 0, "passed": 0, "round_trips": 0})
+            stats["reached"] += 1
+            stats["passed"] += 1 if lvl.get("success") else 0
+            # Summaries written before round_trips was recorded listed one strategy per turn
+            stats["round_trips"] += lvl.get("round_trips", len(lvl.get("strategies") or []))
+    levels = {}
+    for level, stats in sorted(per_level.items()):
+        levels[str(level)] = {
+            "reached": stats["reached"],
+            "success_rate": round(stats["passed"] / len(completed), 3),
+            "mean_round_trips": round(stats["round_trips"] / stats["reached"], 2),
+        }
+    cleared = sum(stats["passed"] for stats in per_level.values())
+    return {
+        "runs_planned": planned if planned is not None else len(run_results),
+        "runs_completed": len(completed),
+        "runs_failed": len(run_results) - len(completed),
+        "cancelled": cancelled,
+        "wall_sec": round(wall_sec, 2),
+        "levels": levels,
+        "mean_levels_cleared": round(cleared / len(completed), 2) if completed else 0.0,
+        "levels_per_hour": round(cleared * 3600.0 / wall_sec, 1) if wall_sec > 0 else 0.0,
+        "errors": [{"run": r.get("run"), "error": r["error"]} for r in run_results if "error" in r],
+    }
+
+def write_batch_summary(run_results: list, output_path: str, wall_sec: float, planned: int = None,
+                        cancelled: bool = False) -> dict:
+    """Write batch_summary() as JSON to `output_path` and return it."""
+    summary = batch_summary(run_results, wall_sec, planned=planned, cancelled=cancelled)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    return summary
@@ -0,0 +1,77 @@
+"""
+Per-phase latency spans for a run (browser launch, page load, send, waiting
+for Merlin, reading the reply, extraction, cooldown), exported in the Chrome
+trace event format, which chrome://tracing, Perfetto and OpenTelemetry
+converters read, and summarized as p50/p95 per phase in the run summary.
+"""
+import json
+import time
+from contextlib import contextmanager
+
+# Phase names used by the runners and controllers
+LAUNCH = "browser_launch"
+OPEN_PAGE = "open_page"
+SEND = "send_text"
+WAIT_REPLY = "wait_reply"
+READ_REPLY = "read_reply"
+EXTRACT = "extract"
+SUBMIT = "submit_password"
+COOLDOWN = "cooldown"
+
+class Tracer:
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.spans = []
+
+    @contextmanager
+    def span(self, name: str, session=0, **args):
+        """Time the enclosed block as one `name` span; `args` are stored with it (e.g. level, strategy)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter(), session, **args)
+
+    def record(self, name: str, start: float, end: float, session=0, **args):
+        """Add a span measured elsewhere (perf_counter() start and end)."""
+        self.spans.append((name, start - self.origin, end - start, session, args))
+
+    def phase_stats(self) -> dict:
+        """{phase: {"count", "p50_sec", "p95_sec", "total_sec"}} over all recorded spans."""
+        durations = {}
+        for name, _, duration, _, _ in self.spans:
+            durations.setdefault(name, []).append(duration)
+        stats = {}
+        for name, values in durations.items():
+            values.sort()
+            stats[name] = {
+                "count": len(values),
+                "p50_sec": round(_percentile(values, 0.50), 4),
+                "p95_sec": round(_percentile(values, 0.95), 4),
+                "total_sec": round(sum(values), 4),
+            }
+        return stats
+
+    def to_chrome_trace(self) -> dict:
+        """Complete ("X") trace events with microsecond timestamps, one thread per session."""
+        events = [{"name": name, "ph": "X", "ts": round(start * 1e6), "dur": round(duration * 1e6),
+                   "pid": 1, "tid": session, "args": args}
+                  for name, start, duration, session, args in self.spans]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f)
+
+def _percentile(values: list, q: float) -> float:
+    """Nearest-rank percentile of sorted `values`."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+class _NullTracer(Tracer):
+    """Tracer that records nothing; the default for controllers outside a traced run."""
+    def record(self, name: str, start: float, end: float, session=0, **args):
+        pass
+
+NULL_TRACER = _NullTracer()
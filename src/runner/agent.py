@@ -1,117 +1,218 @@
 """
 Main agent logic: orchestrates levels, strategies, and browser interaction.
 """
-import os
 import time
-from pathlib import Path
-from controller.playwright_controller import PlaywrightController
-from controller.selenium_controller import SeleniumController
+from controller import registry
+from controller.base import REPLY_QUIET_SEC, PasswordCheckUnavailable
 from brain.state import State
-from brain import policy, extract
-from eval.logger import RunLogger
-from eval.summary import write_run_summary
+from brain import policy
+from eval.solutions import SolutionStore
+from eval.outcomes import OutcomeStore
+from eval import trace
+from runner.pacing import MAX_FREE_THROTTLES, SUBMIT_BACKOFF_SEC, SUBMIT_RETRIES, Pacer
+from runner.loop import (GAME_URL, MAX_LEVEL, open_run_logs, close_run_logs, record_reply, record_timeout,
+                         settle_candidate, level_result, gives_nothing_away)
 
-def run_agent(engine: str = "playwright", headless: bool = False, max_attempts_per_level: int = 8, cooldown: float = 1.0, outdir: str = "runs/session"):
+def make_controller(engine: str = "playwright", headless: bool = False, fast_submit: bool = True,
+                    capture_network: bool = False):
+    """
+    Create a new browser controller for the given engine name. With fast_submit, prompts
+    are entered and submitted in one in-page script call (real typing if the page refuses).
+    capture_network (Playwright only) takes replies from the game's chat API responses
+    instead of the page. Engine "http" plays through the game's API without a browser.
+    Only the selected engine is imported (controller.registry).
+    """
+    options = {"headless": headless, "fast_submit": fast_submit}
+    if capture_network:
+        options["capture_network"] = True
+    return registry.load_engine(engine)(**options)
+
+def verify_candidates(controller, state: State, logger, tracer=trace.NULL_TRACER, outcomes=None,
+                      verify: bool = True, extra: dict = None, submit_timeout: float = 5.0) -> str:
+    """
+    Submit the level's queued candidates (state.candidates) best first until the game
+    accepts one; a rejected candidate costs a form submit, not a Merlin turn. Returns the
+    accepted password, or '' when the queue runs dry. Without `verify`, or if the
+    controller cannot submit passwords or its password check fails, the best candidate
+    is trusted unverified. A candidate the game cannot judge (rate limit, server error)
+    is submitted again after a backoff, and stays queued if it still cannot.
+    """
+    while True:
+        entry = state.candidates.pop()
+        if entry is None:
+            return ""
+        accepted = None
+        if verify:
+            try:
+                for retry in range(SUBMIT_RETRIES + 1):
+                    try:
+                        with tracer.span(trace.SUBMIT, level=state.level, strategy=entry.strategy, **(extra or {})):
+                            accepted = controller.submit_password(entry.password, timeout=submit_timeout)
+                        break
+                    except PasswordCheckUnavailable:
+                        if retry == SUBMIT_RETRIES:
+                            raise
+                        time.sleep(SUBMIT_BACKOFF_SEC * 2 ** retry)
+            except PasswordCheckUnavailable as exc:
+                logger.log("INFO", f"Password check unavailable ({exc}); '{entry.password}' stays queued",
+                           level=state.level, extra=extra)
+                state.candidates.add([entry], strategy=entry.strategy)
+                return ""
+            except NotImplementedError:
+                verify = False
+            except Exception as exc:
+                # The password form is not what the controller expects (e.g. selectors that do
+                # not fit the live page): trust the candidates unverified instead of failing the run
+                logger.log("INFO", f"Password check failed ({exc}); accepting candidates unverified",
+                           level=state.level, extra=extra)
+                verify = False
+        if settle_candidate(state, entry, accepted, logger, outcomes, extra):
+            return entry.password
+
+def run_agent(engine: str = "playwright", headless: bool = False, max_attempts_per_level: int = 8, cooldown: float = 1.0, outdir: str = "runs/session",
+              reply_timeout: float = 15.0, intro_timeout: float = 5.0, settle_sec: float = REPLY_QUIET_SEC,
+              controller=None, solutions_path: str = None, resume: bool = False,
+              outcomes_path: str = None, policy_mode: str = "ordered", url: str = GAME_URL,
+              buffered_logs: bool = False, logger=None, events_db: str = None,
+              adaptive_cooldown: bool = False, rate_bucket=None, fast_submit: bool = True,
+              capture_network: bool = False, verify: bool = True):
+    """
+    Play one game session. If `controller` is given (e.g. checked out of a
+    controller.pool.ControllerPool) its page must already be open on the game, and
+    the caller stays responsible for closing it; otherwise a new one is launched
+    (see make_controller for fast_submit and capture_network).
+    Solved levels are saved to the password store at `solutions_path`; with `resume`,
+    levels with a stored password are skipped by submitting it directly.
+    Every attempt is appended to the strategy-outcome history at `outcomes_path`;
+    policy_mode "ucb" orders strategies by that history instead of catalog order.
+    buffered_logs writes the logs from a background thread (eval.logger.BufferedRunLogger);
+    `logger` (e.g. a session of a shared stream, eval.logger.RunLogger.session) replaces
+    the run's own transcript and events files. events_db also records the events and
+    results in that SQLite event store (eval.event_store).
+    Rate-limit and error replies do not use up a strategy or an attempt (beyond
+    MAX_FREE_THROTTLES in a row they do): the run backs off (jittered exponential
+    backoff) and retries. With adaptive_cooldown the pause between
+    attempts follows the server instead of staying at `cooldown` (runner.pacing.Pacer);
+    rate_bucket is a runner.pacing.TokenBucket shared with concurrent sessions.
+    Per-phase latencies are written to trace.json (Chrome trace format) and summarized
+    in run_summary.json.
+    Passwords found in replies are submitted through the game's password form, best
+    candidate first (verify_candidates); a level only counts as passed once the game
+    accepts one. verify=False trusts the first extracted password instead.
+    Returns the per-level results.
+    """
     # Prepare output directory for this run
-    Path(outdir).mkdir(parents=True, exist_ok=True)
-    transcript_path = Path(outdir) / "transcript.txt"
-    jsonl_path = Path(outdir) / "events.jsonl"
-    summary_path = Path(outdir) / "run_summary.json"
-    logger = RunLogger(transcript_path, jsonl_path)
+    logger, summary_path = open_run_logs(outdir, buffered=buffered_logs, logger=logger,
+                                         events_db=events_db)
+    store = SolutionStore(solutions_path) if solutions_path else None
+    outcomes = OutcomeStore(outcomes_path, run=str(outdir)) if outcomes_path else None
+    tracer = trace.Tracer()
+    pacer = Pacer(cooldown, adaptive=adaptive_cooldown, bucket=rate_bucket)
     # Initialize browser controller
-    if engine.lower() == "selenium":
-        controller = SeleniumController(headless=headless)
-    else:
-        controller = PlaywrightController(headless=headless)
-    url = "https://hackmerlin.io"
-    controller.open_page(url)
+    owns_controller = controller is None
+    if owns_controller:
+        with tracer.span(trace.LAUNCH, engine=engine):
+            controller = make_controller(engine, headless, fast_submit, capture_network)
+        with tracer.span(trace.OPEN_PAGE):
+            controller.open_page(url)
+    controller.tracer = tracer
     level_results = []
     current_level = 1
     try:
-        # Wait for initial Merlin message (level 1 intro)
+        # Wait for initial Merlin message (level 1 intro); an intro already on the page counts
         try:
-            controller.wait_for_reply(timeout=10.0)
+            controller.wait_for_settled_reply(timeout=intro_timeout, quiet=settle_sec, since=0)
         except Exception:
-            pass  # Page might already have initial message or none needed
+            pass  # Page might have no initial message
         intro_msg = controller.get_latest_bot_text()
         if intro_msg:
             # Log Merlin's initial message for level 1
             logger.log("Merlin", intro_msg, level=current_level)
         state = State(level=current_level, last_merlin_msg=intro_msg)
         # Loop through levels until fail or up to MAX_LEVEL
-        MAX_LEVEL = 7
         while current_level <= MAX_LEVEL:
             password_found = ""
             strategies_used = []
-            # Attempts loop for this level
-            for attempt in range(max_attempts_per_level):
+            # Fast-forward through levels solved by earlier runs
+            known = store.get(current_level) if (resume and store) else None
+            if known:
+                try:
+                    with tracer.span(trace.SUBMIT, level=current_level):
+                        accepted = controller.submit_password(known)
+                except Exception as exc:
+                    # No password form (NotImplementedError) or one the controller cannot work
+                    logger.log("INFO", f"Could not replay the stored password for level {current_level} ({exc!r}); "
+                               "searching again.", level=current_level)
+                    accepted = None
+                if accepted:
+                    password_found = known
+                    strategies_used.append("replay")
+                    logger.log("INFO", f"Level {current_level} PASSED. Password: {known} (replayed from store)", level=current_level)
+                else:
+                    store.forget(current_level)
+                    if accepted is not None:
+                        logger.log("INFO", f"Stored password for level {current_level} rejected; searching again.", level=current_level)
+            # Attempts loop for this level (skipped if the level was replayed)
+            attempts = 0 if password_found else max_attempts_per_level
+            attempt = 0
+            while attempt < attempts:
                 state.attempt_count = attempt + 1
                 # Decide next strategy
-                strat = policy.choose_next_strategy(state, state.last_merlin_msg or "")
+                stats = outcomes.level_stats(current_level) if (outcomes and policy_mode == "ucb") else None
+                strat = policy.choose_next_strategy(state, state.last_merlin_msg or "", stats=stats)
                 if strat is None:
                     # No applicable strategy found
                     break
+                # Generate prompt (a strategy may hand the turn to another one) and send to Merlin
+                strat, prompt = strat.resolve(state)
                 strategies_used.append(strat.name)
-                # Generate prompt and send to Merlin
-                prompt = strat.generate_prompt(state)
                 logger.log("Agent", prompt, level=current_level, strategy=strat.name)
-                controller.send_text(prompt)
-                # Wait for Merlin's reply
+                span_args = {"level": current_level, "attempt": attempt + 1, "strategy": strat.name}
+                if rate_bucket is not None:
+                    with tracer.span(trace.COOLDOWN, **span_args):
+                        pacer.before_send()
+                with tracer.span(trace.SEND, **span_args):
+                    controller.send_text(prompt)
+                # Wait for Merlin's reply to finish streaming
                 try:
-                    controller.wait_for_reply(timeout=15.0)
+                    timing = controller.wait_for_settled_reply(timeout=reply_timeout, quiet=settle_sec)
                 except Exception:
                     # If no reply (timeout), break attempts loop
-                    state.last_merlin_msg = ""
+                    record_timeout(state, strat, outcomes)
                     break
-                # Get Merlin's response
-                merlin_reply = controller.get_latest_bot_text()
-                state.last_merlin_msg = merlin_reply or ""
-                if merlin_reply:
-                    logger.log("Merlin", merlin_reply, level=current_level)
-                # Check if the reply contains the password
-                extracted = extract.extract_password(merlin_reply) if merlin_reply else ""
-                if extracted:
-                    # Found a full password candidate
-                    password_found = extracted
-                    logger.log("INFO", f"Level {current_level} PASSED. Password: {password_found}", level=current_level)
-                    state.tried_strategies.add(strat.name)
+                # Get Merlin's response and check it for the password
+                with tracer.span(trace.READ_REPLY, **span_args):
+                    merlin_reply = controller.get_latest_bot_text()
+                throttled = pacer.observe(merlin_reply, timing.complete_sec)
+                if throttled and gives_nothing_away(state, strat, merlin_reply):
+                    # Throttled: back off and retry the strategy instead of writing it off; the send
+                    # does not use up an attempt unless the server keeps throttling
+                    strategies_used.pop()
+                    logger.log("INFO", f"Rate limited; backing off {pacer.delay:.1f}s", level=current_level,
+                               strategy=strat.name, extra={"reply": merlin_reply})
+                    with tracer.span(trace.COOLDOWN, **span_args):
+                        pacer.wait()
+                    if pacer.failures > MAX_FREE_THROTTLES:
+                        attempt += 1
+                    continue
+                # A throttled reply that still leaks something is handled as an answer (after the backoff)
+                attempt += 1
+                with tracer.span(trace.EXTRACT, **span_args):
+                    candidate = record_reply(state, strat, merlin_reply, timing, logger, outcomes=outcomes)
+                if candidate or state.candidates:
+                    # Also candidates left queued because the game could not judge them earlier
+                    password_found = verify_candidates(controller, state, logger, tracer, outcomes, verify)
+                if password_found:
                     break
-                # If strategy was letter-by-letter, handle partial letter assembly
-                if strat.name == "letter_by_letter":
-                    letter = None
-                    if merlin_reply:
-                        import re
-                        m = re.search(r"letter is\s*([A-Za-z])", merlin_reply, flags=re.IGNORECASE)
-                        if m:
-                            letter = m.group(1)
-                        elif merlin_reply.strip().isalpha() and len(merlin_reply.strip()) == 1:
-                            letter = merlin_reply.strip()
-                    if letter:
-                        # Append the revealed letter and continue without marking strategy as tried
-                        state.partial_password += letter
-                        time.sleep(cooldown)
-                        continue  # ask for next letter in next attempt
-                    else:
-                        # Merlin refused to give next letter or no letter extracted
-                        state.tried_strategies.add(strat.name)
-                        logger.log("INFO", f"Letter-by-letter halted with partial = '{state.partial_password}'", level=current_level)
-                        # Continue to next attempt (try other strategies)
-                        time.sleep(cooldown)
-                        continue
-                # Mark strategy as tried (for non-letter strategies)
-                if strat.name != "letter_by_letter":
-                    state.tried_strategies.add(strat.name)
-                # Small delay between attempts to avoid spamming
-                time.sleep(cooldown)
+                # Delay between attempts to avoid spamming (adapts to the server with adaptive_cooldown)
+                with tracer.span(trace.COOLDOWN, **span_args):
+                    pacer.wait()
+            if not password_found and state.candidates:
+                # Out of attempts or strategies with candidates the game could not judge yet
+                password_found = verify_candidates(controller, state, logger, tracer, outcomes, verify)
             # Record results for this level
-            level_success = bool(password_found)
-            level_results.append({
-                "level": current_level,
-                "success": level_success,
-                "password": password_found if level_success else None,
-                "strategies": strategies_used
-            })
-            if not level_success:
+            level_results.append(level_result(current_level, password_found, strategies_used))
+            if not password_found:
                 # Level failed, stop the run
                 logger.log("INFO", f"Level {current_level} FAILED after {max_attempts_per_level} attempts.", level=current_level)
                 break
@@ -122,7 +223,7 @@ def run_agent(engine: str = "playwright", headless: bool = False, max_attempts_p
             state = State(level=current_level)
             # Wait for Merlin's next level introduction message, if any
             try:
-                controller.wait_for_reply(timeout=5.0)
+                controller.wait_for_settled_reply(timeout=intro_timeout, quiet=settle_sec)
             except Exception:
                 pass
             intro_msg = controller.get_latest_bot_text()
@@ -134,6 +235,13 @@ def run_agent(engine: str = "playwright", headless: bool = False, max_attempts_p
         # End of levels loop
     finally:
         # Cleanup resources
-        controller.close()
-        logger.close()
-        write_run_summary(level_results, summary_path)
+        controller.tracer = trace.NULL_TRACER
+        if owns_controller:
+            controller.close()
+        close_run_logs(logger, level_results, summary_path, tracer=tracer)
+        if store is not None:
+            store.record_results(level_results)
+            store.save()
+        if outcomes is not None:
+            outcomes.close()
+    return level_results
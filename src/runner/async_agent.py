@@ -0,0 +1,249 @@
+"""
+Asyncio agent loop: the same level/strategy logic as runner.agent, driven through
+an AsyncBrowserControllerBase so many game sessions can run in one process.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from pathlib import Path
+from controller import registry
+from controller.base import REPLY_QUIET_SEC, PasswordCheckUnavailable
+from brain.state import State
+from brain import policy
+from eval.solutions import SolutionStore
+from eval.outcomes import OutcomeStore
+from eval import trace
+from runner.pacing import MAX_FREE_THROTTLES, SUBMIT_BACKOFF_SEC, SUBMIT_RETRIES, Pacer, TokenBucket
+from runner.loop import (GAME_URL, MAX_LEVEL, open_run_logs, close_run_logs, record_reply, record_timeout,
+                         settle_candidate, level_result, gives_nothing_away)
+
+async def verify_candidates(controller, state: State, logger, tracer=trace.NULL_TRACER, outcomes=None,
+                            verify: bool = True, extra: dict = None, submit_timeout: float = 5.0) -> str:
+    """Asyncio flavour of runner.agent.verify_candidates."""
+    while True:
+        entry = state.candidates.pop()
+        if entry is None:
+            return ""
+        accepted = None
+        if verify:
+            try:
+                for retry in range(SUBMIT_RETRIES + 1):
+                    try:
+                        with tracer.span(trace.SUBMIT, level=state.level, strategy=entry.strategy, **(extra or {})):
+                            accepted = await controller.submit_password(entry.password, timeout=submit_timeout)
+                        break
+                    except PasswordCheckUnavailable:
+                        if retry == SUBMIT_RETRIES:
+                            raise
+                        await asyncio.sleep(SUBMIT_BACKOFF_SEC * 2 ** retry)
+            except PasswordCheckUnavailable as exc:
+                logger.log("INFO", f"Password check unavailable ({exc}); '{entry.password}' stays queued",
+                           level=state.level, extra=extra)
+                state.candidates.add([entry], strategy=entry.strategy)
+                return ""
+            except NotImplementedError:
+                verify = False
+            except Exception as exc:
+                # The password form is not what the controller expects (e.g. selectors that do
+                # not fit the live page): trust the candidates unverified instead of failing the run
+                logger.log("INFO", f"Password check failed ({exc}); accepting candidates unverified",
+                           level=state.level, extra=extra)
+                verify = False
+        if settle_candidate(state, entry, accepted, logger, outcomes, extra):
+            return entry.password
+
+async def run_agent(controller=None, headless: bool = False, max_attempts_per_level: int = 8, cooldown: float = 1.0,
+                    outdir: str = "runs/session", reply_timeout: float = 15.0, intro_timeout: float = 5.0,
+                    settle_sec: float = REPLY_QUIET_SEC, solutions_path: str = None, resume: bool = False,
+                    outcomes_path: str = None, policy_mode: str = "ordered", url: str = GAME_URL,
+                    buffered_logs: bool = False, logger=None, events_db: str = None,
+                    adaptive_cooldown: bool = False, rate_bucket=None, fast_submit: bool = True,
+                    capture_network: bool = False, verify: bool = True):
+    """
+    Play one game session. If `controller` is None a standalone AsyncPlaywrightController
+    (with its own browser, see runner.agent.make_controller for fast_submit and
+    capture_network) is created. The controller is closed when the run ends.
+    `solutions_path`, `resume`, `outcomes_path`, `policy_mode`, `buffered_logs`,
+    `logger`, `events_db`, `adaptive_cooldown`, `rate_bucket` and `verify` work as in
+    runner.agent.run_agent, and phase latencies are traced the same way.
+    Returns the per-level results.
+    """
+    logger, summary_path = open_run_logs(outdir, buffered=buffered_logs, logger=logger,
+                                         events_db=events_db)
+    store = SolutionStore(solutions_path) if solutions_path else None
+    outcomes = OutcomeStore(outcomes_path, run=str(outdir)) if outcomes_path else None
+    tracer = trace.Tracer()
+    pacer = Pacer(cooldown, adaptive=adaptive_cooldown, bucket=rate_bucket)
+    if controller is None:
+        with tracer.span(trace.LAUNCH, engine="playwright"):
+            controller_class = registry.load_engine("playwright", asynchronous=True)
+            controller = await controller_class.create(headless=headless, fast_submit=fast_submit,
+                                                       capture_network=capture_network)
+    controller.tracer = tracer
+    level_results = []
+    current_level = 1
+    try:
+        with tracer.span(trace.OPEN_PAGE):
+            await controller.open_page(url)
+        # Wait for initial Merlin message (level 1 intro); an intro already on the page counts
+        try:
+            await controller.wait_for_settled_reply(timeout=intro_timeout, quiet=settle_sec, since=0)
+        except Exception:
+            pass  # Page might have no initial message
+        intro_msg = await controller.get_latest_bot_text()
+        if intro_msg:
+            logger.log("Merlin", intro_msg, level=current_level)
+        state = State(level=current_level, last_merlin_msg=intro_msg)
+        while current_level <= MAX_LEVEL:
+            password_found = ""
+            strategies_used = []
+            known = store.get(current_level) if (resume and store) else None
+            if known:
+                try:
+                    with tracer.span(trace.SUBMIT, level=current_level):
+                        accepted = await controller.submit_password(known)
+                except Exception as exc:
+                    # No password form (NotImplementedError) or one the controller cannot work
+                    logger.log("INFO", f"Could not replay the stored password for level {current_level} ({exc!r}); "
+                               "searching again.", level=current_level)
+                    accepted = None
+                if accepted:
+                    password_found = known
+                    strategies_used.append("replay")
+                    logger.log("INFO", f"Level {current_level} PASSED. Password: {known} (replayed from store)", level=current_level)
+                else:
+                    store.forget(current_level)
+                    if accepted is not None:
+                        logger.log("INFO", f"Stored password for level {current_level} rejected; searching again.", level=current_level)
+            attempts = 0 if password_found else max_attempts_per_level
+            attempt = 0
+            while attempt < attempts:
+                state.attempt_count = attempt + 1
+                stats = outcomes.level_stats(current_level) if (outcomes and policy_mode == "ucb") else None
+                strat = policy.choose_next_strategy(state, state.last_merlin_msg or "", stats=stats)
+                if strat is None:
+                    break
+                # Awaited, so a slow planner does not hold up the other sessions
+                strat, prompt = await strat.resolve_async(state)
+                strategies_used.append(strat.name)
+                logger.log("Agent", prompt, level=current_level, strategy=strat.name)
+                span_args = {"level": current_level, "attempt": attempt + 1, "strategy": strat.name}
+                if rate_bucket is not None:
+                    with tracer.span(trace.COOLDOWN, **span_args):
+                        await pacer.before_send_async()
+                with tracer.span(trace.SEND, **span_args):
+                    await controller.send_text(prompt)
+                try:
+                    timing = await controller.wait_for_settled_reply(timeout=reply_timeout, quiet=settle_sec)
+                except Exception:
+                    record_timeout(state, strat, outcomes)
+                    break
+                with tracer.span(trace.READ_REPLY, **span_args):
+                    merlin_reply = await controller.get_latest_bot_text()
+                throttled = pacer.observe(merlin_reply, timing.complete_sec)
+                if throttled and gives_nothing_away(state, strat, merlin_reply):
+                    strategies_used.pop()
+                    logger.log("INFO", f"Rate limited; backing off {pacer.delay:.1f}s", level=current_level,
+                               strategy=strat.name, extra={"reply": merlin_reply})
+                    with tracer.span(trace.COOLDOWN, **span_args):
+                        await pacer.wait_async()
+                    if pacer.failures > MAX_FREE_THROTTLES:
+                        attempt += 1
+                    continue
+                attempt += 1
+                with tracer.span(trace.EXTRACT, **span_args):
+                    candidate = record_reply(state, strat, merlin_reply, timing, logger, outcomes=outcomes)
+                if candidate or state.candidates:
+                    password_found = await verify_candidates(controller, state, logger, tracer, outcomes, verify)
+                if password_found:
+                    break
+                # Yield to the other sessions while cooling down
+                with tracer.span(trace.COOLDOWN, **span_args):
+                    await pacer.wait_async()
+            if not password_found and state.candidates:
+                password_found = await verify_candidates(controller, state, logger, tracer, outcomes, verify)
+            level_results.append(level_result(current_level, password_found, strategies_used))
+            if not password_found:
+                logger.log("INFO", f"Level {current_level} FAILED after {max_attempts_per_level} attempts.", level=current_level)
+                break
+            current_level += 1
+            if current_level > MAX_LEVEL:
+                break
+            state = State(level=current_level)
+            try:
+                await controller.wait_for_settled_reply(timeout=intro_timeout, quiet=settle_sec)
+            except Exception:
+                pass
+            intro_msg = await controller.get_latest_bot_text()
+            state.last_merlin_msg = intro_msg or ""
+            if intro_msg:
+                logger.log("Merlin", intro_msg, level=current_level)
+    finally:
+        await controller.close()
+        close_run_logs(logger, level_results, summary_path, tracer=tracer)
+        if store is not None:
+            store.record_results(level_results)
+            store.save()
+        if outcomes is not None:
+            outcomes.close()
+    return level_results
+
+@asynccontextmanager
+async def controller_factory(engine: str = "playwright", headless: bool = False, **options):
+    """
+    Yield a coroutine function that opens a new isolated async controller per call:
+    a browser context on one shared Chromium for engine "playwright" (options:
+    fast_submit, capture_network), otherwise a standalone controller from
+    controller.registry (e.g. a browserless AsyncHttpController for engine "http").
+    Closing the controllers stays with the caller; the shared browser is shut down here.
+    """
+    controller_class = registry.load_engine(engine, asynchronous=True)
+    if engine != "playwright":
+        async def new_controller():
+            return await controller_class.create(headless=headless, **options)
+        yield new_controller
+        return
+    from controller.async_playwright_controller import launch_browser
+    playwright, browser = await launch_browser(headless=headless)
+
+    async def new_context():
+        return await controller_class.create(browser=browser, **options)
+    try:
+        yield new_context
+    finally:
+        try:
+            await browser.close()
+        except Exception:
+            pass
+        await playwright.stop()
+
+@asynccontextmanager
+async def session_controllers(sessions: int, engine: str = "playwright", headless: bool = False, **options):
+    """Yield `sessions` isolated async controllers opened by controller_factory."""
+    async with controller_factory(engine, headless, **options) as new_controller:
+        yield [await new_controller() for _ in range(sessions)]
+
+async def run_sessions(sessions: int, headless: bool = False, outdir: str = "runs/session",
+                       shared_log: bool = False, global_rate: float = None, engine: str = "playwright",
+                       fast_submit: bool = True, capture_network: bool = False, **kwargs):
+    """
+    Run `sessions` independent games concurrently, each in its own browser context
+    on one shared Chromium (or over plain HTTP with engine "http"). Session i logs
+    to <outdir>/session-<i>; with `shared_log` all sessions instead log into one
+    buffered, session-tagged stream in <outdir> (each session directory then only
+    holds its run summary). global_rate caps the prompts of all sessions together at
+    that many per second (runner.pacing.TokenBucket).
+    Returns the list of per-session level results (an exception for a crashed session).
+    """
+    shared = open_run_logs(outdir, buffered=True, events_db=kwargs.get("events_db"))[0] if shared_log else None
+    if global_rate:
+        kwargs["rate_bucket"] = TokenBucket(global_rate)
+    try:
+        async with session_controllers(sessions, engine, headless, fast_submit=fast_submit,
+                                       capture_network=capture_network) as controllers:
+            runs = [run_agent(controller=ctrl, outdir=str(Path(outdir) / f"session-{i:03d}"),
+                              logger=shared.session(i) if shared else None, **kwargs)
+                    for i, ctrl in enumerate(controllers)]
+            return await asyncio.gather(*runs, return_exceptions=True)
+    finally:
+        if shared is not None:
+            shared.close()
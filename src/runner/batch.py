@@ -0,0 +1,147 @@
+"""
+Batch mode: play many independent runs, e.g. to evaluate a strategy change.
+Runs are cut into shards that worker processes play as concurrent asyncio
+sessions on one browser each (or over HTTP). Results stream back as shards
+finish, a shard whose worker process crashed is retried, and everything is
+aggregated into one batch_summary.json (eval.summary.write_batch_summary).
+Ctrl-C (or the `stop` event) stops scheduling new shards, lets the running
+ones finish and still writes the summary.
+
+    python -m runner.cli --engine=http --url http://127.0.0.1:8765 --runs 200 --concurrency 32
+"""
+import asyncio
+import os
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from eval.summary import write_batch_summary
+from runner.async_agent import run_agent, controller_factory
+from runner.pacing import TokenBucket
+
+def plan_shards(runs: int, sessions: int, shards_per_worker: int = 1) -> list:
+    """Split run ids 0..runs-1 into shards of `sessions` runs (smaller shards stream results sooner)."""
+    size = max(1, sessions // max(1, shards_per_worker))
+    return [list(range(start, min(runs, start + size))) for start in range(0, runs, size)]
+
+async def _play_shard(run_ids: list, outdir: str, engine: str, headless: bool, sessions: int,
+                      controller_options: dict, run_kwargs: dict, rate: float = None) -> list:
+    """
+    Play `run_ids` with at most `sessions` concurrent games on one browser (worker side),
+    at most `rate` prompts per second together if given.
+    """
+    slots = asyncio.Semaphore(sessions)
+    if rate:
+        run_kwargs = dict(run_kwargs, rate_bucket=TokenBucket(rate))
+    async with controller_factory(engine, headless, **controller_options) as new_controller:
+        async def play(run_id: int) -> dict:
+            run_dir = str(Path(outdir) / f"run-{run_id:04d}")
+            async with slots:
+                started = time.monotonic()
+                try:
+                    levels = await run_agent(controller=await new_controller(), outdir=run_dir, **run_kwargs)
+                    result = {"levels": levels}
+                except Exception as exc:
+                    # One failed game is a result, not a reason to retry the whole shard
+                    result = {"error": repr(exc)}
+            result.update(run=run_id, outdir=run_dir, wall_sec=round(time.monotonic() - started, 3))
+            return result
+        return await asyncio.gather(*(play(run_id) for run_id in run_ids))
+
+def _run_shard(*args) -> list:
+    """Worker process entry point."""
+    return asyncio.run(_play_shard(*args))
+
+def _ignore_sigint():
+    # The parent handles Ctrl-C and lets running shards finish
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def iter_batch(runs: int, concurrency: int = 4, workers: int = None, outdir: str = "runs/batch",
+               engine: str = "playwright", headless: bool = True, retries: int = 2, stop=None,
+               fast_submit: bool = True, capture_network: bool = False, global_rate: float = None, **run_kwargs):
+    """
+    Yield one result dict per run ({run, outdir, wall_sec} plus "levels" or "error") as
+    shards complete. `concurrency` games run at once in total, spread over `workers`
+    processes (default: one per CPU, at most one per concurrent game). A shard whose
+    worker dies is resubmitted up to `retries` times, then reported as errors.
+    Stops scheduling when `stop` (a threading.Event) is set or on KeyboardInterrupt.
+    fast_submit and capture_network configure the controllers as in run_sessions;
+    run_kwargs go to runner.async_agent.run_agent. global_rate caps the prompts of all
+    runs at that many per second; a bucket cannot span processes, so each worker gets
+    an equal share of the rate.
+    """
+    workers = max(1, min(workers or os.cpu_count() or 1, concurrency, runs))
+    sessions = max(1, concurrency // workers)
+    shards = plan_shards(runs, sessions, shards_per_worker=2 if runs > concurrency else 1)
+    controller_options = dict(fast_submit=fast_submit, capture_network=capture_network)
+    shard_args = (outdir, engine, headless, sessions, controller_options, run_kwargs,
+                  global_rate / workers if global_rate else None)
+    attempts = [0] * len(shards)
+    todo = list(range(len(shards)))
+    running = {}  # future -> shard index
+    executor = None
+    stopping = False
+    try:
+        while (todo and not stopping) or running:
+            if executor is None:
+                executor = ProcessPoolExecutor(max_workers=workers, initializer=_ignore_sigint)
+            # Keep at most one shard queued per worker so a stop takes effect quickly
+            while todo and not stopping and len(running) < 2 * workers:
+                index = todo.pop(0)
+                attempts[index] += 1
+                running[executor.submit(_run_shard, shards[index], *shard_args)] = index
+            try:
+                done, _ = wait(running, timeout=0.5, return_when=FIRST_COMPLETED)
+            except KeyboardInterrupt:
+                stopping = True
+                continue
+            if stop is not None and stop.is_set():
+                stopping = True
+            broken = False
+            for future in done:
+                index = running.pop(future)
+                try:
+                    results = future.result()
+                except Exception as exc:
+                    broken = broken or isinstance(exc, BrokenProcessPool)
+                    if attempts[index] <= retries and not stopping:
+                        todo.insert(0, index)
+                        continue
+                    results = [{"run": run_id, "outdir": str(Path(outdir) / f"run-{run_id:04d}"),
+                                "error": f"worker failed: {exc!r}"} for run_id in shards[index]]
+                yield from results
+            if broken:
+                # A dead worker breaks the whole pool: collect its other shards, then start a new one
+                wait(running)
+                for future, index in list(running.items()):
+                    del running[future]
+                    if future.exception() is None:
+                        yield from future.result()
+                    else:
+                        todo.insert(0, index)
+                executor.shutdown(wait=True)
+                executor = None
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+def run_batch(runs: int, outdir: str = "runs/batch", **kwargs) -> dict:
+    """
+    Play `runs` games with iter_batch() and write <outdir>/batch_summary.json.
+    Returns the summary (see eval.summary.batch_summary).
+    """
+    Path(outdir).mkdir(parents=True, exist_ok=True)
+    started = time.monotonic()
+    results = []
+    cancelled = False
+    try:
+        for result in iter_batch(runs, outdir=outdir, **kwargs):
+            results.append(result)
+            status = result.get("error") or f"{sum(l['success'] for l in result['levels'])} levels"
+            print(f"[{len(results)}/{runs}] run {result['run']}: {status}", flush=True)
+    except KeyboardInterrupt:
+        cancelled = True
+    cancelled = cancelled or len(results) < runs
+    return write_batch_summary(sorted(results, key=lambda r: r["run"]), Path(outdir) / "batch_summary.json",
+                               time.monotonic() - started, planned=runs, cancelled=cancelled)
@@ -3,17 +3,93 @@ Command-line interface entry for the HackMerlin agent.
 """
 import argparse
 from datetime import datetime
-from runner.agent import run_agent
+from controller import registry
+
+def positive_rate(text: str) -> float:
+    rate = float(text)
+    if rate <= 0:
+        raise argparse.ArgumentTypeError(f"must be greater than 0, got {text}")
+    return rate
 
 def main():
     parser = argparse.ArgumentParser(description="Run the HackMerlin autonomous agent.")
-    parser.add_argument("--engine", choices=["playwright", "selenium"], default="playwright",
-                        help="Browser automation engine to use (default: playwright).")
+    parser.add_argument("--engine", default="playwright",
+                        help="Browser automation engine to use: playwright, selenium, http (plays through the "
+                             "game's API without a browser) or an installed plugin engine (default: playwright).")
     parser.add_argument("--headless", action="store_true", help="Run browser in headless mode (no UI).")
     parser.add_argument("--max-attempts-per-level", type=int, default=8,
                         help="Maximum prompt attempts per level before giving up (default: 8).")
     parser.add_argument("--cooldown-sec", type=float, default=1.0,
                         help="Cooldown time in seconds between attempts (default: 1.0).")
+    parser.add_argument("--adaptive-cooldown", action="store_true",
+                        help="Adapt the cooldown to the server: grow it when replies slow down, shrink it "
+                             "towards zero while Merlin answers quickly.")
+    parser.add_argument("--global-rate", type=positive_rate, default=None,
+                        help="Cap the prompts of all sessions or runs together (--sessions, --fanout, --runs, "
+                             "--queue) at this many per second.")
+    parser.add_argument("--no-fast-submit", dest="fast_submit", action="store_false",
+                        help="Type prompts key by key instead of submitting them with one in-page script call.")
+    parser.add_argument("--capture-network", action="store_true",
+                        help="Take Merlin's replies from the game's chat API responses as soon as they complete, "
+                             "reading the page only if the API is not recognized (Playwright only).")
+    parser.add_argument("--no-verify", dest="verify", action="store_false",
+                        help="Trust the first password extracted from a reply instead of submitting the "
+                             "candidates through the game's password form until one is accepted.")
+    parser.add_argument("--reply-timeout-sec", type=float, default=15.0,
+                        help="Maximum time to wait for Merlin to answer a prompt (default: 15.0).")
+    parser.add_argument("--intro-timeout-sec", type=float, default=5.0,
+                        help="Maximum time to wait for a level introduction message (default: 5.0).")
+    parser.add_argument("--settle-sec", type=float, default=0.3,
+                        help="Quiet window after which a streaming reply counts as complete (default: 0.3).")
+    parser.add_argument("--sessions", type=int, default=1,
+                        help="Number of concurrent game sessions sharing one browser via asyncio "
+                             "(Playwright only; default: 1).")
+    parser.add_argument("--fanout", type=int, default=0,
+                        help="Try each level's strategies in parallel across this many isolated sessions; "
+                             "the first accepted password wins (Playwright only; default: off).")
+    parser.add_argument("--fanout-concurrency", type=int, default=4,
+                        help="Maximum sessions prompting at the same time in --fanout mode (default: 4).")
+    parser.add_argument("--session-min-interval-sec", type=float, default=1.0,
+                        help="Minimum time between two prompts of one session in --fanout mode (default: 1.0).")
+    parser.add_argument("--runs", type=int, default=0,
+                        help="Batch mode: play this many independent games across worker processes and write "
+                             "one aggregated batch_summary.json (asyncio engines only; default: off).")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="Games played at the same time in --runs mode, over all workers (default: 4).")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes in --runs mode (default: one per CPU, at most --concurrency).")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip levels solved by earlier runs by submitting their stored password; "
+                             "falls back to strategy search if the game rejects it.")
+    parser.add_argument("--solutions", type=str, default="runs/solutions.json",
+                        help="Level password store updated after every run (default: runs/solutions.json). "
+                             "Seed it from old runs with: python -m eval.solutions runs/")
+    parser.add_argument("--policy", choices=["ordered", "ucb"], default="ordered",
+                        help="Strategy order: catalog order, or ranked by historical round-trips-to-success "
+                             "per level (UCB over --outcomes; default: ordered).")
+    parser.add_argument("--prompt-pack", type=str, default=None,
+                        help="Try the ranked prompts of this pack (from python -m eval.prompt_search) "
+                             "before the catalog on their levels.")
+    parser.add_argument("--outcomes", type=str, default="runs/outcomes.sqlite",
+                        help="SQLite history of every strategy attempt (default: runs/outcomes.sqlite).")
+    parser.add_argument("--queue", type=str, default=None,
+                        help="Long-running mode: drain run specs (JSON lines, '-' for stdin) against a pool "
+                             "of warm browsers instead of playing a single run.")
+    parser.add_argument("--pool-size", type=int, default=1,
+                        help="Runs played at once in --queue mode, each on its own warm browser (default: 1).")
+    parser.add_argument("--pool-max-uses", type=int, default=20,
+                        help="Runs served by one pooled browser before it is relaunched (default: 20).")
+    parser.add_argument("--pool-max-age-sec", type=float, default=1800.0,
+                        help="Maximum lifetime of a pooled browser in seconds (default: 1800).")
+    parser.add_argument("--url", type=str, default="https://hackmerlin.io",
+                        help="Game URL (e.g. a local stand-in from python -m eval.mock_merlin).")
+    parser.add_argument("--buffered-logs", action="store_true",
+                        help="Write logs in batches from a background thread instead of flushing every message.")
+    parser.add_argument("--shared-log", action="store_true",
+                        help="With --sessions, log all sessions into one session-tagged stream in --outdir.")
+    parser.add_argument("--events-db", type=str, default=None,
+                        help="Also record events and results in this SQLite event store "
+                             "(query it with python -m eval.event_store).")
     parser.add_argument("--outdir", type=str, default=None,
                         help="Directory to save run logs (transcript and summary). Default is runs/<timestamp>.")
     args = parser.parse_args()
@@ -23,10 +99,101 @@ def main():
     else:
         ts = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
         outdir = f"runs/{ts}"
-    run_agent(engine=args.engine, headless=args.headless,
-              max_attempts_per_level=args.max_attempts_per_level,
-              cooldown=args.cooldown_sec,
-              outdir=outdir)
+    # Options shared by every run mode
+    run_options = dict(max_attempts_per_level=args.max_attempts_per_level,
+                       cooldown=args.cooldown_sec,
+                       reply_timeout=args.reply_timeout_sec,
+                       intro_timeout=args.intro_timeout_sec,
+                       settle_sec=args.settle_sec,
+                       solutions_path=args.solutions,
+                       resume=args.resume,
+                       outcomes_path=args.outcomes,
+                       policy_mode=args.policy,
+                       adaptive_cooldown=args.adaptive_cooldown,
+                       fast_submit=args.fast_submit,
+                       capture_network=args.capture_network,
+                       verify=args.verify,
+                       url=args.url,
+                       buffered_logs=args.buffered_logs,
+                       events_db=args.events_db)
+    if not registry.has_engine(args.engine):
+        parser.error(f"unknown --engine '{args.engine}' (available: {', '.join(registry.engine_names())})")
+    if args.capture_network and args.engine != "playwright":
+        parser.error("--capture-network requires --engine=playwright")
+    # A misconfigured planner is reported now, not in the middle of a level
+    from strategies import planner, registry as strategy_registry
+    if strategy_registry.get_index().get("llm_planner") is not None:
+        try:
+            planner.check_config()
+        except ValueError as exc:
+            parser.error(f"USE_LLM_PLANNER: {exc}")
+    if args.prompt_pack:
+        from strategies.pack import register_pack
+        register_pack(args.prompt_pack)
+    # Runners are imported only for the selected mode; engines only when a run starts
+    if args.queue:
+        from runner.serve import serve
+        queue_options = run_options
+        if args.pool_size > 1:
+            if args.resume:
+                parser.error("--resume is not supported with --pool-size > 1 (runs would race on the solutions file)")
+            queue_options = {k: v for k, v in run_options.items() if k not in ("solutions_path", "resume")}
+        serve(args.queue, engine=args.engine, headless=args.headless,
+              pool_size=args.pool_size, max_uses=args.pool_max_uses, max_age_sec=args.pool_max_age_sec,
+              outdir=outdir, global_rate=args.global_rate, **queue_options)
+        return
+    if args.fanout:
+        if not registry.has_engine(args.engine, asynchronous=True):
+            parser.error(f"--fanout needs an asyncio engine ({', '.join(registry.engine_names(asynchronous=True))})")
+        if args.resume:
+            parser.error("--resume is not supported with --fanout (fan-out does not replay stored passwords)")
+        import asyncio
+        from runner.fanout import run_fanout_sessions
+        asyncio.run(run_fanout_sessions(args.fanout, headless=args.headless,
+                                        max_concurrency=args.fanout_concurrency,
+                                        min_interval=args.session_min_interval_sec,
+                                        outdir=outdir,
+                                        reply_timeout=args.reply_timeout_sec,
+                                        intro_timeout=args.intro_timeout_sec,
+                                        settle_sec=args.settle_sec,
+                                        url=args.url,
+                                        buffered_logs=args.buffered_logs,
+                                        events_db=args.events_db,
+                                        global_rate=args.global_rate,
+                                        engine=args.engine,
+                                        fast_submit=args.fast_submit,
+                                        capture_network=args.capture_network,
+                                        max_attempts_per_level=args.max_attempts_per_level,
+                                        verify=args.verify,
+                                        outcomes_path=args.outcomes,
+                                        policy_mode=args.policy))
+        return
+    if args.runs:
+        if not registry.has_engine(args.engine, asynchronous=True):
+            parser.error(f"--runs needs an asyncio engine ({', '.join(registry.engine_names(asynchronous=True))})")
+        from runner.batch import run_batch
+        # Concurrent runs would race on the solutions file, and resuming defeats an evaluation
+        batch_options = {k: v for k, v in run_options.items() if k not in ("solutions_path", "resume")}
+        run_batch(args.runs, concurrency=args.concurrency, workers=args.workers, outdir=outdir,
+                  engine=args.engine, headless=args.headless, global_rate=args.global_rate, **batch_options)
+        return
+    if args.sessions > 1:
+        if not registry.has_engine(args.engine, asynchronous=True):
+            parser.error(f"--sessions > 1 needs an asyncio engine ({', '.join(registry.engine_names(asynchronous=True))})")
+        if args.resume:
+            parser.error("--resume is not supported with --sessions > 1 (sessions would race on the solutions file)")
+        import asyncio
+        from runner.async_agent import run_sessions
+        # Concurrent sessions would race on the solutions file (as in --runs mode)
+        session_options = {k: v for k, v in run_options.items() if k not in ("solutions_path", "resume")}
+        asyncio.run(run_sessions(args.sessions, headless=args.headless, outdir=outdir,
+                                 shared_log=args.shared_log, global_rate=args.global_rate, engine=args.engine,
+                                 **session_options))
+        return
+    from runner.agent import run_agent
+    from runner.pacing import TokenBucket
+    run_agent(engine=args.engine, headless=args.headless, outdir=outdir,
+              rate_bucket=TokenBucket(args.global_rate) if args.global_rate else None, **run_options)
 
 if __name__ == "__main__":
     main()
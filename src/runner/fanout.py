@@ -0,0 +1,256 @@
+"""
+Parallel strategy fan-out: for one level, send the applicable strategies at the
+same time to several isolated game sessions that have all reached that level.
+The first password the game accepts wins and the remaining attempts are cancelled,
+so a level costs about one round-trip instead of one per strategy. If none of them
+works, the sessions rebuild the password from partial reveals, each asking for
+different letter positions at once (fan_out_letters).
+"""
+import asyncio
+import time
+from controller.base import REPLY_QUIET_SEC
+from brain.state import State
+from brain import policy
+from brain.partial import plan_spans, span_prompt
+from eval import trace
+from runner.pacing import TokenBucket
+from eval.outcomes import OutcomeStore
+from runner.async_agent import session_controllers, verify_candidates
+from runner.loop import GAME_URL, MAX_LEVEL, open_run_logs, close_run_logs, record_reply, merge_letters, level_result
+
+# Multi-turn strategies are not one-shots; letter-by-letter runs as its own phase (fan_out_letters).
+SEQUENTIAL_STRATEGIES = ("letter_by_letter",)
+# Rounds of parallel letter requests before fan_out_letters gives up
+MAX_LETTER_ROUNDS = 6
+
+class RateLimiter:
+    """Spaces out the prompts of one session by at least `min_interval` seconds."""
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._next_at = 0.0
+
+    async def wait(self):
+        now = time.monotonic()
+        delay = self._next_at - now
+        self._next_at = max(now, self._next_at) + self.min_interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+async def _ask(index: int, controller, limiter: RateLimiter, prompt: str, level: int, strategy: str,
+               logger, reply_timeout: float, settle_sec: float, bucket: TokenBucket = None):
+    """Send one paced prompt on a session; returns (reply, timing), or None if no reply came."""
+    tracer = controller.tracer
+    span_args = {"session": index, "level": level, "strategy": strategy}
+    with tracer.span(trace.COOLDOWN, **span_args):
+        await limiter.wait()
+        if bucket is not None:
+            await bucket.acquire_async()
+    logger.log("Agent", prompt, level=level, strategy=strategy, extra={"session": index})
+    with tracer.span(trace.SEND, **span_args):
+        await controller.send_text(prompt)
+    try:
+        timing = await controller.wait_for_settled_reply(timeout=reply_timeout, quiet=settle_sec)
+    except Exception:
+        return None
+    with tracer.span(trace.READ_REPLY, **span_args):
+        return await controller.get_latest_bot_text(), timing
+
+async def fan_out_level(sessions: list, state: State, logger, max_concurrency: int = 4,
+                        reply_timeout: float = 15.0, settle_sec: float = REPLY_QUIET_SEC,
+                        submit_timeout: float = 5.0, bucket: TokenBucket = None, max_attempts: int = None,
+                        verify: bool = True, outcomes=None, stats: dict = None):
+    """
+    Try every applicable one-shot strategy for `state.level` concurrently.
+    sessions: list of (controller, RateLimiter) pairs, all at `state.level`.
+    bucket: optional TokenBucket every prompt must also get a token from.
+    At most `max_concurrency` sessions are used. The candidates a reply proposes are
+    submitted on the session that produced it (trusted unverified without `verify`);
+    the first accepted one wins. With `stats` (eval.outcomes level stats) the strategies
+    are queued by brain.policy.rank_strategies, and only the first `max_attempts` are sent.
+    Attempts are recorded in the eval.outcomes.OutcomeStore `outcomes` if given.
+    Returns (password, strategy_name, winning_session_index) or None.
+    """
+    strategies = policy.applicable_strategies(state, state.last_merlin_msg, exclude=SEQUENTIAL_STRATEGIES)
+    if stats is not None:
+        strategies = policy.rank_strategies(strategies, stats)
+    strategies = strategies[:max_attempts]
+    queue = asyncio.Queue()
+    for strat in strategies:
+        queue.put_nowait(strat)
+    won = asyncio.get_running_loop().create_future()
+
+    async def worker(index: int, controller, limiter: RateLimiter):
+        session_state = State(level=state.level, last_merlin_msg=state.last_merlin_msg)
+        tracer = controller.tracer
+        while not queue.empty():
+            queued = queue.get_nowait()
+            strat, prompt = await queued.resolve_async(session_state)
+            if strat is not queued:
+                # A hand-over (e.g. the planner falling back to the catalog) duplicates a strategy
+                # that is already part of this fan-out
+                state.tried_strategies.add(queued.name)
+                continue
+            span_args = {"session": index, "level": state.level, "strategy": strat.name}
+            answer = await _ask(index, controller, limiter, prompt, state.level,
+                                strat.name, logger, reply_timeout, settle_sec, bucket)
+            if answer is None:
+                continue
+            reply, timing = answer
+            with tracer.span(trace.EXTRACT, **span_args):
+                candidate = record_reply(session_state, strat, reply, timing, logger, extra={"session": index},
+                                         outcomes=outcomes)
+            state.tried_strategies.add(strat.name)
+            password = ""
+            if candidate:
+                password = await verify_candidates(controller, session_state, logger, tracer, outcomes, verify,
+                                                   extra={"session": index}, submit_timeout=submit_timeout)
+            if password:
+                if not won.done():
+                    won.set_result((password, strat.name, index))
+                return
+
+    workers = [asyncio.ensure_future(worker(i, ctrl, limiter))
+               for i, (ctrl, limiter) in enumerate(sessions[:max_concurrency])]
+    all_done = asyncio.ensure_future(asyncio.gather(*workers, return_exceptions=True))
+    try:
+        await asyncio.wait([won, all_done], return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        # Cancel the attempts still in flight once a winner is known
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+    return won.result() if won.done() else None
+
+async def fan_out_letters(sessions: list, state: State, logger, max_concurrency: int = 4,
+                          reply_timeout: float = 15.0, settle_sec: float = REPLY_QUIET_SEC,
+                          submit_timeout: float = 5.0, bucket: TokenBucket = None, max_rounds: int = None,
+                          verify: bool = True, outcomes=None):
+    """
+    Rebuild the password from partial reveals: in every round each session asks for a
+    different span of the letters still missing (brain.partial.plan_spans), and all
+    fragments are merged into state.partial. Stops when a round teaches nothing new,
+    or after `max_rounds` (default MAX_LETTER_ROUNDS). The complete password is verified
+    on the first session (verify, outcomes: see fan_out_level).
+    Returns (password, "letter_by_letter", 0) or None, like fan_out_level.
+    """
+    strat = next((s for s in policy.applicable_strategies(state, state.last_merlin_msg)
+                  if s.name == "letter_by_letter"), None)
+    if strat is None:
+        return None
+    active = sessions[:max_concurrency]
+    for _ in range(min(MAX_LETTER_ROUNDS, max_rounds or MAX_LETTER_ROUNDS)):
+        spans = plan_spans(state.partial, sessions=len(active))
+        # Only one session needs to ask for the length
+        asks = [_ask(i, ctrl, limiter, span_prompt(positions, ask_length=state.partial.length is None and i == 0),
+                     state.level, strat.name, logger, reply_timeout, settle_sec, bucket)
+                for i, ((ctrl, limiter), positions) in enumerate(zip(active, spans))]
+        answers = await asyncio.gather(*asks, return_exceptions=True)
+        progress, password = False, ""
+        for i, (positions, answer) in enumerate(zip(spans, answers)):
+            if answer is None or isinstance(answer, BaseException):
+                continue
+            reply, timing = answer
+            logger.log("Merlin", reply, level=state.level, extra={"session": i, "ttc": round(timing.complete_sec, 3)})
+            with active[i][0].tracer.span(trace.EXTRACT, session=i, level=state.level, strategy=strat.name):
+                found = merge_letters(state, positions, reply, logger, extra={"session": i})
+            progress = progress or found is not None
+            password = found or password
+        state.tried_strategies.add(strat.name)
+        if password:
+            controller = active[0][0]
+            password = await verify_candidates(controller, state, logger, controller.tracer, outcomes, verify,
+                                               extra={"session": 0}, submit_timeout=submit_timeout)
+            if password:
+                return password, strat.name, 0
+            # A letter was wrong and has been forgotten (settle_candidate); ask for it again
+            continue
+        if not progress:
+            break
+    return None
+
+async def run_fanout(controllers: list, max_concurrency: int = 4, min_interval: float = 1.0,
+                     outdir: str = "runs/session", reply_timeout: float = 15.0,
+                     intro_timeout: float = 5.0, settle_sec: float = REPLY_QUIET_SEC, url: str = GAME_URL,
+                     buffered_logs: bool = False, events_db: str = None, global_rate: float = None,
+                     max_attempts_per_level: int = None, verify: bool = True, outcomes_path: str = None,
+                     policy_mode: str = "ordered"):
+    """
+    Play a full game with every level fanned out over `controllers` (isolated sessions).
+    After a level is won, the password is submitted on the other sessions so all of
+    them reach the next level; sessions that fail to advance are dropped.
+    max_attempts_per_level caps the strategies fanned out (and letter rounds) per level;
+    verify, outcomes_path and policy_mode work as in runner.agent.run_agent.
+    Returns the per-level results. Controllers are closed when the run ends.
+    buffered_logs, events_db and phase tracing work as in runner.agent.run_agent
+    (spans are filed under the session that produced them). global_rate caps the prompts
+    of all sessions together at that many per second.
+    """
+    logger, summary_path = open_run_logs(outdir, buffered=buffered_logs, events_db=events_db)
+    tracer = trace.Tracer()
+    for i, ctrl in enumerate(controllers):
+        ctrl.tracer, ctrl.trace_session = tracer, i
+    sessions = [(ctrl, RateLimiter(min_interval)) for ctrl in controllers]
+    bucket = TokenBucket(global_rate) if global_rate else None
+    outcomes = OutcomeStore(outcomes_path, run=str(outdir)) if outcomes_path else None
+    level_results = []
+    try:
+        with tracer.span(trace.OPEN_PAGE):
+            await asyncio.gather(*(ctrl.open_page(url) for ctrl in controllers))
+        for level in range(1, MAX_LEVEL + 1):
+            ctrl = sessions[0][0]
+            try:
+                await ctrl.wait_for_settled_reply(timeout=intro_timeout, quiet=settle_sec, since=0 if level == 1 else None)
+            except Exception:
+                pass
+            intro_msg = await ctrl.get_latest_bot_text()
+            if intro_msg:
+                logger.log("Merlin", intro_msg, level=level)
+            state = State(level=level, last_merlin_msg=intro_msg or "")
+            stats = outcomes.level_stats(level) if (outcomes and policy_mode == "ucb") else None
+            result = await fan_out_level(sessions, state, logger, max_concurrency=max_concurrency,
+                                         reply_timeout=reply_timeout, settle_sec=settle_sec, bucket=bucket,
+                                         max_attempts=max_attempts_per_level, verify=verify, outcomes=outcomes,
+                                         stats=stats)
+            if result is None:
+                result = await fan_out_letters(sessions, state, logger, max_concurrency=max_concurrency,
+                                               reply_timeout=reply_timeout, settle_sec=settle_sec, bucket=bucket,
+                                               max_rounds=max_attempts_per_level, verify=verify, outcomes=outcomes)
+            if result is None:
+                level_results.append(level_result(level, "", sorted(state.tried_strategies)))
+                logger.log("INFO", f"Level {level} FAILED after fan-out of {len(state.tried_strategies)} strategies.", level=level)
+                break
+            password, strat_name, winner = result
+            level_results.append(level_result(level, password, sorted(state.tried_strategies)))
+            logger.log("INFO", f"Level {level} confirmed by '{strat_name}' on session {winner}.", level=level)
+            if level == MAX_LEVEL:
+                break
+            # Bring the other sessions to the next level with the confirmed password
+            others = [s for i, s in enumerate(sessions) if i != winner]
+            accepted = await asyncio.gather(*(_advance(c, level, password) for c, _ in others),
+                                            return_exceptions=True)
+            sessions = [sessions[winner]] + [s for s, ok in zip(others, accepted) if ok is True]
+    finally:
+        await asyncio.gather(*(ctrl.close() for ctrl in controllers), return_exceptions=True)
+        close_run_logs(logger, level_results, summary_path, tracer=tracer)
+        if outcomes is not None:
+            outcomes.close()
+    return level_results
+
+async def _advance(controller, level: int, password: str) -> bool:
+    """
+    Bring a session past `level` with the confirmed password. A worker cancelled in the
+    middle of its own submit may already have advanced it, so the level is checked first.
+    """
+    try:
+        if (await controller.current_level() or 0) > level:
+            return True
+    except NotImplementedError:
+        pass
+    return await controller.submit_password(password)
+
+async def run_fanout_sessions(sessions: int, headless: bool = False, engine: str = "playwright",
+                              fast_submit: bool = True, capture_network: bool = False, **kwargs):
+    """Open `sessions` isolated sessions (runner.async_agent.session_controllers) and play a fanned-out game on them."""
+    async with session_controllers(sessions, engine, headless, fast_submit=fast_submit,
+                                   capture_network=capture_network) as controllers:
+        return await run_fanout(controllers, **kwargs)
@@ -0,0 +1,176 @@
+"""
+Engine-agnostic pieces of the agent loop, shared by the sync (runner.agent)
+and asyncio (runner.async_agent) runners. Nothing here touches the browser.
+"""
+from pathlib import Path
+from brain.state import State
+from brain import extract
+from brain.partial import parse_fragment
+from eval.logger import RunLogger, BufferedRunLogger, TeeLogger
+from eval.event_store import EventStore, EventSink
+from eval.summary import write_run_summary
+from eval import outcomes as outcome
+
+GAME_URL = "https://hackmerlin.io"
+MAX_LEVEL = 7
+
+def open_run_logs(outdir: str, buffered: bool = False, logger=None, events_db: str = None):
+    """
+    Create the output directory and return (logger, summary_path) for a run.
+    buffered: log through an eval.logger.BufferedRunLogger (background writer thread).
+    logger: log into this existing logger instead, e.g. a session of a shared
+    stream (eval.logger.RunLogger.session); the run then writes no logs of its own.
+    events_db: also record the run's events in this eval.event_store SQLite file.
+    """
+    Path(outdir).mkdir(parents=True, exist_ok=True)
+    summary_path = Path(outdir) / "run_summary.json"
+    if logger is not None:
+        return logger, summary_path
+    transcript_path = Path(outdir) / "transcript.txt"
+    jsonl_path = Path(outdir) / "events.jsonl"
+    logger_class = BufferedRunLogger if buffered else RunLogger
+    logger = logger_class(transcript_path, jsonl_path)
+    if events_db:
+        logger = TeeLogger(logger, EventSink(EventStore(events_db), str(outdir), owns_store=True))
+    return logger, summary_path
+
+def close_run_logs(logger, level_results: list, summary_path, tracer=None):
+    """
+    Close the run's logs and write its summary (also into the event store, if it logs
+    to one). With an eval.trace.Tracer, the summary gets per-phase latency stats and
+    the spans are written as a Chrome trace to trace.json next to it.
+    """
+    if hasattr(logger, "record_results"):
+        logger.record_results(level_results)
+    logger.close()
+    phases = None
+    if tracer is not None:
+        phases = tracer.phase_stats()
+        tracer.write(Path(summary_path).parent / "trace.json")
+    write_run_summary(level_results, summary_path, phases=phases)
+
+def record_reply(state: State, strat, merlin_reply: str, timing, logger: RunLogger, extra: dict = None,
+                 outcomes=None) -> str:
+    """
+    Fold Merlin's reply to `strat` into the level state: log it, queue the password
+    candidates it contains (state.candidates, verified later by submitting them) and
+    merge the letters revealed to the letter-by-letter strategy. `extra` tags the logged reply
+    (e.g. with the session it came from); the attempt is also appended to the
+    eval.outcomes.OutcomeStore `outcomes` if given.
+    Returns the best new candidate, or an empty string if the reply proposed none.
+    """
+    level = state.level
+    state.last_merlin_msg = merlin_reply or ""
+    if merlin_reply:
+        fields = {"ttft": round(timing.first_token_sec, 3), "ttc": round(timing.complete_sec, 3)}
+        fields.update(extra or {})
+        logger.log("Merlin", merlin_reply, level=level, extra=fields)
+    if strat.name == "letter_by_letter":
+        password = _record_letters(state, strat, merlin_reply, timing, logger, outcomes)
+        if password is not None:
+            return password
+    # Check if the reply contains the password (candidates the game already rejected do not count)
+    candidates = [c for c in extract.extract_candidates(merlin_reply) if c.password not in state.candidates.rejected]
+    if candidates:
+        best = candidates[0]
+        state.candidates.add(candidates, strategy=strat.name)
+        logger.log("INFO", f"Level {level} candidate: {best.password}", level=level,
+                   extra={"detector": best.detector, "confidence": best.confidence, "queued": len(state.candidates)})
+        state.tried_strategies.add(strat.name)
+        _record_outcome(outcomes, level, strat, outcome.CANDIDATE, timing)
+        return best.password
+    if strat.name == "letter_by_letter":
+        # Merlin refused the letters and leaked nothing else
+        logger.log("INFO", f"Letter-by-letter halted with partial = '{state.partial.pattern()}'", level=level)
+    # Mark strategy as tried
+    state.tried_strategies.add(strat.name)
+    _record_outcome(outcomes, level, strat, outcome.FAIL, timing)
+    return ""
+
+def gives_nothing_away(state: State, strat, merlin_reply: str) -> bool:
+    """True if `merlin_reply` proposes no password candidate (nor letters, for letter_by_letter)."""
+    if extract.extract_candidates(merlin_reply):
+        return False
+    return not (strat.name == "letter_by_letter" and parse_fragment(merlin_reply, strat.positions(state)))
+
+def merge_letters(state: State, positions: list, merlin_reply: str, logger, extra: dict = None,
+                  strategy: str = "letter_by_letter") -> str:
+    """
+    Merge the letters `merlin_reply` reveals for `positions` into state.partial.
+    Returns the password once every position is known (it is queued as a candidate),
+    None if the reply revealed nothing new, otherwise ''.
+    """
+    fragment = parse_fragment(merlin_reply, positions)
+    if not fragment or not state.partial.merge(fragment):
+        return None
+    state.partial_password = state.partial.prefix()
+    password = state.partial.candidate()
+    if password:
+        confidence = round(state.partial.min_confidence(), 3)
+        state.candidates.add([extract.Candidate(password, confidence, "letters")], strategy=strategy)
+        fields = {"detector": "letters", "confidence": confidence}
+        fields.update(extra or {})
+        logger.log("INFO", f"Level {state.level} candidate: {password}", level=state.level, extra=fields)
+    else:
+        logger.log("INFO", f"Letters so far: {state.partial.pattern()}", level=state.level, extra=extra)
+    return password
+
+def _record_letters(state: State, strat, merlin_reply: str, timing, logger, outcomes) -> str:
+    # Letter-by-letter keeps going (the strategy is not marked tried) until the password is complete
+    password = merge_letters(state, strat.positions(state), merlin_reply, logger, strategy=strat.name)
+    if password is None:
+        return None
+    if password:
+        state.tried_strategies.add(strat.name)
+        _record_outcome(outcomes, state.level, strat, outcome.CANDIDATE, timing)
+    else:
+        _record_outcome(outcomes, state.level, strat, outcome.PARTIAL, timing)
+    return password
+
+def settle_candidate(state: State, entry, accepted, logger, outcomes=None, extra: dict = None) -> bool:
+    """
+    Book the game's verdict on a queued candidate (brain.candidates.QueuedCandidate):
+    True (accepted), False (rejected) or None (not verified, because verification is
+    off or the controller cannot submit passwords). Returns True if the level is passed.
+    The verdict is what counts as the queuing strategy's success in the outcome history.
+    """
+    fields = {"detector": entry.detector, "confidence": entry.confidence, "verified": accepted is not None}
+    fields.update(extra or {})
+    if outcomes is not None and entry.strategy:
+        verdict = outcome.REJECTED if accepted is False else outcome.SUCCESS
+        outcomes.record(state.level, entry.strategy, verdict, round_trips=0)
+    if accepted is not False:
+        logger.log("INFO", f"Level {state.level} PASSED. Password: {entry.password}", level=state.level, extra=fields)
+        return True
+    state.candidates.reject(entry.password)
+    logger.log("INFO", f"Password '{entry.password}' rejected", level=state.level, extra=fields)
+    if entry.detector == "letters":
+        # One of the letters is wrong: ask for the least certain one again
+        state.partial.doubt()
+        state.partial_password = state.partial.prefix()
+        state.tried_strategies.discard(entry.strategy)
+    return False
+
+def _record_outcome(outcomes, level: int, strat, result: str, timing):
+    if outcomes is not None:
+        outcomes.record(level, strat.name, result, latency=timing.complete_sec if timing else None)
+
+def record_timeout(state: State, strat, outcomes=None):
+    """Note that `strat` got no reply at all (counts as a failed attempt in the history)."""
+    state.last_merlin_msg = ""
+    _record_outcome(outcomes, state.level, strat, outcome.TIMEOUT, None)
+
+def level_result(level: int, password: str, strategies: list) -> dict:
+    """
+    Summary entry for one level (see eval.summary.write_run_summary) from the strategy of
+    each turn. A strategy that took several turns (letter spans) is listed once, at its
+    last turn, so the winning strategy stays last; round_trips counts every turn.
+    """
+    success = bool(password)
+    return {
+        "level": level,
+        "success": success,
+        "password": password if success else None,
+        "strategies": list(reversed(dict.fromkeys(reversed(strategies)))),
+        "round_trips": len(strategies)
+    }
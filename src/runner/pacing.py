@@ -0,0 +1,133 @@
+"""
+Pacing between attempts: back off when Merlin rate-limits or errors, and
+adapt the cooldown to how responsive the game is.
+
+Pacer keeps an AIMD-style delay per session: a rate-limit or error reply
+doubles it (exponential backoff with jitter), a reply that is slower than the
+recent trend adds a fixed step, and a normal reply takes a step off, down to
+zero. A TokenBucket shared by several sessions caps their combined prompt rate.
+"""
+import asyncio
+import random
+import re
+import threading
+import time
+from collections import deque
+
+# Replies that mean the server is throttling us or failed, rather than Merlin refusing.
+# Kept specific: Merlin himself may tell you to "wait" or "slow down", and numbers alone
+# are no status codes.
+THROTTLE_RE = re.compile(
+    r"too many (?:requests|messages)|rate.?limit|(?:sending|sent) (?:messages|requests) too (?:fast|quickly)"
+    r"|try again (?:later|in (?:a|\d+) )|something went wrong|an error (?:has )?occurred|server error"
+    r"|service unavailable|bad gateway|(?:error|http|status)\W{0,3}(?:code\W{0,3})?(?:429|502|503)\b",
+    re.IGNORECASE)
+# Consecutive throttled replies that do not use up one of the level's attempts; past
+# this the server is treated as down and each one counts, so a run cannot spin forever
+MAX_FREE_THROTTLES = 5
+
+# Extra submits of a password the game could not judge (controller.base.PasswordCheckUnavailable),
+# after SUBMIT_BACKOFF_SEC, then twice that, ...
+SUBMIT_RETRIES = 2
+SUBMIT_BACKOFF_SEC = 1.0
+
+def is_throttled(reply: str) -> bool:
+    """True if `reply` looks like a rate-limit or error message instead of an answer."""
+    return bool(reply) and THROTTLE_RE.search(reply) is not None
+
+class TokenBucket:
+    """
+    Global prompt budget: `rate` prompts per second with bursts of up to `burst`.
+    Thread-safe, so sessions in several threads or one event loop can share it.
+    """
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take one token and return how long the caller must wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+class Pacer:
+    """
+    Delay between one session's attempts.
+    cooldown: starting delay. With `adaptive` off the delay stays at `cooldown`
+    except while backing off from throttled replies.
+    bucket: optional TokenBucket shared with other sessions, consulted before each send.
+    """
+    def __init__(self, cooldown: float = 1.0, adaptive: bool = False, bucket: TokenBucket = None,
+                 step: float = 0.25, backoff_base: float = 2.0, max_delay: float = 60.0,
+                 slow_factor: float = 1.5, window: int = 5, rng: random.Random = None):
+        self.cooldown = cooldown
+        self.adaptive = adaptive
+        self.bucket = bucket
+        self.step = step
+        self.backoff_base = backoff_base
+        self.max_delay = max_delay
+        self.slow_factor = slow_factor
+        self.delay = cooldown
+        self.failures = 0  # consecutive throttled replies
+        self.latencies = deque(maxlen=window)
+        self.rng = rng or random.Random()
+
+    def observe(self, reply: str, latency: float = None) -> bool:
+        """
+        Update the delay from one reply and its time-to-complete.
+        Returns True if the reply was throttled (the attempt should not count).
+        """
+        if is_throttled(reply):
+            self.failures += 1
+            # Exponential backoff: base * 2^(n-1), with "equal jitter" to spread sessions out
+            backoff = min(self.max_delay, self.backoff_base * 2 ** (self.failures - 1))
+            self.delay = max(self.delay, backoff / 2 + self.rng.uniform(0, backoff / 2))
+            return True
+        self.failures = 0
+        if not self.adaptive:
+            self.delay = self.cooldown
+            return False
+        trend = sum(self.latencies) / len(self.latencies) if self.latencies else None
+        if latency is not None:
+            self.latencies.append(latency)
+        if trend is not None and latency is not None and latency > self.slow_factor * trend:
+            self.delay = min(self.max_delay, self.delay + self.step)  # additive increase
+        else:
+            self.delay = max(0.0, self.delay / 2 if self.delay > self.cooldown else self.delay - self.step)
+        return False
+
+    def wait(self):
+        """Sleep for the current delay (between attempts)."""
+        if self.delay > 0:
+            time.sleep(self.delay)
+
+    async def wait_async(self):
+        if self.delay > 0:
+            await asyncio.sleep(self.delay)
+
+    def before_send(self):
+        """Block until the shared budget allows another prompt."""
+        if self.bucket is not None:
+            self.bucket.acquire()
+
+    async def before_send_async(self):
+        if self.bucket is not None:
+            await self.bucket.acquire_async()
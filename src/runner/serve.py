@@ -0,0 +1,105 @@
+"""
+Long-running mode: drain a queue of runs against a pool of warm controllers.
+Each queue entry is one JSON object per line with run_agent keyword overrides,
+e.g. {"outdir": "runs/sweep/0001", "max_attempts_per_level": 4}.
+"""
+import json
+import sys
+import threading
+from pathlib import Path
+from controller.pool import ControllerPool
+from runner.agent import run_agent, make_controller
+from runner.loop import GAME_URL
+from runner.pacing import TokenBucket
+
+# Keys a queue entry may override; anything else is rejected.
+RUN_OPTIONS = {"max_attempts_per_level", "cooldown", "outdir", "reply_timeout", "intro_timeout", "settle_sec"}
+
+def read_queue(stream):
+    """Yield run specs from a JSONL stream, skipping blank lines and '#' comments."""
+    for line in stream:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        spec = json.loads(line)
+        unknown = set(spec) - RUN_OPTIONS
+        if unknown:
+            raise ValueError(f"Unknown run options in queue entry: {sorted(unknown)}")
+        yield spec
+
+def drain_queue(specs, pool: ControllerPool, outdir: str, workers: int = None, **defaults) -> int:
+    """
+    Run every spec with a controller checked out of `pool`, `workers` (default: the pool
+    size) at a time, each worker thread on its own warm controller. Runs without an
+    explicit outdir log to <outdir>/run-NNNN. Returns the number of runs processed.
+    """
+    numbered = enumerate(specs, start=1)
+    lock = threading.Lock()
+    taken = []  # run numbers handed out
+    errors = []  # a bad queue entry stops the queue
+
+    def next_spec():
+        with lock:
+            if errors:
+                return None
+            try:
+                item = next(numbered, None)
+            except Exception as exc:
+                errors.append(exc)
+                return None
+            if item is not None:
+                taken.append(item[0])
+            return item
+
+    def work():
+        try:
+            pool.warm(1)
+            while True:
+                item = next_spec()
+                if item is None:
+                    return
+                number, spec = item
+                kwargs = dict(defaults)
+                kwargs["outdir"] = str(Path(outdir) / f"run-{number:04d}")
+                kwargs.update(spec)
+                try:
+                    with pool.checkout() as controller:
+                        run_agent(controller=controller, **kwargs)
+                except Exception as exc:
+                    # One broken run must not stop the queue; its controller was not reused
+                    print(f"Run {number} failed: {exc}", file=sys.stderr)
+        finally:
+            pool.close_idle()
+
+    workers = max(1, workers or pool.size)
+    if workers == 1:
+        work()
+    else:
+        threads = [threading.Thread(target=work, name=f"serve-{i}") for i in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    if errors:
+        raise errors[0]
+    return len(taken)
+
+def serve(queue_path: str, engine: str = "playwright", headless: bool = False, pool_size: int = 1,
+          max_uses: int = 20, max_age_sec: float = 1800.0, outdir: str = "runs/session", url: str = GAME_URL,
+          fast_submit: bool = True, capture_network: bool = False, global_rate: float = None,
+          **defaults) -> int:
+    """
+    Drain `queue_path` ('-' for stdin, read until EOF) against a warm controller pool,
+    `pool_size` runs at a time, at most `global_rate` prompts per second together if given.
+    """
+    if global_rate:
+        defaults["rate_bucket"] = TokenBucket(global_rate)
+    pool = ControllerPool(lambda: make_controller(engine, headless, fast_submit, capture_network), url,
+                          size=pool_size, max_uses=max_uses, max_age_sec=max_age_sec)
+    stream = sys.stdin if queue_path == "-" else open(queue_path, "r", encoding="utf-8")
+    try:
+        return drain_queue(read_queue(stream), pool, outdir, **defaults)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+        pool.close()
@@ -0,0 +1,62 @@
+"""
+Strategy base class definition for different prompt tactics.
+"""
+from abc import ABC, abstractmethod
+import os
+
+class Strategy(ABC):
+    """
+    Abstract base class for a prompt strategy. When a strategy applies is declared
+    with class attributes, compiled once into the per-level index of strategies.registry:
+      min_level / max_level: levels it is tried on (max_level None: no upper bound)
+      requires: strategies that must have been tried on the level first
+      cost: expected Merlin round-trips of one attempt (the UCB policy's prior)
+      refusal_keywords: words in Merlin's last reply that retire it once it made progress
+        (retire-only: they never make a strategy selected, and are checked per turn)
+      env_flag: environment variable that must be "1"/"true" to enable it
+      order: catalog position (lower first); None keeps registration order
+    """
+    min_level = 1
+    max_level = None
+    requires = ()
+    cost = 1.0
+    refusal_keywords = ()
+    env_flag = None
+    order = None
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def enabled(self) -> bool:
+        """Read once when the index is built, not on every attempt."""
+        return self.env_flag is None or os.getenv(self.env_flag, "0").lower() in ("1", "true")
+
+    def applies_to_level(self, level: int) -> bool:
+        return level >= self.min_level and (self.max_level is None or level <= self.max_level)
+
+    def can_handle(self, state, last_reply: str) -> bool:
+        """Return True if this strategy should be applied given current state."""
+        if self.name in state.tried_strategies or not self.applies_to_level(state.level):
+            return False
+        if any(name not in state.tried_strategies for name in self.requires):
+            return False
+        if self.refusal_keywords and state.partial_password and last_reply:
+            lower = last_reply.lower()
+            return not any(word in lower for word in self.refusal_keywords)
+        return True
+
+    def resolve(self, state) -> tuple:
+        """
+        (strategy, prompt) to send now: this strategy and its prompt, unless it hands the
+        turn over to another strategy (which is then logged and marked tried under its own name).
+        """
+        return self, self.generate_prompt(state)
+
+    async def resolve_async(self, state) -> tuple:
+        """resolve() for the asyncio runners; strategies that wait on I/O override it so the loop keeps running."""
+        return self.resolve(state)
+
+    @abstractmethod
+    def generate_prompt(self, state) -> str:
+        """Generate the actual prompt to send for this strategy."""
+        pass
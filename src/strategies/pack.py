@@ -0,0 +1,50 @@
+"""
+Prompt packs: ranked, level-specific prompts (as written by eval.prompt_search)
+turned into strategies that the index tries before the catalog. A pack is JSON:
+
+    {"levels": {"3": {"prompts": [{"prompt": "...", "success_rate": 1.0}, ...]}, ...}}
+
+Each prompt becomes a strategy named "pack_L<level>_<rank>" that applies to its
+level only; the catalog stays behind it as the fallback.
+"""
+import json
+from pathlib import Path
+from strategies import Strategy
+from strategies import registry
+
+PREFIX = "pack_"
+
+class PackPromptStrategy(Strategy):
+    """One fixed prompt of a pack, for one level."""
+    def __init__(self, level: int, rank: int, prompt: str, success_rate: float = 1.0):
+        super().__init__(f"{PREFIX}L{level}_{rank}")
+        self.prompt = prompt
+        self.min_level = self.max_level = level
+        # Ahead of the catalog (orders 10, 20, ...) at any rank: -1, -1/2, -1/3, ..., best first
+        self.order = -1.0 / (rank + 1)
+        # The UCB prior: a prompt that cracked half the offline trials is worth two round-trips
+        self.cost = 1.0 / max(success_rate, 0.1)
+
+    def generate_prompt(self, state) -> str:
+        return self.prompt
+
+def load_pack(path, top: int = None) -> list:
+    """PackPromptStrategy instances for the pack at `path` (the best `top` per level if given)."""
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    strategies = []
+    for level, entry in data.get("levels", {}).items():
+        for rank, item in enumerate(entry.get("prompts", [])[:top]):
+            strategies.append(PackPromptStrategy(int(level), rank, item["prompt"], item.get("success_rate", 1.0)))
+    return strategies
+
+def register_pack(path, top: int = None) -> int:
+    """Register a pack's strategies (replacing any loaded before); returns how many were added."""
+    unregister_pack()
+    strategies = load_pack(path, top)
+    for strat in strategies:
+        registry.register_strategy(strat)
+    return len(strategies)
+
+def unregister_pack():
+    for name in [s.name for s in registry._registered if s.name.startswith(PREFIX)]:
+        registry.unregister_strategy(name)
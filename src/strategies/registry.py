@@ -0,0 +1,78 @@
+"""
+Compiled strategy index. The catalog, strategies added with register_strategy()
+and third-party strategy packs (entry-point group "hackmerlin.strategies"; an
+entry point may name a Strategy class, an instance or a list of them) are
+ordered and filtered once, and each level's strategies are then a dict lookup,
+however many prompt variants the catalog holds. Only what is fixed per level is
+compiled: choosing the next strategy still walks the level's (short) entry in
+order and asks each can_handle() about the turn's state (strategies tried,
+prerequisites, letters collected, Merlin's last reply), which changes every turn.
+A registered strategy with the name of an existing one replaces it.
+"""
+ENTRY_POINT_GROUP = "hackmerlin.strategies"
+
+_registered = []  # strategies added at runtime, in registration order
+_index = None
+
+class StrategyIndex:
+    """Strategies in catalog order, by name and (lazily) by level."""
+    def __init__(self, strategies: list):
+        by_name = {}
+        for position, strat in enumerate(strategies):
+            # Replacing a strategy keeps its slot unless the new one declares its own order
+            slot = by_name[strat.name][0] if strat.name in by_name else (position + 1) * 10
+            by_name[strat.name] = (strat.order if strat.order is not None else slot, strat)
+        ordered = sorted(by_name.values(), key=lambda entry: entry[0])
+        self.strategies = tuple(strat for _, strat in ordered if strat.enabled())
+        self.by_name = {strat.name: strat for strat in self.strategies}
+        self._levels = {}
+
+    def for_level(self, level: int) -> tuple:
+        """Strategies whose level range covers `level`, in order (computed once per level)."""
+        entries = self._levels.get(level)
+        if entries is None:
+            entries = self._levels[level] = tuple(s for s in self.strategies if s.applies_to_level(level))
+        return entries
+
+    def get(self, name: str):
+        return self.by_name.get(name)
+
+def _entry_point_strategies() -> list:
+    # Only scanned when the index is built
+    from importlib import metadata
+    try:
+        eps = metadata.entry_points(group=ENTRY_POINT_GROUP)
+    except Exception:
+        return []
+    strategies = []
+    for ep in eps:
+        loaded = ep.load()
+        for item in (loaded if isinstance(loaded, (list, tuple)) else [loaded]):
+            strategies.append(item() if isinstance(item, type) else item)
+    return strategies
+
+def build_index() -> StrategyIndex:
+    """Compile the catalog, registered strategies and installed packs into a new index."""
+    from strategies.catalog import STRATEGIES
+    return StrategyIndex(list(STRATEGIES) + _registered + _entry_point_strategies())
+
+def get_index() -> StrategyIndex:
+    """The shared index, built on first use."""
+    global _index
+    if _index is None:
+        _index = build_index()
+    return _index
+
+def register_strategy(strategy):
+    """Add a Strategy instance (or replace the one with its name) and rebuild the index on next use."""
+    _registered.append(strategy)
+    reload()
+
+def unregister_strategy(name: str):
+    _registered[:] = [s for s in _registered if s.name != name]
+    reload()
+
+def reload():
+    """Drop the compiled index, e.g. after changing an env_flag variable."""
+    global _index
+    _index = None
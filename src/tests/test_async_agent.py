@@ -0,0 +1,45 @@
+import asyncio
+import json
+from controller.base import AsyncBrowserControllerBase
+from runner.async_agent import run_agent
+
+class FakeAsyncController(AsyncBrowserControllerBase):
+    """Answers every prompt with a quoted per-session password."""
+    def __init__(self, secret):
+        self.secret = secret
+        self.messages = ["Welcome, traveller."]
+        self.sent = []
+        self.closed = False
+    async def open_page(self, url):
+        pass
+    async def send_text(self, text):
+        await self._mark_reply_baseline()
+        self.sent.append(text)
+        self.messages.append(f"I cannot reveal '{self.secret}{len(self.sent)}'.")
+    async def _reply_snapshot(self):
+        return {"count": len(self.messages), "now": 0}
+    async def _await_reply(self, baseline, quiet_ms, timeout_ms):
+        await asyncio.sleep(0)
+        if len(self.messages) <= baseline:
+            return {"timedOut": True}
+        return {"timedOut": False, "firstTextAt": 5, "changedAt": 10}
+    async def get_latest_bot_text(self):
+        return self.messages[-1]
+    async def close(self):
+        self.closed = True
+
+def test_async_sessions_run_concurrently(tmp_path):
+    ctrls = [FakeAsyncController("SECRET"), FakeAsyncController("MAGIC")]
+
+    async def main():
+        return await asyncio.gather(*[
+            run_agent(controller=c, cooldown=0, intro_timeout=0, outdir=str(tmp_path / f"s{i}"))
+            for i, c in enumerate(ctrls)])
+
+    results = asyncio.run(main())
+    assert [r["level"] for r in results[0]] == list(range(1, 8))
+    assert all(r["success"] for r in results[0] + results[1])
+    assert results[1][0]["password"] == "MAGIC1"
+    assert all(c.closed for c in ctrls)
+    summary = json.loads((tmp_path / "s0" / "run_summary.json").read_text())
+    assert summary["total_levels_cleared"] == 7
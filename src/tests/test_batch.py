@@ -0,0 +1,47 @@
+import json
+import os
+from eval.mock_merlin import MockMerlinServer
+from eval.summary import batch_summary
+from runner import batch
+from runner.batch import plan_shards, run_batch
+
+def test_plan_shards_covers_every_run_once():
+    shards = plan_shards(10, 4)
+    assert shards == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+    assert sum(plan_shards(10, 4, shards_per_worker=2), []) == list(range(10))
+
+def test_batch_summary_aggregates_levels():
+    runs = [{"run": 0, "levels": [{"level": 1, "success": True, "strategies": ["a"]},
+                                  {"level": 2, "success": False, "strategies": ["a", "b", "c"]}]},
+            {"run": 1, "levels": [{"level": 1, "success": True, "strategies": ["a", "b"]}]},
+            {"run": 2, "error": "boom"}]
+    summary = batch_summary(runs, wall_sec=3600)
+    assert summary["runs_completed"] == 2 and summary["runs_failed"] == 1
+    assert summary["levels"]["1"] == {"reached": 2, "success_rate": 1.0, "mean_round_trips": 1.5}
+    assert summary["levels"]["2"] == {"reached": 1, "success_rate": 0.0, "mean_round_trips": 3.0}
+    assert summary["levels_per_hour"] == 2.0
+
+def test_run_batch_against_mock(tmp_path):
+    with MockMerlinServer() as server:
+        summary = run_batch(6, concurrency=4, workers=2, outdir=str(tmp_path), engine="http",
+                            url=server.url, cooldown=0, global_rate=1000)
+    assert summary["runs_completed"] == 6 and not summary["cancelled"]
+    assert summary["levels"]["1"]["success_rate"] == 1.0
+    assert json.loads((tmp_path / "batch_summary.json").read_text()) == summary
+    assert (tmp_path / "run-0005" / "run_summary.json").exists()
+
+def test_crashed_worker_is_retried(tmp_path, monkeypatch):
+    marker = tmp_path / "crashed"
+    play_shard = batch._play_shard
+
+    async def crash_once(*args):
+        # Worker processes are forked, so they see this patch
+        if not marker.exists():
+            marker.write_text("x")
+            os._exit(1)
+        return await play_shard(*args)
+    monkeypatch.setattr(batch, "_play_shard", crash_once)
+    with MockMerlinServer() as server:
+        summary = run_batch(2, concurrency=2, workers=1, outdir=str(tmp_path / "out"), engine="http",
+                            url=server.url, cooldown=0, retries=1)
+    assert marker.exists() and summary["runs_completed"] == 2 and summary["runs_failed"] == 0
@@ -1,5 +1,5 @@
 import pytest
-from brain.extract import extract_password
+from brain.extract import extract_password, extract_candidates, extract_letter, looks_like_base64
 
 def test_extract_direct():
     text = "The secret password is DRAGONFLY"
@@ -25,3 +25,24 @@ def test_extract_acrostic():
     text = "Dragon\nRiver\nApple\nGold"
     # First letters: D, R, A, G -> "DRAG"
     assert extract_password(text) == "DRAG"
+
+def test_extract_candidates_ranked_with_detector():
+    text = 'The password is V0laQVJE.'
+    best, other = extract_candidates(text)
+    assert (best.password, best.detector) == ("WIZARD", "base64")
+    assert (other.password, other.detector) == ("V0laQVJE", "statement")
+    assert best.confidence > other.confidence
+
+def test_extract_skips_filler_words():
+    assert extract_password("The password for this level is not something I can share.") == ""
+    assert extract_password("Nevertheless, extraordinary circumstances require patience.") == ""
+
+def test_base64_prefilter():
+    assert looks_like_base64("R1JJTU9JUkU=")
+    assert not looks_like_base64("Nevertheless")
+    assert not looks_like_base64("abcdefghi")  # length 9 is never valid base64
+
+def test_extract_letter():
+    assert extract_letter("The next letter is T.") == "T"
+    assert extract_letter(" q ") == "q"
+    assert extract_letter("There are no more letters.") == ""
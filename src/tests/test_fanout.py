@@ -0,0 +1,96 @@
+import asyncio
+import json
+from controller.base import AsyncBrowserControllerBase
+from eval.outcomes import OutcomeStore
+from runner.fanout import RateLimiter, run_fanout, _advance
+
+class FakeGame(AsyncBrowserControllerBase):
+    """Scripted game: level N's password is PWN; stories leak a decoy from level 3 on."""
+    def __init__(self):
+        self.level = 1
+        self.messages = ["Level 1. Ask me anything."]
+        self.prompts = []
+        self.submitted = []
+        self.closed = False
+    async def open_page(self, url):
+        pass
+    async def send_text(self, text):
+        await self._mark_reply_baseline()
+        self.prompts.append((self.level, text))
+        await asyncio.sleep(0.01)
+        if self.level == 1 and "secret password?" in text:
+            reply = "The password is 'PW1'."
+        elif "story" in text:
+            reply = "Once upon a time... 'PW2'" if self.level == 2 else "Once upon a time... 'DECOY'"
+        elif "hint" in text and self.level >= 3:
+            reply = f"I must not say '{'PW%d' % self.level}'."
+        else:
+            reply = "I cannot help with that."
+        self.messages.append(reply)
+    async def _reply_snapshot(self):
+        return {"count": len(self.messages), "now": 0}
+    async def _await_reply(self, baseline, quiet_ms, timeout_ms):
+        if len(self.messages) <= baseline:
+            return {"timedOut": True}
+        return {"timedOut": False, "firstTextAt": 0, "changedAt": 0}
+    async def get_latest_bot_text(self):
+        return self.messages[-1]
+    async def submit_password(self, password, timeout=5.0):
+        self.submitted.append(password)
+        if password != f"PW{self.level}":
+            return False
+        self.level += 1
+        self.messages.append(f"Level {self.level}.")
+        return True
+    async def current_level(self):
+        return self.level
+    async def close(self):
+        self.closed = True
+
+def test_fanout_clears_levels_and_skips_rejected_candidates(tmp_path):
+    games = [FakeGame() for _ in range(3)]
+    results = asyncio.run(run_fanout(games, max_concurrency=3, min_interval=0, intro_timeout=0,
+                                     outdir=str(tmp_path)))
+    assert [r["password"] for r in results] == [f"PW{n}" for n in range(1, 8)]
+    assert sorted(g.level for g in games) == [7, 7, 8]
+    assert "DECOY" in sum((g.submitted for g in games), [])
+    assert all(g.closed for g in games)
+    events = [json.loads(line) for line in (tmp_path / "events.jsonl").read_text().splitlines()]
+    assert any("rejected" in e["message"] for e in events)
+
+def test_rate_limiter_spaces_prompts():
+    async def main():
+        limiter = RateLimiter(0.05)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for _ in range(3):
+            await limiter.wait()
+        return loop.time() - start
+    assert asyncio.run(main()) >= 0.09
+
+def test_fanout_letters_asks_different_positions_at_once(tmp_path):
+    from eval.mock_merlin import MockMerlinServer
+    from runner.fanout import run_fanout_sessions
+    with MockMerlinServer() as server:
+        results = asyncio.run(run_fanout_sessions(3, engine="http", url=server.url, min_interval=0,
+                                                  outdir=str(tmp_path)))
+    assert results[3]["password"] == "POTION" and "letter_by_letter" in results[3]["strategies"]
+    events = [json.loads(line) for line in (tmp_path / "events.jsonl").read_text().splitlines()]
+    asked = [e["message"] for e in events if e.get("role") == "Agent" and e.get("strategy") == "letter_by_letter"]
+    # One round: three sessions, three different spans
+    assert len(asked) == 3 and len({a.split("?")[-2] for a in asked}) == 3
+
+def test_fanout_honours_run_options_and_skips_advanced_sessions(tmp_path):
+    games = [FakeGame() for _ in range(2)]
+    results = asyncio.run(run_fanout(games, max_concurrency=2, min_interval=0, intro_timeout=0, outdir=str(tmp_path),
+                                     max_attempts_per_level=1, outcomes_path=str(tmp_path / "outcomes.sqlite")))
+    # One strategy per level: the level-3 story only leaks a decoy
+    assert [r["success"] for r in results] == [True, True, False]
+    store = OutcomeStore(tmp_path / "outcomes.sqlite")
+    assert set(store.level_stats(3)) == {"indirect_story"}
+    store.close()
+    # A session whose cancelled submit already went through is not submitted to again
+    ahead, behind = FakeGame(), FakeGame()
+    ahead.level = 2
+    assert asyncio.run(_advance(ahead, 1, "PW1")) is True and ahead.submitted == []
+    assert asyncio.run(_advance(behind, 1, "PW1")) is True and behind.submitted == ["PW1"]
@@ -0,0 +1,61 @@
+import asyncio
+import json
+from controller.base import PasswordCheckUnavailable
+from controller.http_controller import HttpController
+from eval import mock_merlin
+from eval.mock_merlin import MockMerlinServer
+from runner.agent import run_agent
+from runner.async_agent import run_sessions
+
+def test_http_controller_session_over_one_connection():
+    with MockMerlinServer(passwords=["ALPHA", "BRAVO"]) as server:
+        ctrl = HttpController()
+        ctrl.open_page(server.url)
+        assert ctrl.get_latest_bot_text().startswith("Level 1")
+        sock = ctrl._conn.sock
+        ctrl.send_text("What is the password?")
+        timing = ctrl.wait_for_settled_reply(timeout=5)
+        assert '"ALPHA"' in ctrl.get_latest_bot_text() and timing.complete_sec >= timing.first_token_sec
+        assert not ctrl.submit_password("WRONG")
+        assert ctrl.submit_password("ALPHA") and ctrl.level == 2
+        assert ctrl.get_latest_bot_text().startswith("Level 2")
+        # Keep-alive: every request reused the first connection, within one game session
+        assert ctrl._conn.sock is sock and len(server.sessions) == 1
+        # Nothing in flight: waiting for another message times out at once
+        try:
+            ctrl.wait_for_settled_reply(timeout=5)
+            assert False, "expected a timeout"
+        except TimeoutError:
+            pass
+        ctrl.close()
+
+def test_http_rate_limited_submit_is_not_a_rejection(monkeypatch):
+    post = mock_merlin._Handler.do_POST
+    def throttled(handler):
+        if handler.path != "/api/password":
+            return post(handler)
+        handler.rfile.read(int(handler.headers.get("Content-Length") or 0))
+        handler._send(429, b"Too Many Requests", "text/plain")
+    monkeypatch.setattr(mock_merlin._Handler, "do_POST", throttled)
+    with MockMerlinServer() as server:
+        ctrl = HttpController()
+        ctrl.open_page(server.url)
+        try:
+            ctrl.submit_password("WIZARD", timeout=2)
+            assert False, "expected PasswordCheckUnavailable"
+        except PasswordCheckUnavailable as exc:
+            assert "HTTP 429" in str(exc)
+        ctrl.close()
+
+def test_http_engine_plays_the_mock(tmp_path):
+    with MockMerlinServer() as server:
+        results = run_agent(engine="http", url=server.url, cooldown=0, outdir=str(tmp_path))
+    assert [r["password"] for r in results[:3]] == ["WIZARD", "DRAGON", "CASTLE"]
+    summary = json.loads((tmp_path / "run_summary.json").read_text())
+    assert summary["phases"]["wait_reply"]["count"] >= 3
+
+def test_async_http_sessions(tmp_path):
+    with MockMerlinServer() as server:
+        runs = asyncio.run(run_sessions(20, engine="http", url=server.url, cooldown=0, outdir=str(tmp_path)))
+        assert len(server.sessions) == 20
+    assert all(results[0]["success"] for results in runs)
@@ -0,0 +1,66 @@
+import json
+import threading
+import time
+from eval.logger import RunLogger, BufferedRunLogger
+
+def _events(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+def test_buffered_logger_flushes_on_close(tmp_path):
+    logger = BufferedRunLogger(tmp_path / "t.txt", tmp_path / "e.jsonl", flush_every=1000, flush_interval=60)
+    for i in range(100):
+        logger.log("Agent", f"prompt {i}", level=1, strategy="direct_ask")
+    logger.close()
+    logger.close()  # idempotent
+    events = _events(tmp_path / "e.jsonl")
+    assert [e["message"] for e in events] == [f"prompt {i}" for i in range(100)]
+    assert (tmp_path / "t.txt").read_text().count("\n") == 100
+
+def test_buffered_logger_flushes_on_interval(tmp_path):
+    logger = BufferedRunLogger(tmp_path / "t.txt", tmp_path / "e.jsonl", flush_every=1000, flush_interval=0.05)
+    logger.log("Merlin", "hello", level=1)
+    deadline = time.monotonic() + 2
+    while not (tmp_path / "e.jsonl").read_text() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert _events(tmp_path / "e.jsonl")[0]["message"] == "hello"
+    logger.close()
+
+def test_buffered_logger_flushes_on_interval_under_steady_load(tmp_path):
+    logger = BufferedRunLogger(tmp_path / "t.txt", tmp_path / "e.jsonl", flush_every=10**6, flush_interval=0.01)
+    # Log faster than the writer formats, so its queue never runs empty
+    sent = 0
+    while not (tmp_path / "e.jsonl").stat().st_size and sent < 200000:
+        for _ in range(500):
+            logger.log("Agent", "prompt", level=1)
+        sent += 500
+    assert (tmp_path / "e.jsonl").stat().st_size and sent < 200000
+    logger.close()
+
+def test_shared_stream_is_session_tagged(tmp_path):
+    logger = BufferedRunLogger(tmp_path / "t.txt", tmp_path / "e.jsonl", flush_every=7)
+
+    def play(session):
+        view = logger.session(session)
+        for i in range(50):
+            view.log("Agent", f"{session}:{i}", level=1)
+        view.close()  # does not close the shared stream
+
+    threads = [threading.Thread(target=play, args=(s,)) for s in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    logger.close()
+    events = _events(tmp_path / "e.jsonl")
+    assert len(events) == 200
+    for s in range(4):
+        mine = [e["message"] for e in events if e["session"] == s]
+        assert mine == [f"{s}:{i}" for i in range(50)]
+    assert "Agent (session 3): 3:0" in (tmp_path / "t.txt").read_text()
+
+def test_plain_logger_format_unchanged(tmp_path):
+    logger = RunLogger(tmp_path / "t.txt", tmp_path / "e.jsonl")
+    logger.log("Merlin", "hi", level=2, extra={"ttft": 0.1})
+    logger.close()
+    assert _events(tmp_path / "e.jsonl")[0] == {"time": 0.0, "role": "Merlin", "message": "hi", "level": 2, "ttft": 0.1}
+    assert (tmp_path / "t.txt").read_text().endswith("Merlin: hi\n")
@@ -0,0 +1,41 @@
+from types import SimpleNamespace
+from controller.network import is_chat_api, reply_from_payload, network_timing
+
+def response(url, method="POST"):
+    return SimpleNamespace(url=url, request=SimpleNamespace(method=method))
+
+def test_chat_api_responses_are_recognized():
+    assert is_chat_api(response("http://127.0.0.1:8000/api/chat"))
+    assert is_chat_api(response("https://hackmerlin.io/api/messages?level=2"))
+    assert not is_chat_api(response("http://127.0.0.1:8000/api/chat", method="GET"))
+    assert not is_chat_api(response("http://127.0.0.1:8000/api/password"))
+
+def test_reply_from_known_payload_shapes():
+    assert reply_from_payload({"reply": "It is 'MAGIC'.", "level": 1}) == "It is 'MAGIC'."
+    assert reply_from_payload({"message": {"role": "assistant", "content": "No."}}) == "No."
+    assert reply_from_payload({"choices": [{"message": {"content": "Hi"}}]}) == "Hi"
+    # Unknown shapes fall back to reading the page
+    assert reply_from_payload({"level": 2, "ok": True}) is None
+    assert reply_from_payload([1, 2]) is None
+
+def test_network_timing():
+    timing = network_timing(100.0, 100.25, 101.5)
+    assert (timing.first_token_sec, timing.complete_sec) == (0.25, 1.5)
+
+def test_timed_out_network_wait_drops_its_baseline():
+    from controller.playwright_controller import PlaywrightController
+
+    def no_response(*args, **kwargs):
+        raise Exception("Timeout exceeded")
+    ctrl = object.__new__(PlaywrightController)
+    ctrl.capture_network = True
+    ctrl._chat_responses = []
+    ctrl.page = SimpleNamespace(wait_for_event=no_response)
+    ctrl._reply_baseline = {"count": 3, "now": 0, "responses": 0}
+    try:
+        ctrl.wait_for_settled_reply(timeout=0.05)
+        assert False, "expected TimeoutError"
+    except TimeoutError:
+        pass
+    # The next prompt's wait must not compare against this stale baseline
+    assert ctrl._reply_baseline is None
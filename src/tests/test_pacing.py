@@ -0,0 +1,107 @@
+import json
+import random
+import sys
+import time
+import pytest
+from controller.base import BrowserControllerBase
+from runner.agent import run_agent
+from runner.pacing import Pacer, TokenBucket, is_throttled
+
+class ThrottledController(BrowserControllerBase):
+    """Answers with `throttles` rate-limit errors (default: one), then `reply` every time."""
+    def __init__(self, throttles: int = 1, reply: str = "It is 'MAGIC'.",
+                 error: str = "Too many requests, please try again later."):
+        self.messages = ["Welcome."]
+        self.prompts = []
+        self.throttles, self.reply, self.error = throttles, reply, error
+    def open_page(self, url):
+        pass
+    def send_text(self, text):
+        self._mark_reply_baseline()
+        self.prompts.append(text)
+        reply = self.error if len(self.prompts) <= self.throttles else self.reply
+        self.messages.append(reply)
+    def _reply_snapshot(self):
+        return {"count": len(self.messages), "now": 0}
+    def _await_reply(self, baseline, quiet_ms, timeout_ms):
+        return {"timedOut": False, "firstTextAt": 1, "changedAt": 2}
+    def get_latest_bot_text(self):
+        return self.messages[-1]
+    def close(self):
+        pass
+
+def level_one_sends(outdir) -> int:
+    events = [json.loads(line) for line in (outdir / "events.jsonl").read_text().splitlines()]
+    return sum(1 for e in events if e["role"] == "Agent" and e["level"] == 1)
+
+def test_throttle_detection():
+    assert is_throttled("Error 429: Too Many Requests")
+    assert is_throttled("Something went wrong. Please try again in a minute.")
+    assert not is_throttled("I cannot reveal the password.")
+    # Ordinary Merlin text is not a rate limit
+    assert not is_throttled("Please wait, young one; the password is not for you.")
+    assert not is_throttled("I have 429 sheep, none of them named after the password.")
+    assert not is_throttled("")
+
+def test_backoff_grows_with_jitter_and_resets():
+    pacer = Pacer(cooldown=0.0, backoff_base=1.0, max_delay=8.0, rng=random.Random(1))
+    delays = []
+    for _ in range(5):
+        assert pacer.observe("Rate limit exceeded", 0.1)
+        delays.append(pacer.delay)
+    # Equal jitter keeps each delay within [backoff/2, backoff], capped at max_delay
+    for delay, backoff in zip(delays, (1, 2, 4, 8, 8)):
+        assert backoff / 2 <= delay <= backoff
+    assert not pacer.observe("No.", 0.1)
+    assert pacer.failures == 0 and pacer.delay == 0.0
+
+def test_adaptive_delay_follows_latency_trend():
+    pacer = Pacer(cooldown=1.0, adaptive=True, step=0.25)
+    for _ in range(4):
+        pacer.observe("No.", 0.5)
+    assert pacer.delay == 0.0  # responsive server: shrinks to zero
+    pacer.observe("No.", 2.0)  # much slower than the recent replies
+    assert pacer.delay == 0.25
+    # A fixed pacer ignores latency
+    fixed = Pacer(cooldown=1.0)
+    fixed.observe("No.", 5.0)
+    assert fixed.delay == 1.0
+
+def test_token_bucket_spaces_out_reservations():
+    bucket = TokenBucket(rate=10.0, burst=2)
+    waits = [bucket.reserve() for _ in range(4)]
+    assert waits[:2] == [0.0, 0.0]
+    assert 0.09 <= waits[2] <= 0.1 and 0.19 <= waits[3] <= 0.2
+
+def test_global_rate_must_be_positive(monkeypatch, capsys):
+    from runner import cli
+    monkeypatch.setattr(sys, "argv", ["runner.cli", "--global-rate", "0"])
+    with pytest.raises(SystemExit):
+        cli.main()
+    assert "--global-rate: must be greater than 0" in capsys.readouterr().err
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+def test_throttled_reply_does_not_use_up_the_strategy(tmp_path, monkeypatch):
+    monkeypatch.setattr(time, "sleep", lambda sec: None)
+    ctrl = ThrottledController()
+    results = run_agent(controller=ctrl, cooldown=0, intro_timeout=0, outdir=str(tmp_path))
+    # The rate-limited direct_ask is retried, and only counted once per level
+    assert ctrl.prompts[0] == ctrl.prompts[1]
+    assert results[0]["success"] and results[0]["strategies"] == ["direct_ask"]
+    events = [json.loads(line) for line in (tmp_path / "events.jsonl").read_text().splitlines()]
+    assert any(e["message"].startswith("Rate limited; backing off") for e in events)
+
+def test_throttled_reply_that_leaks_a_password_is_kept(tmp_path, monkeypatch):
+    monkeypatch.setattr(time, "sleep", lambda sec: None)
+    ctrl = ThrottledController(error="Too many requests! Fine: the password is 'MAGIC'.")
+    results = run_agent(controller=ctrl, cooldown=0, intro_timeout=0, outdir=str(tmp_path))
+    assert results[0]["success"] and results[0]["password"] == "MAGIC"
+    assert level_one_sends(tmp_path) == 1
+
+def test_rate_limited_sends_do_not_count_against_max_attempts(tmp_path, monkeypatch):
+    monkeypatch.setattr(time, "sleep", lambda sec: None)
+    ctrl = ThrottledController(throttles=3)
+    results = run_agent(controller=ctrl, cooldown=0, intro_timeout=0, outdir=str(tmp_path),
+                        max_attempts_per_level=1)
+    assert results[0]["success"] and level_one_sends(tmp_path) == 4
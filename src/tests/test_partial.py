@@ -0,0 +1,47 @@
+from brain.partial import PartialPassword, Fragment, parse_fragment, plan_spans, span_prompt
+from brain.state import State
+from eval.mock_merlin import MockMerlinServer
+from runner.agent import run_agent
+
+def test_parse_fragment_formats():
+    frag = parse_fragment("It has 6 letters. Letter 1 is P, letter 2 is O, letter 3 is T.", [1, 2, 3])
+    assert frag.length == 6 and {p: l for p, (l, _) in frag.letters.items()} == {1: "P", 2: "O", 3: "T"}
+    assert parse_fragment("Letters 4-6 are I, O, N.", [4, 5, 6]).letters[6][0] == "N"
+    assert parse_fragment("The next letter is T.", [3]).letters == {3: ("T", 0.8)}
+    assert parse_fragment("I O N", [4, 5, 6]).letters[5][0] == "O"
+    assert parse_fragment("There are no more letters.", [7, 8]).length == 6
+    assert not parse_fragment("I'm sorry, I cannot reveal the password.", [1, 2, 3])
+
+def test_partial_password_merges_and_resolves_conflicts():
+    partial = PartialPassword()
+    partial.merge(Fragment({1: ("P", 0.9), 2: ("O", 0.9)}, length=4))
+    partial.merge(Fragment({3: ("X", 0.6)}))
+    partial.merge(Fragment({3: ("T", 0.9), 4: ("s", 0.9)}))
+    # Conflicting reveals cancel out: 0.9 - 0.6 is below MIN_CONFIDENCE, so position 3 is asked again
+    assert partial.pattern() == "PO?s" and partial.missing() == [3] and partial.candidate() == ""
+    partial.merge(Fragment({3: ("T", 0.9)}))
+    assert partial.candidate() == "POTs" and partial.prefix() == "POTs"
+
+def test_partial_password_votes_ignore_case_but_keep_it():
+    partial = PartialPassword()
+    partial.merge(Fragment({1: ("m", 0.6), 2: ("a", 0.9)}, length=2))
+    partial.merge(Fragment({1: ("M", 0.9), 2: ("E", 0.3)}))
+    # "m" and "M" are one letter with 1.5 of support; the casing read is the better-supported one
+    assert partial.confidence(1) == 1.0 and partial.candidate() == "Ma"
+
+def test_plan_spans_splits_missing_positions_across_sessions():
+    partial = PartialPassword("PO")
+    assert plan_spans(partial, sessions=3) == [[3, 4, 5], [6, 7, 8], [9, 10, 11]]
+    partial.length = 6
+    partial.add_letter(4, "I", 1.0)
+    assert plan_spans(partial, sessions=3, span=2) == [[3, 5], [6]]
+    assert "every other letter from 3 to 5" in span_prompt([3, 5])
+    assert State(level=4, partial_password="DRAG").partial.prefix() == "DRAG"
+
+def test_letter_spans_clear_the_mock_dlp_level(tmp_path):
+    with MockMerlinServer() as server:
+        results = run_agent(engine="http", url=server.url, cooldown=0, outdir=str(tmp_path))
+    level4 = results[3]
+    assert level4["password"] == "POTION" and level4["strategies"].count("letter_by_letter") == 1
+    assert level4["round_trips"] == len(level4["strategies"]) + 1  # two turns of letter spans
+    assert len(results) == 7 and all(r["success"] for r in results)
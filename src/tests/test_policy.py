@@ -31,3 +31,60 @@ def test_policy_level4_no_partial():
     assert strat is not None
     # Likely indirect_story (if not already used in this scenario)
     assert strat.name == "indirect_story" or strat.name == "describe_password"
+
+def test_policy_ucb_prefers_historical_winner(tmp_path):
+    from eval.outcomes import OutcomeStore, SUCCESS, FAIL
+    store = OutcomeStore(tmp_path / "outcomes.sqlite")
+    # On level 5 the word filter trick worked before; the story never did
+    store.record(5, "indirect_story", FAIL)
+    store.record(5, "word_filter_trick", SUCCESS, latency=2.0)
+    stats = store.level_stats(5)
+    assert stats["word_filter_trick"] == {"attempts": 1, "successes": 1, "round_trips": 1, "mean_latency": 2.0}
+    strat = choose_next_strategy(State(level=5), last_reply="", stats=stats)
+    assert strat.name == "word_filter_trick"
+    # Without history the catalog order applies
+    assert choose_next_strategy(State(level=5), last_reply="").name == "indirect_story"
+    store.close()
+
+def test_policy_ucb_does_not_trust_strategies_whose_candidates_are_rejected(tmp_path):
+    from brain.extract import Candidate
+    from eval.outcomes import OutcomeStore, CANDIDATE
+    from runner.loop import settle_candidate
+
+    class Log:
+        def log(self, *args, **kwargs):
+            pass
+
+    store = OutcomeStore(tmp_path / "outcomes.sqlite")
+    # Over three runs json_leak's replies on level 7 only ever proposed a decoy the game rejected
+    for run in range(3):
+        state = State(level=7)
+        store.record(7, "json_leak", CANDIDATE, latency=1.0)
+        state.candidates.add([Candidate(f"DECOY{run}", 0.9, "quoted")], strategy="json_leak")
+        assert not settle_candidate(state, state.candidates.pop(), False, Log(), store)
+    stats = store.level_stats(7)
+    assert stats["json_leak"] == {"attempts": 3, "successes": 0, "round_trips": 3, "mean_latency": 1.0}
+    assert choose_next_strategy(State(level=7), last_reply="", stats=stats).name != "json_leak"
+    store.close()
+
+def test_policy_ucb_explores_untried_before_known_failures():
+    stats = {"indirect_story": {"attempts": 3, "successes": 0, "round_trips": 3, "mean_latency": 1.0}}
+    strat = choose_next_strategy(State(level=2), last_reply="", stats=stats)
+    assert strat.name == "indirect_story"  # only applicable strategy at level 2
+    strat = choose_next_strategy(State(level=3), last_reply="", stats=stats)
+    assert strat.name == "describe_password"
+
+def test_policy_ucb_keeps_a_winner_ahead_of_exploration():
+    # Level 7 after a full run: six strategies failed once each, json_leak worked
+    failed = {"attempts": 1, "successes": 0, "round_trips": 1, "mean_latency": 1.0}
+    stats = {name: dict(failed) for name in ("indirect_story", "describe_password", "word_filter_trick",
+                                             "encode_base64", "acrostic_list", "letter_by_letter")}
+    stats["json_leak"] = {"attempts": 1, "successes": 1, "round_trips": 1, "mean_latency": 1.0}
+    assert choose_next_strategy(State(level=7), last_reply="", stats=stats).name == "json_leak"
+    # Level 4: letter-by-letter needed a partial turn before it succeeded, and a rejected candidate
+    stats = {"indirect_story": dict(failed), "describe_password": dict(failed),
+             "letter_by_letter": {"attempts": 3, "successes": 1, "round_trips": 2, "mean_latency": 1.0}}
+    assert choose_next_strategy(State(level=4), last_reply="", stats=stats).name == "letter_by_letter"
+    # A former winner that keeps failing gives way to exploration again
+    stats["letter_by_letter"].update(attempts=12, round_trips=12)
+    assert choose_next_strategy(State(level=4), last_reply="", stats=stats).name == "jailbreak_override"
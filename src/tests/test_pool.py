@@ -0,0 +1,77 @@
+import pytest
+from controller.pool import ControllerPool
+
+class FakeController:
+    launched = 0
+    def __init__(self):
+        FakeController.launched += 1
+        self.opened = []
+        self.resets = 0
+        self.alive = True
+        self.closed = False
+    def open_page(self, url):
+        self.opened.append(url)
+    def reset_session(self, url):
+        self.resets += 1
+        self.opened.append(url)
+    def is_alive(self):
+        return self.alive
+    def close(self):
+        self.closed = True
+
+def make_pool(**kwargs):
+    FakeController.launched = 0
+    return ControllerPool(FakeController, "http://game", **kwargs)
+
+def test_pool_reuses_warm_controller_and_resets_session():
+    pool = make_pool(size=1)
+    pool.warm()
+    with pool.checkout() as first:
+        assert first.opened == ["http://game"]
+    with pool.checkout() as second:
+        pass
+    assert second is first
+    assert first.resets == 2
+    assert FakeController.launched == 1
+
+def test_pool_evicts_after_max_uses():
+    pool = make_pool(max_uses=2)
+    ctrls = []
+    for _ in range(3):
+        with pool.checkout() as ctrl:
+            ctrls.append(ctrl)
+    assert ctrls[0] is ctrls[1]
+    assert ctrls[0].closed and ctrls[2] is not ctrls[0]
+    assert FakeController.launched == 2
+
+def test_pool_replaces_unhealthy_and_failed_controllers():
+    pool = make_pool()
+    with pool.checkout() as ctrl:
+        pass
+    ctrl.alive = False
+    with pytest.raises(RuntimeError):
+        with pool.checkout() as replacement:
+            assert replacement is not ctrl
+            raise RuntimeError("run crashed")
+    assert ctrl.closed and replacement.closed
+    pool.close()
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+
+def test_drain_queue_runs_pool_size_specs_at_once(monkeypatch):
+    import threading
+    from runner import serve
+    barrier = threading.Barrier(2, timeout=5)
+    played = []
+    def fake_run(controller, outdir, **kwargs):
+        # Both workers must be inside a run at the same time to get past the barrier
+        barrier.wait()
+        played.append((outdir, controller, threading.get_ident()))
+    monkeypatch.setattr(serve, "run_agent", fake_run)
+    pool = make_pool(size=2)
+    assert serve.drain_queue([{}] * 4, pool, "out") == 4
+    assert sorted(o for o, _, _ in played) == [f"out/run-{n:04d}" for n in range(1, 5)]
+    # Each worker kept to its own controller, and closed it when the queue ran dry
+    assert FakeController.launched == 2
+    assert all(len({id(c) for _, c, t in played if t == thread}) == 1 for _, _, thread in played)
+    assert all(c.closed for _, c, _ in played)
@@ -0,0 +1,36 @@
+import json
+from eval.reextract import iter_event_files, scan_run, reextract
+
+def _write_run(path, entries):
+    path.mkdir(parents=True)
+    (path / "events.jsonl").write_text("\n".join(json.dumps(e) for e in entries) + "\n{torn")
+
+def _runs(tmp_path):
+    # Level 1 was cracked and still is; level 2 was missed by the old extractor
+    _write_run(tmp_path / "a", [
+        {"time": 0, "role": "Merlin", "message": 'The password is "WIZARD".', "level": 1},
+        {"time": 1, "role": "INFO", "message": "Level 1 PASSED. Password: WIZARD", "level": 1},
+        {"time": 2, "role": "Merlin", "message": "The secret password is DRAGONFLY", "level": 2},
+        {"time": 3, "role": "INFO", "message": "Level 2 FAILED after 8 attempts.", "level": 2},
+    ])
+    # Level 1 was extracted as a different word than the current extractor picks
+    _write_run(tmp_path / "b" / "session-001", [
+        {"time": 0, "role": "Merlin", "message": "Encoded: R1JJTU9JUkU=", "level": 1},
+        {"time": 1, "role": "INFO", "message": "Level 1 PASSED. Password: Encoded", "level": 1},
+    ])
+
+def test_scan_run_reports_new_and_changed(tmp_path):
+    _runs(tmp_path)
+    paths = list(iter_event_files(tmp_path))
+    assert len(paths) == 2
+    diffs = scan_run(paths[0])
+    assert [(d["level"], d["status"], d["old"]) for d in diffs] == [(2, "new", None)]
+    assert diffs[0]["new"][0]["password"] == "DRAGONFLY"
+    changed = scan_run(paths[1])
+    assert [(d["status"], d["old"], d["new"][0]["password"]) for d in changed] == [("changed", "Encoded", "GRIMOIRE")]
+
+def test_reextract_pool_matches_inline(tmp_path):
+    _runs(tmp_path)
+    inline = dict(reextract(iter_event_files(tmp_path), workers=1))
+    pooled = dict(reextract(iter_event_files(tmp_path), workers=2))
+    assert inline == pooled
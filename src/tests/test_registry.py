@@ -0,0 +1,23 @@
+import pytest
+from collections import OrderedDict
+from controller import registry
+from controller.http_controller import HttpController, AsyncHttpController
+from eval.import_benchmark import measure
+
+def test_engines_load_lazily_by_name():
+    assert registry.engine_names() == ["http", "playwright", "selenium"]
+    assert registry.load_engine("HTTP") is HttpController
+    assert registry.load_engine("http", asynchronous=True) is AsyncHttpController
+    assert not registry.has_engine("selenium", asynchronous=True)
+    with pytest.raises(ValueError):
+        registry.load_engine("lynx")
+
+def test_register_engine(monkeypatch):
+    monkeypatch.setattr(registry, "ENGINES", dict(registry.ENGINES))
+    registry.register_engine("fake", "collections:OrderedDict")
+    assert registry.load_engine("fake") is OrderedDict and "fake" in registry.engine_names()
+
+def test_cli_and_offline_tools_import_no_engine():
+    for module in ("runner.cli", "eval.reextract"):
+        report = measure(module, repeat=1)
+        assert report["engines"] == [] and report["median_ms"] is not None
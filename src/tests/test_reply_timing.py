@@ -0,0 +1,67 @@
+import pytest
+from controller.base import BrowserControllerBase
+
+class FakeController(BrowserControllerBase):
+    """Controller stub whose in-page watcher results are scripted."""
+    def __init__(self, snapshot, result):
+        self.snapshot = snapshot
+        self.result = result
+        self.awaited = []
+    def open_page(self, url):
+        pass
+    def send_text(self, text):
+        self._mark_reply_baseline()
+    def _reply_snapshot(self):
+        return dict(self.snapshot)
+    def _await_reply(self, baseline, quiet_ms, timeout_ms):
+        self.awaited.append((baseline, quiet_ms, timeout_ms))
+        return self.result
+    def get_latest_bot_text(self):
+        return ""
+    def close(self):
+        pass
+
+def test_settled_reply_timings_relative_to_send():
+    ctrl = FakeController({"count": 2, "now": 1000},
+                          {"timedOut": False, "firstTextAt": 1250, "changedAt": 1900})
+    ctrl.send_text("hello")
+    timing = ctrl.wait_for_settled_reply(timeout=5.0, quiet=0.5)
+    assert ctrl.awaited == [(2, 500, 5000)]
+    assert timing.first_token_sec == pytest.approx(0.25)
+    assert timing.complete_sec == pytest.approx(0.9)
+
+def test_settled_reply_since_overrides_baseline():
+    ctrl = FakeController({"count": 3, "now": 0},
+                          {"timedOut": False, "firstTextAt": 0, "changedAt": 0})
+    ctrl.wait_for_settled_reply(timeout=1.0, since=0)
+    assert ctrl.awaited[0][0] == 0
+
+def test_settled_reply_timeout():
+    ctrl = FakeController({"count": 1, "now": 0}, {"timedOut": True})
+    with pytest.raises(TimeoutError):
+        ctrl.wait_for_reply(timeout=0.1)
+
+class ChatController(FakeController):
+    """FakeController over a list of assistant messages, read the way READ_SINCE_FN does."""
+    def __init__(self, messages):
+        super().__init__(None, None)
+        self.messages = messages
+        self.reads = []
+    def _reply_snapshot(self):
+        return {"count": len(self.messages), "now": 0}
+    def _read_messages(self, cursor):
+        self.reads.append(cursor)
+        start = cursor if len(self.messages) > cursor else max(0, len(self.messages) - 1)
+        return {"count": len(self.messages), "texts": self.messages[start:]}
+    get_latest_bot_text = BrowserControllerBase.get_latest_bot_text
+
+def test_reads_only_messages_past_the_cursor():
+    ctrl = ChatController(["Welcome.", "Level 1."])
+    assert ctrl.get_latest_bot_text() == "Welcome.\nLevel 1."
+    ctrl.send_text("hi")
+    ctrl.messages += ["I cannot say.", "But it is 'MAGIC'."]
+    # A reply split over two messages is read whole, from the send cursor onwards
+    assert ctrl.get_latest_bot_text() == "I cannot say.\nBut it is 'MAGIC'."
+    assert ctrl.reads == [0, 2]
+    # Nothing new: the latest message again
+    assert ctrl.get_latest_bot_text() == "But it is 'MAGIC'."
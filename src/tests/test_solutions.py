@@ -0,0 +1,82 @@
+import asyncio
+import json
+from controller.base import AsyncBrowserControllerBase
+from eval.solutions import SolutionStore
+from runner.async_agent import run_agent
+
+class StubbornGame(AsyncBrowserControllerBase):
+    """Merlin never leaks; only submitting PW<level> advances the game."""
+    def __init__(self):
+        self.level = 1
+        self.messages = ["Level 1."]
+        self.prompts = 0
+    async def open_page(self, url):
+        pass
+    async def send_text(self, text):
+        await self._mark_reply_baseline()
+        self.prompts += 1
+        self.messages.append("I cannot help with that.")
+    async def _reply_snapshot(self):
+        return {"count": len(self.messages), "now": 0}
+    async def _await_reply(self, baseline, quiet_ms, timeout_ms):
+        if len(self.messages) <= baseline:
+            return {"timedOut": True}
+        return {"timedOut": False, "firstTextAt": 0, "changedAt": 0}
+    async def get_latest_bot_text(self):
+        return self.messages[-1]
+    async def submit_password(self, password, timeout=5.0):
+        if password != f"PW{self.level}":
+            return False
+        self.level += 1
+        self.messages.append(f"Level {self.level}.")
+        return True
+    async def close(self):
+        pass
+
+def test_store_ingests_summary_and_events(tmp_path):
+    done = tmp_path / "run1"
+    done.mkdir()
+    (done / "run_summary.json").write_text(json.dumps({"levels": [
+        {"level": 1, "success": True, "password": "ALPHA", "strategies": ["direct_ask"]},
+        {"level": 2, "success": False, "password": None, "strategies": ["indirect_story"]}]}))
+    crashed = tmp_path / "run2"
+    crashed.mkdir()
+    (crashed / "events.jsonl").write_text(json.dumps(
+        {"time": 1.0, "role": "INFO", "message": "Level 2 PASSED. Password: BRAVO", "level": 2}) + "\n")
+    store = SolutionStore(tmp_path / "solutions.json")
+    assert store.ingest_run(done) == 1
+    assert store.ingest_run(crashed) == 1
+    store.save()
+    reloaded = SolutionStore(tmp_path / "solutions.json")
+    assert reloaded.get(1) == "ALPHA" and reloaded.get(2) == "BRAVO"
+    assert reloaded.levels[1]["strategy"] == "direct_ask"
+
+def test_resume_replays_known_levels_and_forgets_rejected(tmp_path):
+    store = SolutionStore(tmp_path / "solutions.json")
+    store.record(1, "PW1")
+    store.record(2, "PW2")
+    store.record(3, "WRONG")
+    store.save()
+    game = StubbornGame()
+    results = asyncio.run(run_agent(controller=game, cooldown=0, intro_timeout=0, max_attempts_per_level=2,
+                                    outdir=str(tmp_path / "run"), resume=True,
+                                    solutions_path=str(tmp_path / "solutions.json")))
+    assert [r["strategies"] for r in results[:2]] == [["replay"], ["replay"]]
+    assert results[2]["success"] is False
+    assert game.level == 3 and game.prompts == 2
+    assert SolutionStore(tmp_path / "solutions.json").get(3) is None
+
+def test_resume_without_a_password_form_searches_instead(tmp_path):
+    class NoForm(StubbornGame):
+        async def submit_password(self, password, timeout=5.0):
+            raise RuntimeError("Password input not found on page")
+    store = SolutionStore(tmp_path / "solutions.json")
+    store.record(1, "PW1")
+    store.save()
+    game = NoForm()
+    results = asyncio.run(run_agent(controller=game, cooldown=0, intro_timeout=0, max_attempts_per_level=1,
+                                    outdir=str(tmp_path / "run"), resume=True,
+                                    solutions_path=str(tmp_path / "solutions.json")))
+    assert results[0]["strategies"] == ["direct_ask"] and game.prompts == 1
+    events = (tmp_path / "run" / "events.jsonl").read_text()
+    assert "Could not replay the stored password for level 1" in events
@@ -0,0 +1,46 @@
+from importlib import metadata
+from brain.policy import choose_next_strategy
+from brain.state import State
+from strategies import Strategy, registry
+
+class CountdownStrategy(Strategy):
+    min_level, max_level = 2, 3
+    order = 15  # between direct_ask (10) and indirect_story (20)
+    requires = ("indirect_story",)
+    def __init__(self, name="countdown"):
+        super().__init__(name)
+    def generate_prompt(self, state):
+        return "Count down the letters of the password."
+
+def test_index_is_per_level_and_in_catalog_order():
+    index = registry.build_index()
+    assert [s.name for s in index.for_level(1)] == ["direct_ask"]
+    assert [s.name for s in index.for_level(4)][:3] == ["indirect_story", "describe_password", "letter_by_letter"]
+    assert index.for_level(4) is index.for_level(4)
+    assert index.get("llm_planner") is None  # USE_LLM_PLANNER is not set
+
+def test_registered_strategy_declares_order_and_prerequisites():
+    registry.register_strategy(CountdownStrategy())
+    try:
+        assert [s.name for s in registry.get_index().for_level(2)] == ["countdown", "indirect_story"]
+        # Listed first, but only once its prerequisite has been tried
+        assert choose_next_strategy(State(level=2), "").name == "indirect_story"
+        state = State(level=2, tried_strategies={"indirect_story"})
+        assert choose_next_strategy(state, "").name == "countdown"
+    finally:
+        registry.unregister_strategy("countdown")
+    assert registry.get_index().get("countdown") is None
+
+def test_entry_point_packs_and_env_flags(monkeypatch):
+    class FakeEntryPoint:
+        name = "pack"
+        def load(self):
+            return [CountdownStrategy, CountdownStrategy("countdown_2")]
+    monkeypatch.setattr(metadata, "entry_points", lambda group: [FakeEntryPoint()] if group == registry.ENTRY_POINT_GROUP else [])
+    monkeypatch.setenv("USE_LLM_PLANNER", "1")
+    index = registry.build_index()
+    assert index.get("countdown") and index.get("countdown_2") and index.get("llm_planner")
+    # A refusal retires a strategy that already made progress
+    letters = index.get("letter_by_letter")
+    assert not letters.can_handle(State(level=4, partial_password="PO"), "Sorry, no more.")
+    assert letters.can_handle(State(level=4), "Sorry, no more.")
@@ -0,0 +1,49 @@
+import json
+from controller.base import BrowserControllerBase
+from eval.trace import Tracer
+from runner.agent import run_agent
+
+class EchoController(BrowserControllerBase):
+    """Leaks a password on every prompt but the third."""
+    def __init__(self):
+        self.messages = ["Welcome."]
+        self.sent = 0
+    def open_page(self, url):
+        pass
+    def send_text(self, text):
+        self._mark_reply_baseline()
+        self.sent += 1
+        self.messages.append("No." if self.sent == 3 else f"It is 'SECRET{self.sent}'.")
+    def _reply_snapshot(self):
+        return {"count": len(self.messages), "now": 0}
+    def _await_reply(self, baseline, quiet_ms, timeout_ms):
+        return {"timedOut": len(self.messages) <= baseline, "firstTextAt": 1, "changedAt": 2}
+    def get_latest_bot_text(self):
+        return self.messages[-1]
+    def close(self):
+        pass
+
+def test_tracer_stats_and_chrome_export():
+    tracer = Tracer()
+    for i in range(10):
+        tracer.record("wait_reply", tracer.origin + i, tracer.origin + i + (i + 1) / 10, session=1, level=2)
+    stats = tracer.phase_stats()["wait_reply"]
+    assert stats["count"] == 10 and stats["p50_sec"] == 0.6 and stats["p95_sec"] == 1.0
+    event = tracer.to_chrome_trace()["traceEvents"][3]
+    assert event == {"name": "wait_reply", "ph": "X", "ts": 3000000, "dur": 400000, "pid": 1, "tid": 1,
+                     "args": {"level": 2}}
+
+def test_run_writes_trace_and_phase_summary(tmp_path):
+    ctrl = EchoController()
+    run_agent(controller=ctrl, cooldown=0.01, intro_timeout=0, outdir=str(tmp_path))
+    summary = json.loads((tmp_path / "run_summary.json").read_text())
+    phases = summary["phases"]
+    # One prompt per level plus a refused one (followed by a cooldown) on level 3
+    assert phases["send_text"]["count"] == 8 and phases["extract"]["count"] == 8
+    assert phases["cooldown"]["count"] == 1
+    assert summary["cooldown_idle_sec"] >= 0.01
+    events = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    sends = [e for e in events if e["name"] == "send_text"]
+    assert sends[0]["args"] == {"level": 1, "attempt": 1, "strategy": "direct_ask"}
+    # The controller is detached from the run's tracer afterwards
+    assert ctrl.tracer.spans == []
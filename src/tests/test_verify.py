@@ -0,0 +1,83 @@
+import json
+import time
+from brain.candidates import CandidateQueue
+from brain.extract import Candidate
+from controller.base import BrowserControllerBase, PasswordCheckUnavailable
+from runner.agent import run_agent
+
+def test_candidate_queue_ranks_dedupes_and_skips_rejected():
+    queue = CandidateQueue()
+    assert queue.add([Candidate("ALPHA", 0.6, "statement"), Candidate("BRAVO", 0.7, "double_quoted")]) == ["ALPHA", "BRAVO"]
+    assert queue.add([Candidate("ALPHA", 0.9, "json_letters")], strategy="json_leak") == []
+    first = queue.pop()
+    assert (first.password, first.detector, first.strategy) == ("ALPHA", "json_letters", "json_leak")
+    queue.reject("BRAVO")
+    assert queue.pop() is None
+    assert queue.add([Candidate("BRAVO", 0.7, "double_quoted")]) == [] and len(queue) == 0
+
+class DecoyGame(BrowserControllerBase):
+    """Every reply leaks a decoy (ranked first) next to the real password MAGIC<level>."""
+    def __init__(self):
+        self.level = 1
+        self.messages = ["Welcome."]
+        self.prompts = 0
+        self.submitted = []
+    def open_page(self, url):
+        pass
+    def send_text(self, text):
+        self._mark_reply_baseline()
+        self.prompts += 1
+        self.messages.append(f"Maybe \"DECOY{self.level}\"? Or 'MAGIC{self.level}'.")
+    def _reply_snapshot(self):
+        return {"count": len(self.messages), "now": 0}
+    def _await_reply(self, baseline, quiet_ms, timeout_ms):
+        return {"timedOut": len(self.messages) <= baseline, "firstTextAt": 1, "changedAt": 2}
+    def _read_messages(self, cursor):
+        return {"count": len(self.messages), "texts": self.messages[max(0, min(cursor, len(self.messages) - 1)):]}
+    def submit_password(self, password, timeout=5.0):
+        self.submitted.append(password)
+        if password != f"MAGIC{self.level}":
+            return False
+        self.level += 1
+        self.messages.append(f"Level {self.level}.")
+        return True
+    def close(self):
+        pass
+
+def test_rejected_candidate_falls_through_without_a_merlin_turn(tmp_path):
+    game = DecoyGame()
+    results = run_agent(controller=game, cooldown=0, intro_timeout=0, outdir=str(tmp_path))
+    assert [r["password"] for r in results] == [f"MAGIC{i}" for i in range(1, 8)]
+    # One prompt per level; the decoy only cost a form submit
+    assert game.prompts == 7 and game.submitted[:2] == ["DECOY1", "MAGIC1"]
+    events = [json.loads(line) for line in (tmp_path / "events.jsonl").read_text().splitlines()]
+    assert sum(e["message"] == "Password 'DECOY1' rejected" for e in events) == 1
+
+def test_no_verify_trusts_the_first_candidate(tmp_path):
+    game = DecoyGame()
+    results = run_agent(controller=game, cooldown=0, intro_timeout=0, outdir=str(tmp_path), verify=False)
+    assert results[0]["password"] == "DECOY1" and game.submitted == []
+
+def test_broken_password_form_falls_back_to_unverified(tmp_path):
+    class NoForm(DecoyGame):
+        def submit_password(self, password, timeout=5.0):
+            raise RuntimeError("Password input not found on page")
+    results = run_agent(controller=NoForm(), cooldown=0, intro_timeout=0, outdir=str(tmp_path))
+    assert len(results) == 7 and results[0]["password"] == "DECOY1"
+    events = [json.loads(line) for line in (tmp_path / "events.jsonl").read_text().splitlines()]
+    assert any(e["message"].startswith("Password check failed (Password input not found") for e in events)
+
+def test_unjudged_submit_is_retried_not_rejected(tmp_path, monkeypatch):
+    monkeypatch.setattr(time, "sleep", lambda sec: None)
+    class Throttled(DecoyGame):
+        throttled = 4  # more than one candidate's retries
+        def submit_password(self, password, timeout=5.0):
+            if self.throttled:
+                self.throttled -= 1
+                raise PasswordCheckUnavailable("password check failed with HTTP 429")
+            return super().submit_password(password, timeout)
+    game = Throttled()
+    results = run_agent(controller=game, cooldown=0, intro_timeout=0, outdir=str(tmp_path))
+    assert [r["password"] for r in results] == [f"MAGIC{i}" for i in range(1, 8)]
+    # The decoy stayed queued through the rate limit and was only rejected once the game judged it
+    assert game.prompts == 7 and game.submitted[:2] == ["DECOY1", "MAGIC1"]
@@ -12,3 +12,17 @@ ASSISTANT_MSG = ".assistant"
 
 # (Optional) Selector for user message elements (if needed for filtering).
 USER_MSG = ".user"
+
+# Password submission form shown next to the chat. Submitting the right
+# password advances the game to the next level.
+PASSWORD_INPUT = "input[type=password], input[placeholder*='password' i]"
+
+# Messages the page shows when a submitted password is wrong.
+PASSWORD_ERROR = "[role='alert'], [class*='error' i], [class*='wrong' i], [class*='incorrect' i]"
+
+# Element whose text contains the current level number (e.g. "Level 3").
+LEVEL_INDICATOR = "[class*='level' i], h1, h2"
+
+# URL pattern (regex) of the chat API the page posts prompts to; used by the
+# network reply capture mode instead of reading messages from the page.
+CHAT_API_PATTERN = r"/api/(?:chat|messages?|ask)\b"
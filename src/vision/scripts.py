@@ -0,0 +1,208 @@
+"""
+In-page JavaScript snippets injected by the browser controllers.
+The reply watcher is a MutationObserver that keeps track of Merlin's messages,
+so controllers can wait for a reply without polling the DOM from Python.
+"""
+import json
+from vision import locators
+
+# Installs window.__merlinWatch once per document. The observer keeps the
+# assistant message nodes, their count and the text length of the last one up
+# to date, and wakes any pending waitFor() promise whenever either changes.
+# Only mutations that add or remove elements re-query the message list; streamed
+# text just re-measures the last message, so a token costs the same at any
+# conversation length.
+WATCHER_INSTALL_JS = """
+(() => {
+  if (window.__merlinWatch) return;
+  const sel = %s;
+  // appearedAt: newest message added; firstTextAt: it first showed text;
+  // changedAt: last change to count or text (all Date.now() milliseconds)
+  const w = {nodes: [], count: 0, textLen: 0, appearedAt: 0, firstTextAt: 0, changedAt: 0, listeners: new Set()};
+  const refresh = (records) => {
+    const isElement = (n) => n.nodeType === 1;
+    if (!records || records.some((r) => Array.prototype.some.call(r.addedNodes, isElement)
+                                        || Array.prototype.some.call(r.removedNodes, isElement))) {
+      w.nodes = Array.from(document.querySelectorAll(sel));
+    }
+    const nodes = w.nodes;
+    const last = nodes.length ? nodes[nodes.length - 1] : null;
+    const textLen = last ? (last.textContent || "").length : 0;
+    if (nodes.length === w.count && textLen === w.textLen) return;
+    const now = Date.now();
+    if (nodes.length !== w.count) {
+      w.appearedAt = now;
+      w.firstTextAt = textLen ? now : 0;
+    } else if (!w.firstTextAt && textLen) {
+      w.firstTextAt = now;
+    }
+    w.count = nodes.length;
+    w.textLen = textLen;
+    w.changedAt = now;
+    w.listeners.forEach((fn) => fn());
+  };
+  w.waitFor = (baseline, quietMs, timeoutMs) => new Promise((resolve) => {
+    let quiet = null;
+    let deadline = null;
+    const finish = (timedOut) => {
+      clearTimeout(quiet);
+      clearTimeout(deadline);
+      w.listeners.delete(check);
+      resolve({count: w.count, textLen: w.textLen, timedOut: timedOut, appearedAt: w.appearedAt,
+               firstTextAt: w.firstTextAt || w.appearedAt, changedAt: w.changedAt});
+    };
+    const check = () => {
+      if (w.count <= baseline) return;
+      // A new message exists; resolve once its text stops changing
+      clearTimeout(quiet);
+      quiet = setTimeout(() => finish(false), quietMs);
+    };
+    deadline = setTimeout(() => finish(true), timeoutMs);
+    w.listeners.add(check);
+    check();
+  });
+  window.__merlinWatch = w;
+  new MutationObserver(refresh).observe(document, {childList: true, subtree: true, characterData: true});
+  refresh();
+})();
+""" % json.dumps(locators.ASSISTANT_MSG)
+
+# Current assistant message count plus the page clock, taken right before a
+# prompt is submitted (falls back to a direct query if the watcher is missing).
+SNAPSHOT_JS = """(() => ({
+  count: window.__merlinWatch ? window.__merlinWatch.count : document.querySelectorAll(%s).length,
+  now: Date.now(),
+}))()""" % json.dumps(locators.ASSISTANT_MSG)
+
+# Selenium execute_async_script body: (baseline, quiet_ms, timeout_ms, callback).
+# Re-installs the watcher first in case the page navigated since open_page.
+WAIT_ASYNC_JS = WATCHER_INSTALL_JS + """
+const done = arguments[arguments.length - 1];
+window.__merlinWatch.waitFor(arguments[0], arguments[1], arguments[2]).then(done);
+"""
+
+# Playwright page.evaluate expression taking [baseline, quiet_ms, timeout_ms].
+WAIT_EVAL_JS = "([baseline, quietMs, timeoutMs]) => window.__merlinWatch.waitFor(baseline, quietMs, timeoutMs)"
+
+# Function taking the message cursor; returns {count, texts} with the text of
+# every assistant message at index >= cursor (oldest first), or of just the last
+# message if none is new. Uses the watcher's node list when it is installed.
+READ_SINCE_FN = """(cursor) => {
+  const nodes = window.__merlinWatch ? window.__merlinWatch.nodes : Array.from(document.querySelectorAll(%s));
+  const start = nodes.length > cursor ? cursor : Math.max(0, nodes.length - 1);
+  return {count: nodes.length, texts: nodes.slice(start).map((n) => n.innerText || n.textContent || "")};
+}""" % json.dumps(locators.ASSISTANT_MSG)
+
+# Function taking [text, waitMs]: puts `text` into the chat input and submits it
+# with synthetic input and Enter key events, all in one call. Resolves
+# {found, submitted}; submitted is true once the page took the prompt (the box
+# was cleared or a user message appeared within waitMs). A page that ignores
+# synthetic events gets its box emptied again so the caller can type for real.
+FAST_SUBMIT_FN = """([text, waitMs]) => new Promise((resolve) => {
+  const box = document.querySelector(%s);
+  if (!box) return resolve({found: false, submitted: false});
+  const userCount = () => document.querySelectorAll(%s).length;
+  const read = () => box.isContentEditable ? box.textContent : box.value;
+  const write = (value) => {
+    if (box.isContentEditable) { box.textContent = value; }
+    else {
+      // The prototype setter keeps framework-controlled inputs (e.g. React) in sync
+      const proto = box instanceof HTMLTextAreaElement ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+      Object.getOwnPropertyDescriptor(proto, "value").set.call(box, value);
+    }
+    box.dispatchEvent(new Event("input", {bubbles: true}));
+  };
+  const before = userCount();
+  box.focus();
+  write(text);
+  const key = (type) => box.dispatchEvent(new KeyboardEvent(type, {key: "Enter", code: "Enter", keyCode: 13,
+                                                                   which: 13, bubbles: true, cancelable: true}));
+  const unhandled = key("keydown");
+  key("keypress");
+  key("keyup");
+  if (unhandled && box.form && box.form.requestSubmit) box.form.requestSubmit();
+  const started = Date.now();
+  const check = () => {
+    if (read() !== text || userCount() > before) return resolve({found: true, submitted: true});
+    if (Date.now() - started >= waitMs) {
+      write("");
+      return resolve({found: true, submitted: false});
+    }
+    setTimeout(check, 10);
+  };
+  check();
+})""" % (json.dumps(locators.CHAT_INPUT), json.dumps(locators.USER_MSG))
+
+# Selenium execute_async_script body: (text, wait_ms, callback).
+FAST_SUBMIT_ASYNC_JS = """
+const done = arguments[arguments.length - 1];
+(%s)([arguments[0], arguments[1]]).then(done);
+""" % FAST_SUBMIT_FN
+
+# Reads the current level number from the level indicator (null if absent).
+_READ_LEVEL_JS = """() => {
+  const el = document.querySelector(%s);
+  const m = el ? (el.textContent || "").match(/\\d+/) : null;
+  return m ? parseInt(m[0], 10) : null;
+}""" % json.dumps(locators.LEVEL_INDICATOR)
+
+# Expression evaluating to the current level number.
+LEVEL_JS = "(%s)()" % _READ_LEVEL_JS
+
+# Text of the password error messages (PASSWORD_ERROR), joined.
+_READ_PASSWORD_ERRORS_JS = """() => Array.from(document.querySelectorAll(%s), (el) => el.innerText || "").join("\\n").trim()""" \
+    % json.dumps(locators.PASSWORD_ERROR)
+
+# Expression evaluating to {level, errors}: the page before a password is submitted.
+PASSWORD_BASELINE_JS = "({level: (%s)(), errors: (%s)()})" % (_READ_LEVEL_JS, _READ_PASSWORD_ERRORS_JS)
+
+# Function taking [baseline, timeoutMs, rejectQuietMs], baseline from PASSWORD_BASELINE_JS
+# read before the password was submitted; resolves true as soon as the level indicator
+# shows a different level (password accepted) and false as soon as the page rejects it:
+# an error message under PASSWORD_ERROR that is new or re-rendered since the submit, or
+# the password box emptied while the level stays the same for rejectQuietMs. False on timeout.
+# Form values do not trigger mutations, so the box is also polled.
+WAIT_PASSWORD_RESULT_FN = """([before, timeoutMs, rejectQuietMs]) => new Promise((resolve) => {
+  const read = %s;
+  const errorText = %s;
+  const errorSel = %s;
+  const box = document.querySelector(%s);
+  let timer = null, poll = null, clearedAt = null, errorChanged = false;
+  // A repeated identical error is still a new rejection if its element was (re)rendered
+  const touchesError = (r) => {
+    const el = r.target.nodeType === 1 ? r.target : r.target.parentElement;
+    return (el && el.closest(errorSel)) ||
+      Array.from(r.addedNodes).some((n) => n.nodeType === 1 && (n.matches(errorSel) || n.querySelector(errorSel)));
+  };
+  const obs = new MutationObserver((records) => {
+    errorChanged = errorChanged || records.some(touchesError);
+    check();
+  });
+  const finish = (ok) => {
+    obs.disconnect();
+    clearTimeout(timer);
+    clearInterval(poll);
+    resolve(ok);
+  };
+  const check = () => {
+    const level = read();
+    if (level !== null && level !== before.level) return finish(true);
+    const errors = errorText();
+    if (errors && (errors !== before.errors || errorChanged)) return finish(false);
+    if (box && !box.value) {
+      clearedAt = clearedAt === null ? Date.now() : clearedAt;
+      if (Date.now() - clearedAt >= rejectQuietMs) finish(false);
+    }
+  };
+  obs.observe(document, {childList: true, subtree: true, characterData: true});
+  poll = setInterval(check, 50);
+  timer = setTimeout(() => finish(false), timeoutMs);
+  check();
+})""" % (_READ_LEVEL_JS, _READ_PASSWORD_ERRORS_JS, json.dumps(locators.PASSWORD_ERROR),
+         json.dumps(locators.PASSWORD_INPUT))
+
+# Selenium execute_async_script body: (baseline, timeout_ms, reject_quiet_ms, callback).
+WAIT_PASSWORD_RESULT_ASYNC_JS = """
+const done = arguments[arguments.length - 1];
+(%s)([arguments[0], arguments[1], arguments[2]]).then(done);
+""" % WAIT_PASSWORD_RESULT_FN